@@ -2,8 +2,203 @@
 # Este archivo se utiliza para registrar los modelos de la aplicación 'gestion'
 # en la interfaz de administración de Django. Esto permite a los administradores
 # gestionar los datos de estos modelos a través de una interfaz web.
+#
+# Los listados están pensados para tablas grandes:
+# - Las relaciones que muestra cada fila se cargan en la misma consulta (list_select_related),
+#   así que el listado usa un número fijo de consultas, sin importar cuántas filas muestre.
+# - Los campos de clave foránea y muchos a muchos usan autocompletado en lugar de cargar
+#   todas las filas de la tabla en un <select>.
+# - La búsqueda de clientes, vehículos y órdenes usa el índice de texto completo (ver busqueda.py)
+#   o índices de la tabla, nunca LIKE '%texto%' sobre toda la tabla.
+# - Sin filtros, el total de filas de una tabla grande se estima con las estadísticas de SQLite
+#   (ANALYZE) en lugar de contarlas con COUNT(*).
+# - Las acciones masivas se ejecutan con uno o dos UPDATE, sin cargar las filas seleccionadas.
 
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.core.paginator import Paginator
+from django.db import connection
+from django.utils.functional import cached_property
 
-# Registra tus modelos aquí.
-# Ejemplo: admin.site.register(TuModelo)
+from .busqueda import subconsulta_ids
+from .eliminacion import eliminar_clientes, eliminar_vehiculos
+from .forms import VehiculoForm
+from .models import Cliente, Vehiculo, Servicio, OrdenReparacion
+
+# A partir de esta cantidad de filas estimadas se muestra la estimación en lugar de contarlas.
+UMBRAL_CONTEO_ESTIMADO = 10000
+
+
+def filas_estimadas(tabla):
+    """
+    Devuelve la cantidad de filas de 'tabla' según las estadísticas de SQLite (tabla sqlite_stat1,
+    que llena ANALYZE), o None si todavía no hay estadísticas. Lee una sola fila.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+        if cursor.fetchone() is None:
+            return None
+        cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [tabla])
+        fila = cursor.fetchone()
+    return int(fila[0].split()[0]) if fila else None
+
+
+class PaginadorEstimado(Paginator):
+    """
+    Paginador del admin que, cuando el listado no tiene filtros ni búsqueda (su consulta filtra
+    igual que 'base', el queryset del ModelAdmin), usa la cantidad de filas estimada de la tabla
+    si supera UMBRAL_CONTEO_ESTIMADO. Con filtros o en tablas pequeñas cuenta las filas.
+    """
+    def __init__(self, object_list, per_page, orphans=0, allow_empty_first_page=True, base=None):
+        super().__init__(object_list, per_page, orphans, allow_empty_first_page)
+        self.base = base
+
+    @cached_property
+    def count(self):
+        if self.base is not None and self.object_list.query.where == self.base.query.where:
+            estimadas = filas_estimadas(self.object_list.model._meta.db_table)
+            if estimadas is not None and estimadas >= UMBRAL_CONTEO_ESTIMADO:
+                return estimadas
+        return super().count
+
+
+class AdminTablaGrande(admin.ModelAdmin):
+    """
+    Configuración común de los ModelAdmin de la aplicación: paginador con conteo estimado y
+    sin el segundo COUNT(*) de la tabla completa al filtrar ("N de M seleccionados").
+    """
+    show_full_result_count = False
+    list_per_page = 50
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        return PaginadorEstimado(queryset, per_page, orphans, allow_empty_first_page, base=self.get_queryset(request))
+
+
+class AdminEliminacionSuave(AdminTablaGrande):
+    """
+    Para clientes y vehículos, eliminar desde el admin los marca como eliminados y programa la
+    purga, como en la interfaz (ver eliminacion.py), con uno o dos UPDATE para toda la selección.
+    La página de confirmación no recorre las órdenes de cada fila: la purga las borra después.
+    """
+    eliminar = None # Función de eliminacion.py que marca como eliminado un queryset
+
+    def delete_model(self, request, obj):
+        type(self).eliminar(self.model.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        type(self).eliminar(queryset)
+
+    def get_deleted_objects(self, objs, request):
+        objetos = list(objs)
+        return [str(objeto) for objeto in objetos], {self.model._meta.verbose_name_plural: len(objetos)}, set(), []
+
+
+@admin.register(Cliente)
+class ClienteAdmin(AdminEliminacionSuave):
+    """
+    Administración de clientes. La búsqueda usa el índice de texto completo: encuentra clientes
+    por nombre, apellido, teléfono, email o por los datos de sus vehículos.
+    """
+    list_display = ['id', 'nombre', 'apellido', 'telefono', 'email']
+    search_fields = ['nombre', 'apellido', 'telefono', 'email'] # Documentan la búsqueda; ver get_search_results
+    readonly_fields = ['modificado']
+    eliminar = eliminar_clientes
+
+    def get_search_results(self, request, queryset, search_term):
+        ids = subconsulta_ids(search_term, 'cliente')
+        if ids is None:
+            return queryset, False
+        return queryset.filter(pk__in=ids), False
+
+
+@admin.register(Vehiculo)
+class VehiculoAdmin(AdminEliminacionSuave):
+    """
+    Administración de vehículos. La búsqueda usa el índice de texto completo (patente, marca y modelo).
+    """
+    list_display = ['patente', 'marca', 'modelo', 'año', 'cliente']
+    list_select_related = ['cliente'] # Cliente de cada fila en la misma consulta
+    search_fields = ['patente', 'marca', 'modelo'] # Documentan la búsqueda; ver get_search_results
+    form = VehiculoForm # Patente en mayúsculas y sin chocar con un vehículo eliminado sin purgar
+    autocomplete_fields = ['cliente']
+    readonly_fields = ['modificado']
+    eliminar = eliminar_vehiculos
+
+    def get_search_results(self, request, queryset, search_term):
+        ids = subconsulta_ids(search_term, 'vehiculo')
+        if ids is None:
+            return queryset, False
+        return queryset.filter(pk__in=ids), False
+
+
+@admin.register(Servicio)
+class ServicioAdmin(AdminTablaGrande):
+    """
+    Administración de servicios. Cambiar un precio desde aquí también recalcula el monto de las
+    órdenes abiertas que incluyen el servicio (ver signals.py).
+    """
+    list_display = ['nombre', 'precio']
+    search_fields = ['nombre']
+    readonly_fields = ['modificado']
+
+
+@admin.register(OrdenReparacion)
+class OrdenReparacionAdmin(AdminTablaGrande):
+    """
+    Administración de órdenes de reparación. Se busca por número de orden o, con el índice de
+    texto completo, por los datos del vehículo o del cliente.
+    """
+    list_display = ['id', 'patente', 'cliente', 'fecha_ingreso', 'fecha_salida', 'estado', 'monto_total']
+    list_select_related = ['vehiculo__cliente'] # Vehículo y cliente de cada fila en la misma consulta
+    list_filter = ['estado']
+    date_hierarchy = 'fecha_ingreso' # Usa el índice de fecha de ingreso
+    search_fields = ['=id', 'vehiculo__patente'] # Documentan la búsqueda; ver get_search_results
+    search_help_text = 'Número de orden, patente, o nombre o teléfono del cliente.'
+    autocomplete_fields = ['vehiculo', 'servicios']
+    readonly_fields = ['monto_total', 'modificado'] # El monto se calcula a partir de los servicios
+    actions = ['marcar_en_progreso', 'marcar_finalizado', 'recalcular_montos']
+
+    def get_queryset(self, request):
+        # Sin las órdenes de vehículos eliminados pendientes de purga, como en la interfaz
+        return super().get_queryset(request).visibles()
+
+    def get_search_results(self, request, queryset, search_term):
+        termino = search_term.strip()
+        if termino.isdigit():
+            return queryset.filter(pk=int(termino)), False
+        ids = subconsulta_ids(termino, 'cliente')
+        if ids is None:
+            return queryset, False
+        # Órdenes de los vehículos que coinciden (patente, marca, modelo) o de los clientes que
+        # coinciden por sus datos o por los de alguno de sus vehículos.
+        vehiculos = subconsulta_ids(termino, 'vehiculo')
+        return queryset.filter(vehiculo__in=vehiculos) | queryset.filter(vehiculo__cliente__in=ids), False
+
+    @admin.display(description='Patente', ordering='vehiculo__patente')
+    def patente(self, orden):
+        return orden.vehiculo.patente
+
+    @admin.display(description='Cliente', ordering='vehiculo__cliente__apellido')
+    def cliente(self, orden):
+        return orden.vehiculo.cliente
+
+    def cambiar_estado(self, request, queryset, estado):
+        seleccionadas = queryset.count() # Antes del UPDATE: el filtro por estado del listado puede dejar de cumplirse
+        actualizadas = queryset.cambiar_estado(estado)
+        omitidas = seleccionadas - actualizadas
+        etiqueta = dict(OrdenReparacion.ESTADO_CHOICES)[estado]
+        self.message_user(request, f'{actualizadas} órdenes cambiadas a "{etiqueta}".', messages.SUCCESS)
+        if omitidas:
+            self.message_user(request, f'{omitidas} órdenes no se cambiaron porque su estado actual no lo permite.', messages.WARNING)
+
+    @admin.action(description='Marcar como "En Progreso" las órdenes seleccionadas')
+    def marcar_en_progreso(self, request, queryset):
+        self.cambiar_estado(request, queryset, 'en_progreso')
+
+    @admin.action(description='Marcar como "Finalizado" las órdenes seleccionadas')
+    def marcar_finalizado(self, request, queryset):
+        self.cambiar_estado(request, queryset, 'finalizado')
+
+    @admin.action(description='Recalcular el monto total de las órdenes seleccionadas')
+    def recalcular_montos(self, request, queryset):
+        actualizadas = queryset.recalcular_montos()
+        self.message_user(request, f'Monto total recalculado en {actualizadas} órdenes.', messages.SUCCESS)
@@ -0,0 +1,43 @@
+# gestion/almacenamiento.py
+# Este archivo define el almacenamiento de archivos estáticos usado en producción
+# (ver proyectotaller/settings_produccion.py).
+
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+# Extensiones de archivos de texto que vale la pena comprimir.
+EXTENSIONES_COMPRIMIBLES = ('.css', '.js', '.svg', '.html', '.txt', '.json', '.map', '.xml')
+
+
+class ManifestComprimido(ManifestStaticFilesStorage):
+    """
+    Almacenamiento de archivos estáticos con el hash del contenido en el nombre
+    (ManifestStaticFilesStorage) que, además, guarda una copia comprimida con gzip
+    ('nombre.hash.css.gz') de cada archivo de texto procesado por collectstatic.
+    Así el servidor web puede enviar la versión comprimida sin comprimir en cada solicitud.
+    """
+    def post_process(self, paths, dry_run=False, **options):
+        procesados = set()
+        for original, procesado, modificado in super().post_process(paths, dry_run, **options):
+            if procesado and not isinstance(modificado, Exception):
+                procesados.add(procesado)
+            yield original, procesado, modificado
+        if dry_run:
+            return
+        # Se comprime al final, cuando ya terminaron todas las pasadas que reescriben las referencias.
+        for nombre in sorted(procesados):
+            if nombre.endswith(EXTENSIONES_COMPRIMIBLES):
+                self.comprimir(nombre)
+
+    def comprimir(self, nombre):
+        """
+        Guarda 'nombre.gz' junto al archivo, solo si la versión comprimida es más pequeña.
+        """
+        ruta = self.path(nombre)
+        with open(ruta, 'rb') as archivo:
+            contenido = archivo.read()
+        comprimido = gzip.compress(contenido, compresslevel=9, mtime=0)
+        if len(comprimido) < len(contenido):
+            with open(ruta + '.gz', 'wb') as archivo:
+                archivo.write(comprimido)
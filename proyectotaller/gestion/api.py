@@ -0,0 +1,175 @@
+# gestion/api.py
+# Este archivo define la API JSON de solo lectura de la aplicación 'gestion', pensada para
+# clientes que consultan periódicamente (por ejemplo, las tablets del tablero de órdenes).
+#
+# Cada listado se pagina por cursor y admite elegir los campos devueltos. Las respuestas
+# llevan un ETag fuerte calculado a partir de los IDs y las fechas de modificación ('modificado')
+# de las filas de la página y de sus cursores, que se leen con una consulta liviana.
+# Si el cliente envía If-None-Match y la página no cambió, se responde 304 sin cargar las
+# filas completas ni serializarlas.
+#
+# No se envía Last-Modified: la fecha de modificación más reciente de la página no cambia (o
+# retrocede) cuando una fila sale de la página, así que If-Modified-Since respondería 304 para
+# una página distinta.
+
+import hashlib
+
+from django.http import HttpResponseBadRequest, JsonResponse
+from django.views.decorators.http import condition, require_safe
+from .models import Cliente, Vehiculo, Servicio, OrdenReparacion
+from .paginacion import CursorInvalido, armar_pagina, consulta_keyset, leer_tamano_pagina
+
+
+class RecursoApi:
+    """
+    Describe un listado de la API: modelo, campos disponibles, campo de orden de la paginación,
+    filtros admitidos en la URL (parámetro -> lookup del ORM) y filtros que se aplican siempre.
+    """
+    def __init__(self, nombre, modelo, campos, orden='id', filtros=None, base=None):
+        self.nombre = nombre
+        self.modelo = modelo
+        self.campos = campos
+        self.orden = orden
+        self.filtros = filtros or {}
+        self.base = base or {}
+
+    def visibles(self):
+        """
+        Devuelve todas las filas visibles del recurso, sin cargar relaciones.
+        """
+        return self.modelo.objects.filter(**self.base)
+
+    def queryset(self):
+        """
+        Devuelve el queryset base del recurso, con las relaciones que requieren sus campos.
+        """
+        queryset = self.visibles()
+        if 'servicios' in self.campos:
+            queryset = queryset.prefetch_related('servicios')
+        return queryset
+
+    def serializar(self, objeto, campos):
+        """
+        Convierte un objeto en un diccionario con los campos pedidos.
+        Las claves foráneas se devuelven como ID y las relaciones muchos a muchos como lista de IDs.
+        """
+        datos = {}
+        for campo in campos:
+            if campo == 'servicios':
+                datos[campo] = [servicio.pk for servicio in objeto.servicios.all()]
+                continue
+            campo_modelo = self.modelo._meta.get_field(campo)
+            valor = getattr(objeto, campo_modelo.attname)
+            if hasattr(valor, 'isoformat'):
+                valor = valor.isoformat()
+            elif campo_modelo.get_internal_type() == 'DecimalField':
+                valor = int(valor) if campo_modelo.decimal_places == 0 else str(valor)
+            datos[campo] = valor
+        return datos
+
+
+RECURSOS = {
+    'ordenes': RecursoApi(
+        'ordenes',
+        OrdenReparacion,
+        ['id', 'vehiculo', 'servicios', 'fecha_ingreso', 'fecha_salida', 'estado', 'monto_total', 'modificado'],
+        orden='fecha_ingreso',
+        filtros={'estado': 'estado', 'vehiculo': 'vehiculo_id'},
+        base={'vehiculo__eliminado_en__isnull': True}, # Sin las órdenes de vehículos eliminados
+    ),
+    'vehiculos': RecursoApi(
+        'vehiculos',
+        Vehiculo,
+        ['id', 'patente', 'marca', 'modelo', 'año', 'cliente', 'modificado'],
+        filtros={'cliente': 'cliente_id'},
+    ),
+    'clientes': RecursoApi('clientes', Cliente, ['id', 'nombre', 'apellido', 'telefono', 'email', 'modificado']),
+    'servicios': RecursoApi('servicios', Servicio, ['id', 'nombre', 'precio', 'modificado']),
+}
+
+
+class ParametroInvalido(ValueError):
+    """
+    Se lanza cuando un parámetro de la URL de la API no es válido.
+    """
+
+
+def estado_pagina(request, recurso):
+    """
+    Lee la página pedida con una consulta que solo trae el ID, el campo de orden y la fecha de
+    modificación de cada fila. Devuelve un diccionario con la página, los campos pedidos y el ETag.
+    Se calcula una sola vez por solicitud.
+    """
+    if getattr(request, '_estado_api', None) is not None:
+        return request._estado_api
+
+    campos = [campo.strip() for campo in request.GET.get('campos', '').split(',') if campo.strip()] or recurso.campos
+    desconocidos = [campo for campo in campos if campo not in recurso.campos]
+    if desconocidos:
+        raise ParametroInvalido(f"Campos desconocidos: {', '.join(desconocidos)}.")
+
+    despues, antes = request.GET.get('despues'), request.GET.get('antes')
+    tamano = leer_tamano_pagina(request)
+    try:
+        queryset = recurso.visibles()
+        for parametro, lookup in recurso.filtros.items():
+            if parametro in request.GET:
+                queryset = queryset.filter(**{lookup: request.GET[parametro]})
+        filas = list(consulta_keyset(queryset.only('pk', recurso.orden, 'modificado'), recurso.orden, despues, antes, tamano))
+    except (CursorInvalido, ValueError) as exc:
+        raise ParametroInvalido("Parámetros de filtro o cursor inválidos.") from exc
+    pagina = armar_pagina(filas, recurso.orden, despues, antes, tamano)
+
+    # El ETag depende del recurso, los campos, las filas de la página (ID y fecha de modificación)
+    # y los cursores, así que cambia si se modifica, agrega o elimina cualquier fila de la página.
+    huella = hashlib.sha256(recurso.nombre.encode())
+    huella.update(','.join(campos).encode())
+    huella.update(f'{pagina.siguiente}|{pagina.anterior}'.encode())
+    for objeto in pagina:
+        huella.update(f'|{objeto.pk}:{objeto.modificado.isoformat()}'.encode())
+    request._estado_api = {
+        'pagina': pagina,
+        'campos': campos,
+        'etag': huella.hexdigest()[:32],
+    }
+    return request._estado_api
+
+
+def vista_api(nombre):
+    """
+    Construye la vista de listado de un recurso, con soporte de GET condicional.
+    """
+    recurso = RECURSOS[nombre]
+
+    def etag(request):
+        try:
+            return estado_pagina(request, recurso)['etag']
+        except ParametroInvalido:
+            return None
+
+    @require_safe
+    @condition(etag_func=etag)
+    def vista(request):
+        try:
+            estado = estado_pagina(request, recurso)
+        except ParametroInvalido as exc:
+            return HttpResponseBadRequest(str(exc))
+        pagina = estado['pagina']
+        # Se cargan las filas completas solo de los IDs ya conocidos, en el orden de la página.
+        objetos = recurso.queryset().in_bulk([objeto.pk for objeto in pagina])
+        resultados = [
+            recurso.serializar(objetos[objeto.pk], estado['campos'])
+            for objeto in pagina
+            if objeto.pk in objetos
+        ]
+        return JsonResponse({'resultados': resultados, 'siguiente': pagina.siguiente, 'anterior': pagina.anterior})
+
+    vista.__name__ = vista.__qualname__ = f'api_{nombre}'
+    return vista
+
+
+# Vistas de la API (ver urls.py)
+api_ordenes = vista_api('ordenes')
+api_vehiculos = vista_api('vehiculos')
+api_clientes = vista_api('clientes')
+api_servicios = vista_api('servicios')
@@ -13,3 +13,9 @@ class GestionConfig(AppConfig):
     """
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'gestion'
+
+    def ready(self):
+        """
+        Conecta los receptores de señales de la aplicación.
+        """
+        from . import signals  # noqa: F401
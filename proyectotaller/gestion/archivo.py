@@ -0,0 +1,105 @@
+# gestion/archivo.py
+# Este archivo implementa el archivo de órdenes de reparación finalizadas.
+# Las órdenes finalizadas hace tiempo se trasladan de la tabla de órdenes activas
+# (gestion_ordenreparacion) a la de órdenes archivadas (gestion_ordenarchivada), con sus
+# enlaces a servicios, para que los listados, filtros y el panel recorran solo las órdenes recientes.
+#
+# El traslado se hace por lotes, cada uno en su propia transacción, con INSERT ... SELECT y
+# DELETE directos: una orden nunca queda en ambas tablas ni en ninguna, y el bloqueo de escritura
+# de SQLite se libera entre lote y lote. El resumen del panel no cambia (ver la migración 0008).
+
+from heapq import merge
+from itertools import islice
+
+from django.db import connection, transaction
+from django.db.models import Q, prefetch_related_objects
+from django.utils import timezone
+
+from .models import OrdenReparacion, OrdenArchivada
+from .paginacion import TAMANO_PAGINA, armar_pagina, consulta_keyset
+
+# Cantidad de órdenes que se trasladan por transacción.
+LOTE_ARCHIVO = 500
+
+
+def ordenes_archivables(limite):
+    """
+    Devuelve las órdenes finalizadas antes de la fecha 'limite': las que salieron del taller
+    antes de esa fecha o, si no tienen fecha de salida, las que ingresaron antes.
+    """
+    return OrdenReparacion.objects.filter(estado='finalizado').filter(
+        Q(fecha_salida__lt=limite) | Q(fecha_salida__isnull=True, fecha_ingreso__lt=limite)
+    )
+
+
+def archivar_lote(limite, lote, archivada_en):
+    """
+    Traslada a las tablas de archivo hasta 'lote' órdenes archivables (las de menor ID) y sus
+    enlaces a servicios, en una transacción. Las órdenes se eligen dentro de la misma transacción,
+    así que una orden que cambió de estado entretanto no se traslada.
+    Devuelve la cantidad de órdenes trasladadas (0 cuando ya no quedan).
+    """
+    with transaction.atomic():
+        ids = list(ordenes_archivables(limite).order_by('pk').values_list('pk', flat=True)[:lote])
+        if not ids:
+            return 0
+        marcadores = ', '.join(['%s'] * len(ids))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'INSERT INTO gestion_ordenarchivada '
+                '(id, vehiculo_id, fecha_ingreso, fecha_salida, estado, monto_total, modificado, archivada_en) '
+                'SELECT id, vehiculo_id, fecha_ingreso, fecha_salida, estado, monto_total, modificado, %s '
+                f'FROM gestion_ordenreparacion WHERE id IN ({marcadores})',
+                [connection.ops.adapt_datetimefield_value(archivada_en), *ids],
+            )
+            cursor.execute(
+                'INSERT INTO gestion_ordenarchivada_servicios (ordenarchivada_id, servicio_id) '
+                'SELECT ordenreparacion_id, servicio_id FROM gestion_ordenreparacion_servicios '
+                f'WHERE ordenreparacion_id IN ({marcadores})',
+                ids,
+            )
+            cursor.execute(f'DELETE FROM gestion_ordenreparacion_servicios WHERE ordenreparacion_id IN ({marcadores})', ids)
+            cursor.execute(f'DELETE FROM gestion_ordenreparacion WHERE id IN ({marcadores})', ids)
+    return len(ids)
+
+
+def archivar_ordenes(limite, lote=LOTE_ARCHIVO, progreso=None):
+    """
+    Archiva por lotes todas las órdenes finalizadas antes de 'limite' (ver ordenes_archivables).
+    Si se indica, 'progreso' se llama después de cada lote con el total archivado hasta el momento.
+    Devuelve la cantidad total de órdenes archivadas.
+    """
+    archivada_en = timezone.now()
+    total = 0
+    while trasladadas := archivar_lote(limite, lote, archivada_en):
+        total += trasladadas
+        if progreso:
+            progreso(total)
+    return total
+
+
+def pagina_historial(despues=None, antes=None, tamano=TAMANO_PAGINA, **filtros):
+    """
+    Devuelve una página (PaginaKeyset, ver paginacion.py) de las órdenes activas y archivadas que
+    cumplen 'filtros' (por ejemplo vehiculo=vehiculo), con sus servicios, de la más reciente a la
+    más antigua. Las órdenes archivadas son instancias de OrdenArchivada, con los mismos campos que
+    OrdenReparacion más 'archivada_en'.
+    Las órdenes archivadas conservan su ID, así que el mismo cursor sirve para ambas tablas: de cada
+    una se leen como máximo tamano + 1 filas desde el cursor (con los índices por vehículo y fecha
+    de ingreso, sin ordenar el historial completo) y se mezclan. Usa siempre cuatro consultas o menos.
+    Lanza CursorInvalido si alguno de los cursores está mal formado.
+    """
+    consultas = [
+        consulta_keyset(modelo.objects.filter(**filtros), 'fecha_ingreso', despues, antes, tamano)
+        for modelo in (OrdenReparacion, OrdenArchivada)
+    ]
+    # Ambas listas ya vienen ordenadas: descendente, o ascendente al retroceder con 'antes'
+    filas = list(islice(
+        merge(*map(list, consultas), key=lambda orden: (orden.fecha_ingreso, orden.pk), reverse=not antes),
+        tamano + 1,
+    ))
+    pagina = armar_pagina(filas, 'fecha_ingreso', despues, antes, tamano)
+    # Servicios solo de las órdenes que quedaron en la página, una consulta por tabla
+    for modelo in (OrdenReparacion, OrdenArchivada):
+        prefetch_related_objects([orden for orden in pagina if isinstance(orden, modelo)], 'servicios')
+    return pagina
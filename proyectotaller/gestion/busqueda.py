@@ -0,0 +1,111 @@
+# gestion/busqueda.py
+# Este archivo implementa la búsqueda global de clientes y vehículos.
+# Se apoya en la tabla virtual FTS5 'gestion_busqueda' (ver la migración 0006), que los
+# triggers de SQLite mantienen sincronizada con las tablas de clientes y vehículos.
+# Buscar por nombre, teléfono, email o patente es una consulta al índice de texto
+# completo en lugar de un recorrido de las tablas con icontains.
+
+import re
+
+from django.db import connection, transaction
+from django.db.models.expressions import RawSQL
+
+from .models import Cliente
+
+# Cantidad máxima de clientes devueltos por una búsqueda.
+LIMITE_RESULTADOS = 20
+# Cantidad máxima de coincidencias leídas del índice antes de agrupar por cliente.
+LIMITE_COINCIDENCIAS = 200
+
+# Palabras buscables: letras y números (el resto de caracteres separa palabras, como en el tokenizador).
+_PALABRA = re.compile(r'\w+', re.UNICODE)
+
+
+def consulta_fts(texto):
+    """
+    Convierte el texto escrito por el usuario en una consulta FTS5 segura, en la que todas
+    las palabras deben aparecer y cada una se busca como prefijo.
+    Por ejemplo, 'juan 9123' se convierte en '"juan"* "9123"*'. Devuelve '' si no hay palabras.
+    """
+    return ' '.join(f'"{palabra}"*' for palabra in _PALABRA.findall(texto.lower()))
+
+
+def buscar(texto, limite=LIMITE_RESULTADOS):
+    """
+    Busca clientes por nombre, apellido, teléfono, email o por los datos de sus vehículos.
+
+    Devuelve una lista de tuplas (cliente, ids_vehiculos_coincidentes) ordenada por relevancia
+    (bm25), con los vehículos de cada cliente ya cargados. Usa siempre tres consultas:
+    el índice de texto, los clientes y sus vehículos.
+    """
+    consulta = consulta_fts(texto)
+    if not consulta:
+        return []
+    with connection.cursor() as cursor:
+        # Los clientes y vehículos eliminados pendientes de purga siguen en el índice: se descartan
+        # aquí, antes de aplicar los límites, para que no ocupen el lugar de las filas visibles.
+        cursor.execute(
+            'SELECT gestion_busqueda.rowid, gestion_busqueda.cliente_id FROM gestion_busqueda '
+            'JOIN gestion_cliente ON gestion_cliente.id = gestion_busqueda.cliente_id '
+            'WHERE gestion_busqueda MATCH %s AND gestion_cliente.eliminado_en IS NULL '
+            'AND (gestion_busqueda.rowid %% 2 = 0 OR EXISTS ('
+            'SELECT 1 FROM gestion_vehiculo WHERE gestion_vehiculo.id = gestion_busqueda.rowid / 2 '
+            'AND gestion_vehiculo.eliminado_en IS NULL)) '
+            'ORDER BY bm25(gestion_busqueda) LIMIT %s',
+            [consulta, LIMITE_COINCIDENCIAS],
+        )
+        coincidencias = cursor.fetchall()
+
+    # Agrupa por cliente manteniendo el orden de relevancia de su mejor coincidencia.
+    orden_clientes = []
+    vehiculos_por_cliente = {}
+    for rowid, cliente_id in coincidencias:
+        if cliente_id not in vehiculos_por_cliente:
+            if len(orden_clientes) == limite:
+                continue
+            orden_clientes.append(cliente_id)
+            vehiculos_por_cliente[cliente_id] = set()
+        if rowid % 2: # Las filas impares corresponden a vehículos
+            vehiculos_por_cliente[cliente_id].add(rowid // 2)
+
+    # Un cliente eliminado entre ambas consultas no está en in_bulk() y simplemente se omite.
+    clientes = Cliente.objects.filter(pk__in=orden_clientes).prefetch_related('vehiculos').in_bulk()
+    return [(clientes[cliente_id], vehiculos_por_cliente[cliente_id]) for cliente_id in orden_clientes if cliente_id in clientes]
+
+
+def subconsulta_ids(texto, entidad):
+    """
+    Devuelve una subconsulta (para usar con pk__in) con los IDs que coinciden con 'texto' en el
+    índice de texto completo, sin límite de resultados: 'cliente' para los clientes que coinciden
+    por sus datos o por los de un vehículo, 'vehiculo' para los vehículos que coinciden por sus datos.
+    Devuelve None si el texto no tiene palabras buscables. La usa la búsqueda del admin.
+    """
+    consulta = consulta_fts(texto)
+    if not consulta:
+        return None
+    if entidad == 'cliente':
+        return RawSQL('SELECT cliente_id FROM gestion_busqueda WHERE gestion_busqueda MATCH %s', [consulta])
+    # Las filas impares del índice corresponden a vehículos (rowid = 2 * id + 1)
+    return RawSQL('SELECT rowid / 2 FROM gestion_busqueda WHERE gestion_busqueda MATCH %s AND rowid %% 2 = 1', [consulta])
+
+
+def reconstruir_indice():
+    """
+    Vacía y vuelve a llenar el índice de búsqueda a partir de las tablas de clientes y vehículos,
+    en una transacción. Devuelve la cantidad de entradas indexadas.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute('DELETE FROM gestion_busqueda')
+        cursor.execute(
+            "INSERT INTO gestion_busqueda (rowid, texto, cliente_id) "
+            "SELECT 2 * id, nombre || ' ' || apellido || ' ' || telefono || ' ' || COALESCE(email, ''), id "
+            "FROM gestion_cliente"
+        )
+        cursor.execute(
+            "INSERT INTO gestion_busqueda (rowid, texto, cliente_id) "
+            "SELECT 2 * id + 1, patente || ' ' || marca || ' ' || modelo, cliente_id "
+            "FROM gestion_vehiculo"
+        )
+        cursor.execute("INSERT INTO gestion_busqueda (gestion_busqueda) VALUES ('optimize')")
+        cursor.execute('SELECT COUNT(*) FROM gestion_busqueda')
+        return cursor.fetchone()[0]
@@ -0,0 +1,158 @@
+# gestion/cache.py
+# Este archivo implementa la caché de las respuestas de los listados de catálogo.
+# Cada modelo cacheable tiene un número de versión guardado en la caché, que se incrementa
+# cada vez que uno de sus registros cambia (ver signals.py). La clave de una respuesta cacheada
+# incluye las versiones de los modelos que muestra, así que un cambio invalida de inmediato
+# todas sus páginas y una página cacheada nunca queda desactualizada.
+
+import hashlib
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+# Vistas decoradas con cache_por_version, para poder publicar sus contadores.
+VISTAS_CACHEADAS = []
+
+
+def clave_version(modelo):
+    """
+    Devuelve la clave de caché que guarda la versión de un modelo.
+    """
+    return f'gestion:version:{modelo._meta.label_lower}'
+
+
+def obtener_versiones(modelos):
+    """
+    Devuelve las versiones actuales de los modelos, en el mismo orden, con una sola lectura de caché.
+    Si una versión no existe (caché vacía o expulsada) se inicializa con la hora actual en
+    milisegundos, para que nunca coincida con una versión anterior ya usada en alguna clave.
+    """
+    claves = [clave_version(modelo) for modelo in modelos]
+    encontradas = cache.get_many(claves)
+    versiones = []
+    for clave in claves:
+        if clave not in encontradas:
+            cache.add(clave, time.time_ns() // 1_000_000, timeout=None)
+            encontradas[clave] = cache.get(clave)
+        versiones.append(encontradas[clave])
+    return versiones
+
+
+def incrementar_version(modelo):
+    """
+    Incrementa la versión de un modelo, invalidando todas las respuestas cacheadas que lo usan.
+    """
+    clave = clave_version(modelo)
+    try:
+        cache.incr(clave)
+    except ValueError:
+        # La versión no existía: se inicializa con un valor que no puede repetir uno anterior.
+        obtener_versiones([modelo])
+
+
+def contar(evento, vista):
+    """
+    Incrementa el contador de aciertos o fallos ('aciertos' / 'fallos') de una vista.
+    """
+    clave = f'gestion:cache:{evento}:{vista}'
+    if cache.add(clave, 1, timeout=None):
+        return
+    try:
+        cache.incr(clave)
+    except ValueError:
+        cache.add(clave, 1, timeout=None)
+
+
+def contadores():
+    """
+    Devuelve los contadores de caché por vista: {vista: {'aciertos': n, 'fallos': n}}.
+    """
+    claves = {
+        (vista, evento): f'gestion:cache:{evento}:{vista}'
+        for vista in VISTAS_CACHEADAS
+        for evento in ('aciertos', 'fallos')
+    }
+    valores = cache.get_many(claves.values())
+    resultado = {vista: {'aciertos': 0, 'fallos': 0} for vista in VISTAS_CACHEADAS}
+    for (vista, evento), clave in claves.items():
+        resultado[vista][evento] = valores.get(clave, 0)
+    return resultado
+
+
+def buscar_respuesta(nombre, modelos, request):
+    """
+    Busca en la caché la respuesta de una vista para la solicitud.
+    Devuelve la tupla (clave, respuesta), donde la respuesta es None si no estaba cacheada.
+    """
+    versiones = '.'.join(str(version) for version in obtener_versiones(modelos))
+    ruta = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    clave = f'gestion:vista:{nombre}:{versiones}:{ruta}'
+    guardada = cache.get(clave)
+    if guardada is None:
+        contar('fallos', nombre)
+        return clave, None
+    contar('aciertos', nombre)
+    contenido, tipo = guardada
+    return clave, HttpResponse(contenido, content_type=tipo)
+
+
+def guardar_respuesta(clave, response):
+    """
+    Guarda en la caché una respuesta exitosa de una vista.
+    """
+    if response.status_code == 200 and not response.streaming:
+        timeout = getattr(settings, 'CACHE_LISTADOS_TIMEOUT', 3600)
+        cache.set(clave, (response.content, response['Content-Type']), timeout)
+
+
+def cache_activa(request):
+    """
+    Indica si la solicitud puede servirse desde la caché de listados.
+    """
+    return getattr(settings, 'CACHE_LISTADOS_ACTIVA', False) and request.method in ('GET', 'HEAD')
+
+
+def cache_por_version(*modelos, omitir=None):
+    """
+    Decorador que cachea las respuestas GET exitosas de una vista de listado, con una clave
+    formada por el nombre de la vista, las versiones de 'modelos' y la URL completa.
+    Funciona tanto con vistas síncronas como asíncronas (ver vistas_async.py).
+    Si se indica, 'omitir(request)' decide qué solicitudes no se cachean (por ejemplo, las que
+    muestran datos de modelos sin versión).
+
+    Solo actúa si CACHE_LISTADOS_ACTIVA es True en settings.py; la duración máxima de cada
+    respuesta se define con CACHE_LISTADOS_TIMEOUT. Un acierto no consulta la base de datos.
+    """
+    def decorador(vista):
+        nombre = vista.__name__
+        if nombre not in VISTAS_CACHEADAS:
+            VISTAS_CACHEADAS.append(nombre)
+
+        if iscoroutinefunction(vista):
+            @wraps(vista)
+            async def envoltura_async(request, *args, **kwargs):
+                if not cache_activa(request) or (omitir and omitir(request)):
+                    return await vista(request, *args, **kwargs)
+                # La caché puede ser un servicio externo: se consulta fuera del bucle de eventos.
+                clave, response = await sync_to_async(buscar_respuesta)(nombre, modelos, request)
+                if response is None:
+                    response = await vista(request, *args, **kwargs)
+                    await sync_to_async(guardar_respuesta)(clave, response)
+                return response
+            return envoltura_async
+
+        @wraps(vista)
+        def envoltura(request, *args, **kwargs):
+            if not cache_activa(request) or (omitir and omitir(request)):
+                return vista(request, *args, **kwargs)
+            clave, response = buscar_respuesta(nombre, modelos, request)
+            if response is None:
+                response = vista(request, *args, **kwargs)
+                guardar_respuesta(clave, response)
+            return response
+        return envoltura
+    return decorador
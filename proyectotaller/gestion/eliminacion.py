@@ -0,0 +1,136 @@
+# gestion/eliminacion.py
+# Este archivo implementa el borrado de clientes y vehículos en dos etapas.
+#
+# 1. Al eliminar desde la interfaz, el cliente o vehículo solo se marca como eliminado
+#    (columna 'eliminado_en') con uno o dos UPDATE. Desde ese momento deja de aparecer en
+#    listados, formularios, búsquedas y en la API (ver ActivosManager y OrdenReparacionQuerySet.visibles).
+# 2. La purga borra después, como tarea en segundo plano (ver tareas.py) y por lotes, las filas marcadas y todo lo que
+#    depende de ellas (órdenes activas y archivadas con sus enlaces a servicios), con DELETE
+#    directos y una transacción por lote. Así no se cargan en memoria todas las filas
+#    dependientes, como haría el recolector de borrado del ORM, y el bloqueo de escritura de
+#    SQLite se libera entre lote y lote.
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .cache import incrementar_version
+from .models import Cliente, Vehiculo
+from .tareas import encolar
+
+# Pasos de la purga, en orden: primero las filas que dependen de otras.
+# Cada paso tiene un nombre, la consulta que elige los IDs de un lote y los DELETE que se
+# ejecutan con esos IDs. Un paso se repite hasta que su consulta no devuelve filas.
+PASOS_PURGA = [
+    (
+        'ordenes',
+        'SELECT o.id FROM gestion_ordenreparacion o '
+        'JOIN gestion_vehiculo v ON v.id = o.vehiculo_id '
+        'WHERE v.eliminado_en IS NOT NULL LIMIT %s',
+        [
+            'DELETE FROM gestion_ordenreparacion_servicios WHERE ordenreparacion_id IN ({ids})',
+            'DELETE FROM gestion_ordenreparacion WHERE id IN ({ids})',
+        ],
+    ),
+    (
+        'ordenes_archivadas',
+        'SELECT o.id FROM gestion_ordenarchivada o '
+        'JOIN gestion_vehiculo v ON v.id = o.vehiculo_id '
+        'WHERE v.eliminado_en IS NOT NULL LIMIT %s',
+        [
+            'DELETE FROM gestion_ordenarchivada_servicios WHERE ordenarchivada_id IN ({ids})',
+            'DELETE FROM gestion_ordenarchivada WHERE id IN ({ids})',
+        ],
+    ),
+    (
+        'vehiculos',
+        'SELECT v.id FROM gestion_vehiculo v WHERE v.eliminado_en IS NOT NULL '
+        'AND NOT EXISTS (SELECT 1 FROM gestion_ordenreparacion o WHERE o.vehiculo_id = v.id) '
+        'AND NOT EXISTS (SELECT 1 FROM gestion_ordenarchivada o WHERE o.vehiculo_id = v.id) LIMIT %s',
+        ['DELETE FROM gestion_vehiculo WHERE id IN ({ids})'],
+    ),
+    (
+        'clientes',
+        'SELECT c.id FROM gestion_cliente c WHERE c.eliminado_en IS NOT NULL '
+        'AND NOT EXISTS (SELECT 1 FROM gestion_vehiculo v WHERE v.cliente_id = c.id) LIMIT %s',
+        ['DELETE FROM gestion_cliente WHERE id IN ({ids})'],
+    ),
+]
+
+def eliminar_cliente(cliente):
+    """
+    Marca como eliminados al cliente y a todos sus vehículos, con dos UPDATE en una transacción,
+    y programa la purga de sus datos.
+    """
+    eliminar_clientes(Cliente.objects.filter(pk=cliente.pk))
+
+
+def eliminar_clientes(clientes):
+    """
+    Marca como eliminados todos los clientes del queryset y sus vehículos, con dos UPDATE en una
+    transacción, y programa la purga de sus datos. Devuelve la cantidad de clientes eliminados.
+    """
+    ahora = timezone.now() # update() no aplica auto_now: la fecha de modificación se fija aquí
+    with transaction.atomic():
+        ids = clientes.order_by().values('pk')
+        Vehiculo.objects.filter(cliente__in=ids).update(eliminado_en=ahora, modificado=ahora)
+        eliminados = Cliente.objects.filter(pk__in=ids).update(eliminado_en=ahora, modificado=ahora)
+        programar_purga()
+    # update() no emite post_save: se invalidan aquí los listados cacheados (ver signals.py)
+    incrementar_version(Cliente)
+    incrementar_version(Vehiculo)
+    return eliminados
+
+
+def eliminar_vehiculo(vehiculo):
+    """
+    Marca el vehículo como eliminado con un UPDATE y programa la purga de sus órdenes.
+    """
+    eliminar_vehiculos(Vehiculo.objects.filter(pk=vehiculo.pk))
+
+
+def eliminar_vehiculos(vehiculos):
+    """
+    Marca como eliminados todos los vehículos del queryset con un UPDATE y programa la purga de
+    sus órdenes. Devuelve la cantidad de vehículos eliminados.
+    """
+    ahora = timezone.now()
+    with transaction.atomic():
+        eliminados = Vehiculo.objects.filter(pk__in=vehiculos.order_by().values('pk')).update(eliminado_en=ahora, modificado=ahora)
+        programar_purga()
+    incrementar_version(Vehiculo)
+    return eliminados
+
+
+def purgar_eliminados(lote=None, progreso=None):
+    """
+    Borra por lotes de 'lote' filas (por defecto settings.PURGA_LOTE) los clientes y vehículos
+    marcados como eliminados y todas sus órdenes, cada lote en su propia transacción.
+    Si se indica, 'progreso' se llama después de cada lote con el nombre del paso y las filas
+    borradas en él hasta el momento. Devuelve un diccionario {paso: filas borradas}.
+    """
+    lote = lote or settings.PURGA_LOTE
+    totales = {nombre: 0 for nombre, _, _ in PASOS_PURGA}
+    for nombre, seleccion, borrados in PASOS_PURGA:
+        while True:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(seleccion, [lote])
+                ids = [fila[0] for fila in cursor.fetchall()]
+                if not ids:
+                    break
+                marcadores = ', '.join(['%s'] * len(ids))
+                for borrado in borrados:
+                    cursor.execute(borrado.format(ids=marcadores), ids)
+            totales[nombre] += len(ids)
+            if progreso:
+                progreso(nombre, totales[nombre])
+    return totales
+
+
+def programar_purga():
+    """
+    Encola la tarea de purga (una sola aunque se eliminen varias filas antes de que se ejecute),
+    si settings.PURGA_AUTOMATICA está activa. Si no, la purga queda para 'manage.py purge_deleted'.
+    """
+    if settings.PURGA_AUTOMATICA:
+        encolar('purgar_eliminados', unica=True)
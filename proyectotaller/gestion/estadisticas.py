@@ -0,0 +1,115 @@
+# gestion/estadisticas.py
+# Este archivo calcula las estadísticas históricas de clientes y vehículos: cantidad de órdenes,
+# monto total de sus órdenes y fecha de la última visita, usadas por la ficha del cliente y por las
+# columnas opcionales del listado de clientes.
+#
+# Las estadísticas incluyen las órdenes activas y las archivadas (ver archivo.py), y se calculan
+# en la base de datos con agregados: subconsultas correlacionadas por fila (una por tabla y valor)
+# o un GROUP BY por estado. La cantidad de consultas no depende de cuántos vehículos u órdenes
+# tenga el cliente. Las órdenes de vehículos eliminados pendientes de purga no se cuentan.
+
+from decimal import Decimal
+
+from django.db.models import Count, DecimalField, F, IntegerField, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import OrdenReparacion, OrdenArchivada
+
+# Columnas de estadísticas por las que se puede ordenar el listado de clientes.
+COLUMNAS_ESTADISTICAS = ['ordenes', 'gasto_total', 'ultima_visita']
+
+
+def subconsulta_agregado(modelo, relacion, agregado):
+    """
+    Subconsulta que calcula 'agregado' sobre las órdenes de 'modelo' (OrdenReparacion u
+    OrdenArchivada) cuya relación 'relacion' (por ejemplo 'vehiculo__cliente') es la fila exterior.
+    Devuelve NULL si la fila no tiene órdenes en esa tabla.
+    """
+    ordenes = (
+        modelo.objects
+        .filter(**{relacion: OuterRef('pk'), 'vehiculo__eliminado_en__isnull': True})
+        .order_by() # Sin el orden por defecto, que SQLite no necesita para agrupar
+        .values(relacion) # Agrupa por la fila exterior
+        .annotate(valor=agregado)
+        .values('valor')
+    )
+    return Subquery(ordenes)
+
+
+def anotar_estadisticas(queryset, relacion):
+    """
+    Anota en cada fila de 'queryset' (clientes o vehículos) la cantidad de órdenes ('ordenes'),
+    la suma de su monto total ('gasto_total') y la fecha de ingreso más reciente ('ultima_visita',
+    None si no tiene órdenes), contando las órdenes activas y las archivadas.
+    'relacion' es el camino desde la orden hasta la fila: 'vehiculo__cliente' o 'vehiculo'.
+    """
+    def ambas(agregado):
+        # El mismo agregado en la tabla de órdenes activas y en la de archivadas
+        return [subconsulta_agregado(modelo, relacion, agregado) for modelo in (OrdenReparacion, OrdenArchivada)]
+
+    activas, archivadas = ambas(Count('pk'))
+    cero = Value(0, output_field=IntegerField())
+    ordenes = Coalesce(activas, cero) + Coalesce(archivadas, cero)
+    activas, archivadas = ambas(Sum('monto_total'))
+    cero = Value(0, output_field=DecimalField(max_digits=12, decimal_places=0))
+    gasto_total = Coalesce(activas, cero) + Coalesce(archivadas, cero)
+    activas, archivadas = ambas(Max('fecha_ingreso'))
+    # MAX(a, b) de SQLite devuelve NULL si alguno es NULL: se completa cada uno con el otro
+    ultima_visita = Greatest(Coalesce(activas, archivadas), Coalesce(archivadas, activas))
+    return queryset.annotate(ordenes=ordenes, gasto_total=gasto_total, ultima_visita=ultima_visita)
+
+
+def pide_estadisticas(request):
+    """
+    Indica si el listado de clientes debe mostrar las columnas de estadísticas ('estadisticas' u
+    'orden' en la URL). Esas columnas dependen de las órdenes, que no tienen versión en la caché,
+    así que esa variante del listado no se cachea.
+    """
+    return 'estadisticas' in request.GET or 'orden' in request.GET
+
+
+def ordenar_por_estadistica(queryset, orden):
+    """
+    Ordena los clientes anotados con anotar_estadisticas por la columna 'orden' (una de
+    COLUMNAS_ESTADISTICAS, con '-' delante para orden descendente). Los clientes sin visitas
+    quedan al final en ambos sentidos. Devuelve None si la columna no es válida.
+    """
+    columna = orden.removeprefix('-')
+    if columna not in COLUMNAS_ESTADISTICAS:
+        return None
+    expresion = F(columna).desc(nulls_last=True) if orden.startswith('-') else F(columna).asc(nulls_last=True)
+    return queryset.order_by(expresion, 'apellido', 'nombre', 'pk')
+
+
+def resumen_por_estado(cliente):
+    """
+    Devuelve las estadísticas de las órdenes de un cliente con una sola consulta (un GROUP BY por
+    estado en cada tabla, unidos con UNION ALL): una lista con la cantidad, el monto y la última
+    visita por estado, en el orden de ESTADO_CHOICES, y los totales del cliente.
+    """
+    def por_estado(modelo):
+        return (
+            modelo.objects
+            .filter(vehiculo__cliente=cliente, vehiculo__eliminado_en__isnull=True)
+            .order_by()
+            .values_list('estado')
+            .annotate(cantidad=Count('pk'), monto=Sum('monto_total'), ultima=Max('fecha_ingreso'))
+        )
+
+    estados = {
+        estado: {'estado': estado, 'etiqueta': etiqueta, 'cantidad': 0, 'monto': Decimal(0), 'ultima_visita': None}
+        for estado, etiqueta in OrdenReparacion.ESTADO_CHOICES
+    }
+    for estado, cantidad, monto, ultima in por_estado(OrdenReparacion).union(por_estado(OrdenArchivada), all=True):
+        fila = estados[estado]
+        fila['cantidad'] += cantidad
+        fila['monto'] += monto or 0
+        if fila['ultima_visita'] is None or ultima > fila['ultima_visita']:
+            fila['ultima_visita'] = ultima
+    visitas = [fila['ultima_visita'] for fila in estados.values() if fila['ultima_visita']]
+    totales = {
+        'ordenes': sum(fila['cantidad'] for fila in estados.values()),
+        'gasto_total': sum((fila['monto'] for fila in estados.values()), Decimal(0)),
+        'ultima_visita': max(visitas, default=None),
+    }
+    return list(estados.values()), totales
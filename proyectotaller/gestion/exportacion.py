@@ -0,0 +1,172 @@
+# gestion/exportacion.py
+# Este archivo implementa la exportación completa de órdenes de reparación en CSV o NDJSON,
+# con su vehículo, su cliente y sus servicios, usada por la vista de exportación y por
+# 'manage.py export_orders'.
+#
+# Las órdenes se leen por lotes de IDs consecutivos (paginación por clave, sin OFFSET): cada lote
+# es una consulta con el vehículo y el cliente unidos y otra con los servicios de todo el lote.
+# Cada lote se convierte en texto y se entrega antes de leer el siguiente, así que la memoria
+# usada no depende del tamaño de la tabla.
+
+import csv
+import json
+from contextlib import contextmanager
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+
+from .models import OrdenReparacion, OrdenArchivada
+
+# Órdenes que se leen y se convierten en texto por lote.
+LOTE_EXPORTACION = 1000
+
+# Columnas del CSV: una fila por servicio de cada orden (una fila sin servicio si la orden no tiene).
+COLUMNAS_CSV = [
+    'orden_id', 'archivada', 'fecha_ingreso', 'fecha_salida', 'estado', 'monto_total',
+    'patente', 'marca', 'modelo', 'año',
+    'cliente_id', 'cliente_nombre', 'cliente_apellido', 'cliente_telefono', 'cliente_email',
+    'servicio_id', 'servicio_nombre', 'servicio_precio',
+]
+
+# Tipo de contenido de cada formato.
+TIPOS_CONTENIDO = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+
+
+def ordenes_exportables(desde=None, hasta=None, estado=None, archivadas=False):
+    """
+    Devuelve los querysets de órdenes a exportar según los filtros: las órdenes activas visibles
+    (sin las de vehículos eliminados) y, si se pide, también las archivadas.
+    """
+    filtros = {'vehiculo__eliminado_en__isnull': True}
+    if desde:
+        filtros['fecha_ingreso__gte'] = desde
+    if hasta:
+        filtros['fecha_ingreso__lte'] = hasta
+    if estado:
+        filtros['estado'] = estado
+    querysets = [OrdenReparacion.objects.filter(**filtros)]
+    if archivadas:
+        querysets.append(OrdenArchivada.objects.filter(**filtros))
+    return querysets
+
+
+# Campos que se leen de cada orden, con su vehículo y su cliente, y clave con que se exportan.
+CAMPOS_ORDEN = {
+    'pk': 'orden_id',
+    'fecha_ingreso': 'fecha_ingreso',
+    'fecha_salida': 'fecha_salida',
+    'estado': 'estado',
+    'monto_total': 'monto_total',
+    'vehiculo__patente': 'patente',
+    'vehiculo__marca': 'marca',
+    'vehiculo__modelo': 'modelo',
+    'vehiculo__año': 'año',
+    'vehiculo__cliente_id': 'cliente_id',
+    'vehiculo__cliente__nombre': 'cliente_nombre',
+    'vehiculo__cliente__apellido': 'cliente_apellido',
+    'vehiculo__cliente__telefono': 'cliente_telefono',
+    'vehiculo__cliente__email': 'cliente_email',
+}
+
+
+def lotes_ordenes(querysets, lote=LOTE_EXPORTACION):
+    """
+    Recorre los querysets por lotes de 'lote' órdenes en orden de ID y entrega cada lote como
+    una lista de diccionarios, con los datos del vehículo, del cliente y la lista de servicios.
+    Cada lote usa dos consultas que devuelven tuplas (sin crear instancias de los modelos):
+    una para las órdenes con su vehículo y su cliente, y otra para los servicios de todo el lote.
+    """
+    for queryset in querysets:
+        archivada = queryset.model is OrdenArchivada
+        enlaces = queryset.model.servicios.through.objects
+        columna_orden = queryset.model.servicios.field.m2m_column_name() # 'ordenreparacion_id' u 'ordenarchivada_id'
+        ultimo = 0
+        while True:
+            filas = list(queryset.filter(pk__gt=ultimo).order_by('pk').values_list(*CAMPOS_ORDEN)[:lote])
+            if not filas:
+                break
+            ultimo = filas[-1][0]
+            ordenes = {}
+            for fila in filas:
+                orden = dict(zip(CAMPOS_ORDEN.values(), fila))
+                orden['archivada'] = archivada
+                orden['monto_total'] = int(orden['monto_total']) # Montos sin decimales (decimal_places=0), como en la API
+                orden['servicios'] = []
+                ordenes[orden['orden_id']] = orden
+            servicios = (
+                enlaces.filter(**{f'{columna_orden}__in': list(ordenes)})
+                .order_by('pk')
+                .values_list(columna_orden, 'servicio_id', 'servicio__nombre', 'servicio__precio')
+            )
+            for orden_id, servicio_id, nombre, precio in servicios:
+                ordenes[orden_id]['servicios'].append(
+                    {'servicio_id': servicio_id, 'servicio_nombre': nombre, 'servicio_precio': int(precio)}
+                )
+            yield list(ordenes.values())
+
+
+class _Linea:
+    """
+    Destino de csv.writer que devuelve cada línea escrita en lugar de guardarla.
+    """
+    def write(self, valor):
+        return valor
+
+
+def exportar_csv(lotes):
+    """
+    Entrega el CSV como texto: primero la cabecera y luego un bloque de líneas por lote.
+    """
+    escritor = csv.writer(_Linea())
+    yield escritor.writerow(COLUMNAS_CSV)
+    vacio = [{'servicio_id': '', 'servicio_nombre': '', 'servicio_precio': ''}]
+    for ordenes in lotes:
+        lineas = []
+        for orden in ordenes:
+            comunes = [orden[columna] for columna in COLUMNAS_CSV[:-3]]
+            for servicio in orden['servicios'] or vacio:
+                lineas.append(escritor.writerow(
+                    comunes + [servicio['servicio_id'], servicio['servicio_nombre'], servicio['servicio_precio']]
+                ))
+        yield ''.join(lineas)
+
+
+def exportar_ndjson(lotes):
+    """
+    Entrega el NDJSON como texto: un objeto JSON por orden y por línea, un bloque de líneas por lote.
+    """
+    for ordenes in lotes:
+        yield ''.join(json.dumps(orden, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n' for orden in ordenes)
+
+
+@contextmanager
+def lectura_consistente():
+    """
+    Abre una transacción de solo lectura para que todos los lotes de una exportación vean la misma
+    versión de la base de datos. Se usa un BEGIN diferido en lugar de transaction.atomic(), que con
+    transaction_mode='IMMEDIATE' (ver settings.py) tomaría el bloqueo de escritura de SQLite durante
+    toda la exportación: con WAL, una transacción diferida que solo lee no bloquea a los escritores.
+    Dentro de una transacción ya abierta (por ejemplo, en las pruebas) no hace nada.
+    """
+    if connection.in_atomic_block:
+        yield
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('BEGIN DEFERRED')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute('ROLLBACK') # Nada que confirmar: la transacción solo leyó
+
+
+def exportar_ordenes(formato='csv', lote=LOTE_EXPORTACION, **filtros):
+    """
+    Entrega por bloques de texto la exportación de las órdenes que cumplen los filtros
+    (ver ordenes_exportables) en el formato indicado ('csv' o 'ndjson').
+    """
+    lotes = lotes_ordenes(ordenes_exportables(**filtros), lote)
+    return exportar_csv(lotes) if formato == 'csv' else exportar_ndjson(lotes)
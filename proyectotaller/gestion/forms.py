@@ -4,8 +4,47 @@
 # a través de la interfaz web, proporcionando validación y renderizado de campos.
 
 from django import forms
+from django.urls import reverse_lazy
 from .models import Cliente, Vehiculo, Servicio, OrdenReparacion
 
+class AutocompletarMixin:
+    """
+    Mixin para widgets de selección que solo renderizan las opciones seleccionadas.
+    El resto de las opciones se obtiene desde el navegador con el endpoint JSON indicado en
+    el atributo 'data-autocompletar-url' (ver la plantilla del formulario), en lugar de
+    consultar y renderizar todos los registros de la tabla en cada página.
+    """
+    def optgroups(self, name, value, attrs=None):
+        # value es la lista de claves primarias seleccionadas (como texto)
+        seleccionados = [v for v in value if v not in (None, '')]
+        opciones = []
+        if not self.allow_multiple_selected and getattr(self.choices, 'field', None) is not None:
+            vacia = self.choices.field.empty_label
+            if vacia is not None:
+                opciones.append(('', vacia))
+        if seleccionados:
+            try:
+                objetos = self.choices.queryset.filter(pk__in=seleccionados)
+                opciones.extend(self.choices.choice(objeto) for objeto in objetos)
+            except (ValueError, TypeError):
+                pass # Valores inválidos: el formulario mostrará el error de validación
+        grupos = []
+        for indice, (valor_opcion, etiqueta) in enumerate(opciones):
+            valor_opcion = '' if valor_opcion is None else str(valor_opcion)
+            elegido = valor_opcion in seleccionados
+            grupos.append((None, [self.create_option(name, valor_opcion, etiqueta, elegido, indice, attrs=attrs)], indice))
+        return grupos
+
+class AutocompletarSelect(AutocompletarMixin, forms.Select):
+    """
+    Select de una opción que carga sus sugerencias mediante autocompletado.
+    """
+
+class AutocompletarSelectMultiple(AutocompletarMixin, forms.SelectMultiple):
+    """
+    Select de múltiples opciones que carga sus sugerencias mediante autocompletado.
+    """
+
 class ClienteForm(forms.ModelForm):
     """
     Formulario para el modelo Cliente.
@@ -41,6 +80,19 @@ class VehiculoForm(forms.ModelForm):
             'cliente': forms.Select(attrs={'class': 'form-control'}),
         }
 
+    def clean_patente(self):
+        """
+        Guarda la patente en mayúsculas, como la busca el autocompletado (ver views.autocompletar_vehiculos).
+        La validación de unicidad del formulario usa el manager predeterminado, que no ve los
+        vehículos eliminados pendientes de purga; aquí se comprueba que la patente no siga ocupada por uno.
+        """
+        patente = self.cleaned_data['patente'].upper()
+        if Vehiculo.todos.filter(patente=patente, eliminado_en__isnull=False).exists():
+            raise forms.ValidationError(
+                "Un vehículo eliminado con esta patente aún no se ha purgado. Intente nuevamente en unos minutos."
+            )
+        return patente
+
 class ServicioForm(forms.ModelForm):
     """
     Formulario para el modelo Servicio.
@@ -67,9 +119,60 @@ class OrdenReparacionForm(forms.ModelForm):
         fields = ['vehiculo', 'servicios', 'fecha_ingreso', 'fecha_salida', 'estado']
         # Define los widgets HTML para cada campo, aplicando clases CSS para estilo.
         widgets = {
-            'vehiculo': forms.Select(attrs={'class': 'form-control'}),
-            'servicios': forms.SelectMultiple(attrs={'class': 'form-control'}),
+            # Solo se renderizan los valores seleccionados; las sugerencias se piden al endpoint de autocompletado
+            'vehiculo': AutocompletarSelect(attrs={
+                'class': 'form-control',
+                'data-autocompletar-url': reverse_lazy('autocompletar_vehiculos'),
+            }),
+            'servicios': AutocompletarSelectMultiple(attrs={
+                'class': 'form-control',
+                'data-autocompletar-url': reverse_lazy('autocompletar_servicios'),
+            }),
             'fecha_ingreso': forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
             'fecha_salida': forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
             'estado': forms.Select(attrs={'class': 'form-control'}),
         }
+
+class FiltroExportacionForm(forms.Form):
+    """
+    Filtros de la exportación de órdenes (ver exportacion.py), usados tanto por la vista
+    de exportación como por 'manage.py export_orders'.
+    """
+    formato = forms.ChoiceField(choices=[('csv', 'CSV'), ('ndjson', 'NDJSON')], required=False)
+    desde = forms.DateField(required=False) # Fecha de ingreso mínima (inclusive)
+    hasta = forms.DateField(required=False) # Fecha de ingreso máxima (inclusive)
+    estado = forms.ChoiceField(choices=OrdenReparacion.ESTADO_CHOICES, required=False)
+    archivadas = forms.BooleanField(required=False) # Incluye también las órdenes archivadas
+
+    def clean(self):
+        datos = super().clean()
+        if datos.get('desde') and datos.get('hasta') and datos['desde'] > datos['hasta']:
+            raise forms.ValidationError("La fecha 'desde' no puede ser posterior a 'hasta'.")
+        datos['formato'] = datos.get('formato') or 'csv'
+        return datos
+
+class VehiculoImportacionForm(VehiculoForm):
+    """
+    Valida los datos de un vehículo de una fila importada (ver importacion.py) con las mismas
+    reglas de campo que VehiculoForm, pero sin consultas por fila: el cliente se asigna al importar
+    y la unicidad de la patente se comprueba por lotes.
+    """
+    class Meta(VehiculoForm.Meta):
+        fields = ['patente', 'marca', 'modelo', 'año']
+
+    def clean_patente(self):
+        return self.cleaned_data['patente'].upper() # En mayúsculas, como en VehiculoForm
+
+    def validate_unique(self):
+        pass
+
+class ImportacionClientesForm(forms.Form):
+    """
+    Formulario de carga del archivo CSV de clientes y vehículos.
+    """
+    archivo = forms.FileField(
+        label="Archivo CSV",
+        help_text="Columnas: nombre, apellido, telefono, email, patente, marca, modelo, año. "
+                  "Las columnas del vehículo pueden quedar vacías.",
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv,text/csv'}),
+    )
@@ -0,0 +1,197 @@
+# gestion/importacion.py
+# Este archivo implementa la importación masiva de clientes y vehículos desde un CSV,
+# usada por 'manage.py import_clientes' y por la vista de carga de archivos.
+#
+# Cada fila describe un cliente y, opcionalmente, uno de sus vehículos. Las filas se leen de a
+# una (el archivo nunca se carga entero) y se procesan por lotes:
+# - Cada fila se valida con las mismas reglas de ClienteForm y VehiculoForm, sin consultas.
+# - Los clientes se identifican por nombre, apellido y teléfono: los que ya existen se buscan
+#   con una consulta por lote (y no se modifican), y un cliente nuevo se crea una sola vez aunque
+#   aparezca en varias filas.
+# - Las patentes se comprueban contra la base de datos con una consulta por lote (incluidas las
+#   de vehículos eliminados pendientes de purga) y contra las filas anteriores del archivo.
+# - Los clientes y vehículos nuevos de cada lote se insertan con bulk_create en una transacción
+#   (un savepoint si ya hay una abierta). Si el INSERT falla por una patente registrada por otra
+#   conexión después de la comprobación, se deshace solo ese lote y sus filas se rechazan.
+# Las filas inválidas no se importan: se entregan, con sus errores, a la función 'rechazar'.
+#
+# La memoria usada no depende de la cantidad de filas del archivo, pero sí de cuántos clientes
+# distintos y patentes trae: para no duplicarlos entre lotes se recuerdan durante toda la importación.
+
+import csv
+from collections import ChainMap
+
+from django.db import IntegrityError, transaction
+
+from .cache import incrementar_version
+from .forms import ClienteForm, VehiculoImportacionForm
+from .models import Cliente, Vehiculo
+
+# Filas que se procesan por transacción.
+LOTE_IMPORTACION = 500
+
+# Columnas del CSV. Las del vehículo pueden quedar vacías para importar solo el cliente.
+COLUMNAS_CLIENTE = ['nombre', 'apellido', 'telefono', 'email']
+COLUMNAS_VEHICULO = ['patente', 'marca', 'modelo', 'año']
+
+
+class ArchivoInvalido(ValueError):
+    """
+    Se lanza cuando el CSV no tiene las columnas obligatorias.
+    """
+
+
+def leer_csv(archivo):
+    """
+    Devuelve un lector de las filas del CSV abierto en modo texto, como diccionarios con los
+    nombres de columna en minúsculas. Lanza ArchivoInvalido si faltan columnas obligatorias.
+    """
+    lector = csv.DictReader(archivo)
+    if lector.fieldnames is None:
+        raise ArchivoInvalido("El archivo está vacío.")
+    lector.fieldnames = [columna.strip().lower() for columna in lector.fieldnames]
+    faltantes = [columna for columna in ('nombre', 'apellido', 'telefono') if columna not in lector.fieldnames]
+    if faltantes:
+        raise ArchivoInvalido(f"Faltan columnas obligatorias: {', '.join(faltantes)}.")
+    return lector
+
+
+def clave_cliente(nombre, apellido, telefono):
+    """
+    Clave natural de un cliente: nombre y apellido sin distinguir mayúsculas, y teléfono.
+    """
+    return (nombre.strip().casefold(), apellido.strip().casefold(), telefono.strip())
+
+
+def validar_fila(fila):
+    """
+    Valida una fila del CSV. Devuelve (cliente, vehiculo, errores): instancias sin guardar
+    (vehiculo es None si la fila no trae vehículo) y un diccionario de errores por columna.
+    """
+    cliente_form = ClienteForm({columna: fila.get(columna) or '' for columna in COLUMNAS_CLIENTE})
+    errores = dict(cliente_form.errors) if not cliente_form.is_valid() else {}
+    datos_vehiculo = {columna: (fila.get(columna) or '').strip() for columna in COLUMNAS_VEHICULO}
+    vehiculo = None
+    if any(datos_vehiculo.values()):
+        vehiculo_form = VehiculoImportacionForm(datos_vehiculo)
+        if vehiculo_form.is_valid():
+            vehiculo = vehiculo_form.instance
+        else:
+            errores.update(vehiculo_form.errors)
+    return cliente_form.instance, vehiculo, errores
+
+
+def importar_clientes(filas, lote=LOTE_IMPORTACION, simular=False, rechazar=None, progreso=None):
+    """
+    Importa los clientes y vehículos de 'filas' (un iterable de diccionarios, por ejemplo un
+    csv.DictReader) por lotes de 'lote' filas, cada uno en su propia transacción.
+    Con simular=True valida todo pero no guarda nada. 'rechazar' se llama con el número de fila
+    (contando la cabecera como fila 1), la fila y la lista de errores de cada fila inválida;
+    'progreso' se llama después de cada lote con el resultado acumulado; si la lectura de 'filas'
+    falla a mitad (por ejemplo, con UnicodeDecodeError), la excepción se propaga y los lotes
+    anteriores quedan guardados, como indica el último resultado entregado a 'progreso'.
+    Devuelve un diccionario con las filas leídas, los clientes creados y existentes,
+    los vehículos creados y las filas rechazadas.
+    """
+    resultado = {'filas': 0, 'clientes_creados': 0, 'clientes_existentes': 0, 'vehiculos_creados': 0, 'rechazadas': 0}
+    # Clientes ya resueltos (existentes o creados) y patentes ya importadas, entre lotes.
+    # Crecen con los clientes y patentes distintos del archivo, no con la cantidad de filas.
+    clientes = {}
+    patentes_importadas = set()
+
+    def rechazar_fila(numero, fila, errores):
+        resultado['rechazadas'] += 1
+        if rechazar:
+            rechazar(numero, fila, errores)
+
+    try:
+        pendientes = []
+        for numero, fila in enumerate(filas, start=2):
+            pendientes.append((numero, fila))
+            if len(pendientes) == lote:
+                importar_lote(pendientes, clientes, patentes_importadas, simular, rechazar_fila, resultado)
+                pendientes = []
+                if progreso:
+                    progreso(resultado)
+        if pendientes:
+            importar_lote(pendientes, clientes, patentes_importadas, simular, rechazar_fila, resultado)
+            if progreso:
+                progreso(resultado)
+    finally:
+        # También si la lectura del archivo falla a mitad: los lotes anteriores ya están guardados.
+        if not simular and (resultado['clientes_creados'] or resultado['vehiculos_creados']):
+            # bulk_create no emite post_save: se invalidan aquí los listados cacheados (ver signals.py)
+            incrementar_version(Cliente)
+            incrementar_version(Vehiculo)
+    return resultado
+
+
+def importar_lote(pendientes, clientes, patentes_importadas, simular, rechazar_fila, resultado):
+    """
+    Valida e importa un lote de filas (lista de pares (número, fila)) con una consulta de clientes,
+    una de patentes y, como máximo, un bulk_create de clientes y otro de vehículos.
+    'clientes' (clave -> Cliente) y 'patentes_importadas' se comparten entre lotes, y se
+    actualizan solo si el lote se guarda. Si el INSERT lanza IntegrityError, el lote se deshace
+    y todas sus filas válidas se rechazan.
+    """
+    validas = []
+    for numero, fila in pendientes:
+        cliente, vehiculo, errores = validar_fila(fila)
+        if errores:
+            rechazar_fila(numero, fila, [f'{campo}: {" ".join(mensajes)}' for campo, mensajes in errores.items()])
+        else:
+            validas.append((numero, fila, cliente, vehiculo))
+    resultado['filas'] += len(pendientes)
+
+    # Lo que resuelve el lote se guarda aparte y se agrega a lo compartido solo si el lote se guarda:
+    # si el INSERT falla, los lotes siguientes no deben ver sus clientes ni sus patentes.
+    clientes_lote = ChainMap({}, clientes) # Las claves nuevas van al primer diccionario
+    patentes_lote = set()
+    contadores = {'clientes_creados': 0, 'clientes_existentes': 0, 'vehiculos_creados': 0}
+    aceptadas = []
+    try:
+        with transaction.atomic(): # Un SAVEPOINT si ya hay una transacción abierta
+            # Patentes del lote que ya existen en la base de datos, con una sola consulta
+            patentes = [vehiculo.patente for _, _, _, vehiculo in validas if vehiculo]
+            ocupadas = set(Vehiculo.todos.filter(patente__in=patentes).values_list('patente', flat=True))
+
+            # Clientes del lote que ya existen, con una sola consulta (por teléfono, y luego por la clave completa)
+            claves = {clave_cliente(c.nombre, c.apellido, c.telefono) for _, _, c, _ in validas}
+            telefonos = {clave[2] for clave in claves if clave not in clientes_lote}
+            for existente in Cliente.objects.filter(telefono__in=telefonos).order_by('pk'):
+                clave = clave_cliente(existente.nombre, existente.apellido, existente.telefono)
+                if clave in claves and clave not in clientes_lote:
+                    clientes_lote[clave] = existente
+                    contadores['clientes_existentes'] += 1
+
+            nuevos_clientes, nuevos_vehiculos = [], []
+            for numero, fila, cliente, vehiculo in validas:
+                repetida = vehiculo and (vehiculo.patente in patentes_importadas or vehiculo.patente in patentes_lote)
+                if vehiculo and (vehiculo.patente in ocupadas or repetida):
+                    rechazar_fila(numero, fila, [f'patente: Ya existe un vehículo con la patente {vehiculo.patente}.'])
+                    continue
+                clave = clave_cliente(cliente.nombre, cliente.apellido, cliente.telefono)
+                if clave not in clientes_lote:
+                    clientes_lote[clave] = cliente
+                    nuevos_clientes.append(cliente)
+                if vehiculo:
+                    vehiculo.cliente = clientes_lote[clave]
+                    patentes_lote.add(vehiculo.patente)
+                    nuevos_vehiculos.append(vehiculo)
+                aceptadas.append((numero, fila))
+
+            contadores['clientes_creados'] = len(nuevos_clientes)
+            contadores['vehiculos_creados'] = len(nuevos_vehiculos)
+            if not simular:
+                Cliente.objects.bulk_create(nuevos_clientes) # SQLite devuelve los IDs asignados (RETURNING)
+                Vehiculo.objects.bulk_create(nuevos_vehiculos) # cliente_id se toma del cliente ya guardado
+    except IntegrityError as exc:
+        # Otra conexión registró una patente del lote entre la comprobación y el INSERT: el lote se
+        # deshace completo y sus filas se rechazan para volver a importarlas; los demás lotes siguen.
+        for numero, fila in aceptadas:
+            rechazar_fila(numero, fila, [f'No se pudo guardar el lote de esta fila ({exc}); vuelva a importarla.'])
+        return
+    clientes.update(clientes_lote.maps[0])
+    patentes_importadas.update(patentes_lote)
+    for clave, cantidad in contadores.items():
+        resultado[clave] += cantidad
@@ -0,0 +1,193 @@
+# gestion/instrumentacion.py
+# Este archivo implementa la instrumentación por solicitud de la aplicación 'gestion'.
+# Un middleware cuenta las consultas SQL, suma su duración y el tiempo de renderizado de
+# plantillas, y publica los resultados en la cabecera 'Server-Timing' y en una línea de log
+# estructurada. También advierte cuando una vista repite la misma consulta muchas veces,
+# el patrón típico de un problema N+1.
+#
+# Todo el costo por solicitud es un contador y un diccionario en memoria, por lo que
+# puede dejarse activo de forma permanente.
+
+import logging
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+logger = logging.getLogger('gestion.instrumentacion')
+
+# Medición de la solicitud en curso (None fuera de una solicitud instrumentada).
+_medicion_actual = ContextVar('medicion_actual', default=None)
+
+
+class Medicion:
+    """
+    Acumula las métricas de una solicitud: consultas, tiempo de base de datos,
+    tiempo de plantillas y cuántas veces se repitió cada sentencia SQL.
+    """
+    def __init__(self):
+        self.consultas = 0
+        self.segundos_db = 0.0
+        self.segundos_plantillas = 0.0
+        self.repeticiones = {} # Sentencia SQL (sin parámetros) -> cantidad de ejecuciones
+        self.renderizando = False
+
+    def __call__(self, execute, sql, params, many, context):
+        """
+        Envoltorio de ejecución para connection.execute_wrapper().
+        """
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.segundos_db += time.perf_counter() - inicio
+            self.consultas += 1
+            self.repeticiones[sql] = self.repeticiones.get(sql, 0) + 1
+
+    def consulta_mas_repetida(self):
+        """
+        Devuelve la tupla (sql, cantidad) de la sentencia más repetida, o (None, 0).
+        """
+        if not self.repeticiones:
+            return None, 0
+        return max(self.repeticiones.items(), key=lambda item: item[1])
+
+
+def instalar_medicion(pila, medicion):
+    """
+    Instala el envoltorio de medición en todas las conexiones del hilo actual, dentro de 'pila'.
+    """
+    for conexion in connections.all():
+        pila.enter_context(conexion.execute_wrapper(medicion))
+
+
+class InstrumentacionMiddleware:
+    """
+    Middleware que mide cada solicitud y añade la cabecera 'Server-Timing' con:
+    - db: tiempo total en la base de datos y cantidad de consultas.
+    - tpl: tiempo de renderizado de plantillas (incluye las consultas lanzadas al renderizar).
+    - total: tiempo total de la solicitud dentro de Django.
+
+    Se configura con INSTRUMENTACION_ACTIVA y INSTRUMENTACION_UMBRAL_DUPLICADAS en settings.py.
+    Funciona tanto bajo WSGI como bajo ASGI, sin obligar a las vistas asíncronas a ejecutarse en un hilo.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'INSTRUMENTACION_ACTIVA', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.umbral_duplicadas = getattr(settings, 'INSTRUMENTACION_UMBRAL_DUPLICADAS', 5)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        medicion = Medicion()
+        token = _medicion_actual.set(medicion)
+        inicio = time.perf_counter()
+        try:
+            with ExitStack() as pila:
+                instalar_medicion(pila, medicion)
+                response = self.get_response(request)
+        finally:
+            _medicion_actual.reset(token)
+        return self.finalizar(request, response, medicion, time.perf_counter() - inicio)
+
+    async def __acall__(self, request):
+        """
+        Versión asíncrona de __call__. Las consultas del ORM asíncrono se ejecutan en el hilo
+        síncrono asociado a la solicitud, por lo que el envoltorio de medición se instala y se
+        retira en ese mismo hilo.
+        """
+        medicion = Medicion()
+        token = _medicion_actual.set(medicion)
+        inicio = time.perf_counter()
+        pila = ExitStack()
+        try:
+            await sync_to_async(instalar_medicion)(pila, medicion)
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(pila.close)()
+            _medicion_actual.reset(token)
+        return self.finalizar(request, response, medicion, time.perf_counter() - inicio)
+
+    def finalizar(self, request, response, medicion, total):
+        """
+        Añade la cabecera 'Server-Timing' a la respuesta y registra la solicitud.
+        """
+        response['Server-Timing'] = (
+            f'db;dur={medicion.segundos_db * 1000:.1f};desc="{medicion.consultas} consultas", '
+            f'tpl;dur={medicion.segundos_plantillas * 1000:.1f}, '
+            f'total;dur={total * 1000:.1f}'
+        )
+        self.registrar(request, response, medicion, total)
+        return response
+
+    def registrar(self, request, response, medicion, total):
+        """
+        Escribe la línea de log estructurada de la solicitud y, si corresponde,
+        la advertencia de consultas duplicadas.
+        """
+        coincidencia = getattr(request, 'resolver_match', None)
+        vista = coincidencia.view_name if coincidencia else None
+        datos = {
+            'vista': vista,
+            'metodo': request.method,
+            'ruta': request.path,
+            'estado': response.status_code,
+            'total_ms': round(total * 1000, 1),
+            'db_ms': round(medicion.segundos_db * 1000, 1),
+            'consultas': medicion.consultas,
+            'tpl_ms': round(medicion.segundos_plantillas * 1000, 1),
+        }
+        logger.info(' '.join(f'{clave}={valor}' for clave, valor in datos.items()), extra={'instrumentacion': datos})
+
+        sql, veces = medicion.consulta_mas_repetida()
+        if self.umbral_duplicadas and veces >= self.umbral_duplicadas:
+            logger.warning(
+                'vista=%s consultas_duplicadas=%d posible N+1: %s', vista, veces, sql,
+                extra={'instrumentacion': dict(datos, duplicadas=veces, sql=sql)},
+            )
+
+
+class PlantillaInstrumentada(Template):
+    """
+    Plantilla de Django que suma su tiempo de renderizado a la medición en curso.
+    Solo se mide el renderizado más externo, para no contar dos veces las plantillas anidadas.
+    """
+    def render(self, context=None, request=None):
+        medicion = _medicion_actual.get()
+        if medicion is None or medicion.renderizando:
+            return super().render(context, request)
+        medicion.renderizando = True
+        inicio = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            medicion.segundos_plantillas += time.perf_counter() - inicio
+            medicion.renderizando = False
+
+
+class DjangoTemplatesInstrumentado(DjangoTemplates):
+    """
+    Motor de plantillas de Django que entrega plantillas instrumentadas.
+    Se activa con 'BACKEND': 'gestion.instrumentacion.DjangoTemplatesInstrumentado' en TEMPLATES.
+    """
+    def from_string(self, template_code):
+        return PlantillaInstrumentada(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return PlantillaInstrumentada(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
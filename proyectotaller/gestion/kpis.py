@@ -0,0 +1,110 @@
+# gestion/kpis.py
+# Este archivo reúne los indicadores (KPI) del panel de inicio.
+# Los datos provienen de la tabla ResumenOrdenes, que los triggers de SQLite mantienen
+# al día con cada cambio en las órdenes, por lo que calcular el panel no depende de
+# cuántas órdenes haya en el historial.
+
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.db import connection, transaction
+
+from .models import OrdenReparacion, ResumenOrdenes
+
+# Cantidad de meses que se muestran en el panel de ingresos.
+MESES_PANEL = 12
+
+# Resumen calculado desde cero a partir de las órdenes activas y archivadas (misma lógica que los triggers).
+SQL_RESUMEN_COMPLETO = """
+    SELECT strftime('%Y-%m', fecha_ingreso), estado, COUNT(*), COALESCE(SUM(monto_total), 0)
+    FROM (
+        SELECT fecha_ingreso, estado, monto_total FROM gestion_ordenreparacion
+        UNION ALL
+        SELECT fecha_ingreso, estado, monto_total FROM gestion_ordenarchivada
+    )
+    GROUP BY 1, 2
+"""
+
+
+def obtener_kpis(meses=MESES_PANEL):
+    """
+    Calcula los indicadores del panel con una sola consulta sobre ResumenOrdenes:
+    - por_estado: cantidad y monto de órdenes por estado.
+    - por_mes: cantidad, monto total y monto facturado (órdenes finalizadas) de los últimos meses.
+    - pendientes: órdenes abiertas (no finalizadas).
+    """
+    etiquetas = dict(OrdenReparacion.ESTADO_CHOICES)
+    por_estado = OrderedDict(
+        (estado, {'estado': estado, 'etiqueta': etiqueta, 'cantidad': 0, 'monto': Decimal(0)})
+        for estado, etiqueta in OrdenReparacion.ESTADO_CHOICES
+    )
+    por_mes = {}
+    for fila in ResumenOrdenes.objects.filter(cantidad__gt=0):
+        estado = por_estado.setdefault(
+            fila.estado,
+            {'estado': fila.estado, 'etiqueta': etiquetas.get(fila.estado, fila.estado), 'cantidad': 0, 'monto': Decimal(0)},
+        )
+        estado['cantidad'] += fila.cantidad
+        estado['monto'] += fila.monto
+        mes = por_mes.setdefault(fila.mes, {'mes': fila.mes, 'cantidad': 0, 'monto': Decimal(0), 'facturado': Decimal(0)})
+        mes['cantidad'] += fila.cantidad
+        mes['monto'] += fila.monto
+        if fila.estado == 'finalizado':
+            mes['facturado'] += fila.monto
+
+    return {
+        'por_estado': list(por_estado.values()),
+        'por_mes': [por_mes[mes] for mes in sorted(por_mes, reverse=True)[:meses]],
+        'pendientes': sum(e['cantidad'] for e in por_estado.values() if e['estado'] != 'finalizado'),
+        'total_ordenes': sum(e['cantidad'] for e in por_estado.values()),
+    }
+
+
+def calcular_resumen_completo():
+    """
+    Calcula el resumen recorriendo todas las órdenes, activas y archivadas.
+    Devuelve un diccionario {(mes, estado): (cantidad, monto)}.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(SQL_RESUMEN_COMPLETO)
+        return {(mes, estado): (cantidad, Decimal(monto)) for mes, estado, cantidad, monto in cursor.fetchall()}
+
+
+def resumen_actual():
+    """
+    Devuelve el contenido actual de ResumenOrdenes como {(mes, estado): (cantidad, monto)},
+    omitiendo las filas que quedaron en cero.
+    """
+    return {
+        (fila.mes, fila.estado): (fila.cantidad, fila.monto)
+        for fila in ResumenOrdenes.objects.exclude(cantidad=0, monto=0)
+    }
+
+
+def diferencias_resumen():
+    """
+    Compara el resumen mantenido por los triggers con uno calculado desde cero.
+    Devuelve una lista de tuplas (mes, estado, actual, esperado) con las filas que no coinciden.
+    """
+    actual = resumen_actual()
+    esperado = calcular_resumen_completo()
+    return [
+        (mes, estado, actual.get((mes, estado)), esperado.get((mes, estado)))
+        for mes, estado in sorted(set(actual) | set(esperado))
+        if actual.get((mes, estado)) != esperado.get((mes, estado))
+    ]
+
+
+def reconstruir_resumen():
+    """
+    Vuelve a calcular ResumenOrdenes desde cero a partir de las órdenes, en una transacción.
+    Devuelve la cantidad de filas del nuevo resumen.
+    """
+    with transaction.atomic():
+        ResumenOrdenes.objects.all().delete()
+        filas = [
+            ResumenOrdenes(mes=mes, estado=estado, cantidad=cantidad, monto=monto)
+            for (mes, estado), (cantidad, monto) in calcular_resumen_completo().items()
+        ]
+        ResumenOrdenes.objects.bulk_create(filas)
+    return len(filas)
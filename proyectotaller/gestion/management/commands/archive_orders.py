@@ -0,0 +1,51 @@
+# gestion/management/commands/archive_orders.py
+# Este archivo define el comando 'archive_orders', que traslada las órdenes de reparación
+# finalizadas hace más de cierta cantidad de días a la tabla de órdenes archivadas (ver archivo.py).
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from gestion.archivo import LOTE_ARCHIVO, archivar_ordenes, ordenes_archivables
+
+class Command(BaseCommand):
+    """
+    Comando de Django para archivar órdenes de reparación finalizadas antiguas.
+    """
+    help = (
+        'Traslada por lotes, cada uno en una transacción, las órdenes finalizadas hace más de '
+        '--older-than días a la tabla de órdenes archivadas.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than',
+            type=int,
+            default=365,
+            help='Archiva las órdenes finalizadas (fecha de salida) hace más de estos días.'
+        )
+        parser.add_argument('--lote', type=int, default=LOTE_ARCHIVO, help='Órdenes trasladadas por transacción.')
+        parser.add_argument(
+            '--simular',
+            action='store_true',
+            help='Solo informa cuántas órdenes se archivarían, sin modificar nada.'
+        )
+
+    def handle(self, *args, **options):
+        """
+        Lógica principal del comando.
+        """
+        if options['older_than'] < 0 or options['lote'] < 1:
+            raise CommandError('--older-than no puede ser negativo y --lote debe ser mayor que cero.')
+        limite = timezone.localdate() - timedelta(days=options['older_than'])
+
+        if options['simular']:
+            cantidad = ordenes_archivables(limite).count()
+            self.stdout.write(f'Se archivarían {cantidad} órdenes finalizadas antes del {limite}.')
+            return
+
+        def progreso(total):
+            self.stdout.write(f'  {total} órdenes archivadas...')
+
+        total = archivar_ordenes(limite, lote=options['lote'], progreso=progreso if options['verbosity'] > 1 else None)
+        self.stdout.write(self.style.SUCCESS(f'Órdenes archivadas: {total} (finalizadas antes del {limite}).'))
@@ -0,0 +1,313 @@
+# gestion/management/commands/bench.py
+# Este archivo define el comando 'bench', que mide el rendimiento de las vistas de 'gestion'
+# a medida que crecen las tablas. Para cada tamaño de datos genera un conjunto de prueba
+# en una base de datos de test (nunca en la base de datos real), recorre las URLs de
+# gestion/urls.py con el cliente de pruebas de Django y guarda los resultados en JSON
+# para poder comparar ejecuciones entre commits.
+
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime
+from io import StringIO
+
+import django
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import URLPattern, reverse
+
+from gestion import urls as gestion_urls
+from gestion.models import Cliente, Vehiculo, Servicio, OrdenReparacion
+
+# Modelo cuyo objeto se usa para completar las URLs con <pk>, según el prefijo del nombre de la URL.
+MODELOS_POR_PREFIJO = {
+    'cliente': Cliente,
+    'vehiculo': Vehiculo,
+    'servicio': Servicio,
+    'orden_reparacion': OrdenReparacion,
+}
+
+
+class MedidorSQL:
+    """
+    Envoltorio de ejecución (connection.execute_wrapper) que cuenta las consultas SQL
+    y acumula su duración con precisión de microsegundos.
+    """
+    def __init__(self):
+        self.consultas = 0
+        self.segundos = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.segundos += time.perf_counter() - inicio
+            self.consultas += 1
+
+
+def percentil(valores, p):
+    """
+    Devuelve el percentil 'p' (0-100) de una lista de valores, por interpolación lineal.
+    """
+    ordenados = sorted(valores)
+    if len(ordenados) == 1:
+        return ordenados[0]
+    posicion = (len(ordenados) - 1) * p / 100
+    inferior = int(posicion)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (posicion - inferior)
+
+
+def copia_con_datos(ruta, ordenes, seed):
+    """
+    Genera datos para 'ordenes' órdenes en la base de datos de test (nunca en la real) y los
+    copia con VACUUM INTO al archivo 'ruta', que pueden usar otros procesos.
+    """
+    nombre_original = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        call_command(
+            'generate_data',
+            mode='reset',
+            clientes=max(1, ordenes // 5),
+            vehiculos=max(1, ordenes // 3),
+            servicios=50,
+            ordenes=ordenes,
+            seed=seed,
+            stdout=StringIO(),
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('VACUUM INTO %s', [ruta])
+    finally:
+        connection.creation.destroy_test_db(nombre_original, verbosity=0)
+
+
+class Command(BaseCommand):
+    """
+    Comando de Django para medir el rendimiento de las vistas con distintos volúmenes de datos.
+    """
+    help = (
+        'Mide tiempo (percentiles), cantidad y tiempo de consultas SQL y memoria pico de cada vista '
+        'de gestion con distintos tamaños de datos, y escribe los resultados en JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tamanos',
+            default='10000,100000,1000000',
+            help='Cantidades de órdenes de reparación a generar, separadas por comas.'
+        )
+        parser.add_argument('--repeticiones', type=int, default=20, help='Solicitudes medidas por vista.')
+        parser.add_argument('--calentamiento', type=int, default=2, help='Solicitudes previas no medidas por vista.')
+        parser.add_argument('--vistas', default='', help='Nombres de URL a medir, separados por comas (por defecto, todas).')
+        parser.add_argument('--seed', type=int, default=1, help='Semilla para generar los datos.')
+        parser.add_argument('--salida', default='bench.json', help='Archivo JSON donde se escriben los resultados.')
+
+    def handle(self, *args, **options):
+        """
+        Lógica principal: crea la base de datos de test, mide cada tamaño y escribe el JSON.
+        """
+        try:
+            tamanos = [int(valor) for valor in options['tamanos'].split(',') if valor.strip()]
+        except ValueError:
+            raise CommandError('--tamanos debe ser una lista de enteros separados por comas.')
+        self.repeticiones = max(1, options['repeticiones'])
+        self.calentamiento = max(0, options['calentamiento'])
+        self.vistas = {nombre.strip() for nombre in options['vistas'].split(',') if nombre.strip()}
+
+        resultados = []
+        # Todas las mediciones se hacen sobre una base de datos de test desechable.
+        nombre_original = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                for tamano in tamanos:
+                    self.stdout.write(self.style.SUCCESS(f'Generando datos para {tamano} órdenes...'))
+                    call_command(
+                        'generate_data',
+                        mode='reset',
+                        clientes=max(1, tamano // 5),
+                        vehiculos=max(1, tamano // 3),
+                        servicios=50,
+                        ordenes=tamano,
+                        seed=options['seed'],
+                        stdout=StringIO(),
+                    )
+                    resultados.extend(self.medir_tamano(tamano))
+        finally:
+            connection.creation.destroy_test_db(nombre_original, verbosity=0)
+
+        informe = {
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'commit': self.commit_actual(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'repeticiones': self.repeticiones,
+            'resultados': resultados,
+        }
+        with open(options['salida'], 'w', encoding='utf-8') as archivo:
+            json.dump(informe, archivo, indent=2, ensure_ascii=False)
+        self.stdout.write(self.style.SUCCESS(f"Resultados escritos en {options['salida']}."))
+
+    def escenarios(self):
+        """
+        Construye la lista de solicitudes a medir: (nombre, método, url, datos).
+        Incluye un GET por cada URL de gestion/urls.py (y la página de inicio), más el envío
+        (POST) de los formularios de creación y edición de órdenes de reparación. Las URLs que
+        no aceptan GET se descartan al medir (ver medir_tamano).
+        """
+        escenarios = [('home', 'GET', reverse('home'), None)]
+        for patron in gestion_urls.urlpatterns:
+            if not isinstance(patron, URLPattern) or not patron.name:
+                continue
+            argumentos = self.argumentos_url(patron)
+            if argumentos is None:
+                self.stdout.write(self.style.WARNING(f'Se omite {patron.name}: no hay datos para construir su URL.'))
+                continue
+            escenarios.append((patron.name, 'GET', reverse(patron.name, kwargs=argumentos), None))
+
+        orden = OrdenReparacion.objects.order_by('pk').first()
+        if orden is not None:
+            datos = {
+                'vehiculo': orden.vehiculo_id,
+                'servicios': list(orden.servicios.values_list('pk', flat=True)),
+                'fecha_ingreso': orden.fecha_ingreso.isoformat(),
+                'estado': orden.estado,
+            }
+            escenarios.append(('orden_reparacion_create', 'POST', reverse('orden_reparacion_create'), datos))
+            escenarios.append(('orden_reparacion_update', 'POST', reverse('orden_reparacion_update', args=[orden.pk]), datos))
+        if self.vistas:
+            escenarios = [escenario for escenario in escenarios if escenario[0] in self.vistas]
+        return escenarios
+
+    def argumentos_url(self, patron):
+        """
+        Devuelve los argumentos con los que construir la URL de un patrón, usando un objeto
+        del medio de la tabla correspondiente, o None si no se pueden determinar.
+        """
+        parametros = set(patron.pattern.converters)
+        if not parametros:
+            return {}
+        modelo = next(
+            (m for prefijo, m in sorted(MODELOS_POR_PREFIJO.items(), key=lambda item: -len(item[0]))
+             if patron.name.startswith(prefijo)),
+            None,
+        )
+        if modelo is None:
+            return None
+        cantidad = modelo.objects.count()
+        objeto = modelo.objects.order_by('pk')[cantidad // 2:cantidad // 2 + 1].first()
+        if objeto is None:
+            return None
+        argumentos = {}
+        for parametro in parametros:
+            if parametro == 'pk':
+                argumentos['pk'] = objeto.pk
+            elif hasattr(objeto, parametro):
+                argumentos[parametro] = getattr(objeto, parametro)
+            else:
+                return None
+        return argumentos
+
+    def medir_tamano(self, tamano):
+        """
+        Mide todas las solicitudes para el conjunto de datos actual y devuelve sus resultados.
+        """
+        resultados = []
+        client = Client()
+        for nombre, metodo, url, datos in self.escenarios():
+            enviar = client.post if metodo == 'POST' else client.get
+            if metodo == 'GET' and not self.acepta_get(enviar, url):
+                # Vistas que solo aceptan POST (cambio de estado masivo, recálculo en segundo plano)
+                self.stdout.write(self.style.WARNING(f'Se omite {nombre}: no acepta GET.'))
+                continue
+            for _ in range(self.calentamiento):
+                self.solicitar(enviar, url, datos)
+
+            tiempos, consultas, tiempos_sql = [], [], []
+            for _ in range(self.repeticiones):
+                medidor = MedidorSQL()
+                with connection.execute_wrapper(medidor):
+                    inicio = time.perf_counter()
+                    respuesta = self.solicitar(enviar, url, datos)
+                    tiempos.append((time.perf_counter() - inicio) * 1000)
+                consultas.append(medidor.consultas)
+                tiempos_sql.append(medidor.segundos * 1000)
+
+            # La memoria se mide en una solicitud aparte, porque tracemalloc ralentiza la ejecución.
+            tracemalloc.start()
+            self.solicitar(enviar, url, datos)
+            _, pico = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            resultado = {
+                'tamano': tamano,
+                'vista': nombre,
+                'metodo': metodo,
+                'url': url,
+                'estado_http': respuesta.status_code,
+                'tiempo_ms': {
+                    'p50': round(percentil(tiempos, 50), 3),
+                    'p90': round(percentil(tiempos, 90), 3),
+                    'p99': round(percentil(tiempos, 99), 3),
+                    'min': round(min(tiempos), 3),
+                    'max': round(max(tiempos), 3),
+                    'media': round(statistics.mean(tiempos), 3),
+                },
+                'consultas': max(consultas),
+                'tiempo_sql_ms': round(statistics.median(tiempos_sql), 3),
+                'memoria_pico_kb': round(pico / 1024, 1),
+            }
+            resultados.append(resultado)
+            self.stdout.write(
+                f"{tamano:>9} {metodo:<4} {nombre:<28} p50={resultado['tiempo_ms']['p50']:>9.2f}ms "
+                f"p99={resultado['tiempo_ms']['p99']:>9.2f}ms consultas={resultado['consultas']:>5} "
+                f"sql={resultado['tiempo_sql_ms']:>9.2f}ms mem={resultado['memoria_pico_kb']:>9.1f}KB"
+            )
+        return resultados
+
+    def acepta_get(self, enviar, url):
+        """
+        Indica si la vista de 'url' acepta GET: envía una solicitud y comprueba que no responde
+        405. Durante la prueba se omite el aviso "Method Not Allowed" del registro de Django;
+        los errores se siguen registrando.
+        """
+        registro = logging.getLogger('django.request')
+        nivel = registro.level
+        registro.setLevel(logging.ERROR)
+        try:
+            return self.solicitar(enviar, url, None).status_code != 405
+        finally:
+            registro.setLevel(nivel)
+
+    def solicitar(self, enviar, url, datos):
+        """
+        Envía una solicitud con el cliente de pruebas y devuelve la respuesta. Si es una respuesta
+        por streaming (por ejemplo, la exportación de órdenes), recorre todo su contenido, porque
+        las consultas y la generación ocurren al leerlo; los bloques se descartan a medida que
+        llegan, para que la memoria medida sea la de la vista y no la del cuerpo completo.
+        """
+        respuesta = enviar(url, datos)
+        if respuesta.streaming:
+            for _ in respuesta.streaming_content:
+                pass
+        return respuesta
+
+    def commit_actual(self):
+        """
+        Devuelve el hash del commit actual de git, o None si no se puede determinar.
+        """
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,177 @@
+# gestion/management/commands/bench_arranque.py
+# Este archivo define el comando 'bench_arranque', que compara el costo de arrancar un proceso
+# del servidor (un "worker") con la configuración de desarrollo (proyectotaller.settings) y con
+# la de producción (proyectotaller.settings_produccion).
+#
+# Cada perfil se mide en '--trabajadores' procesos nuevos, uno tras otro, como los que inicia un
+# servidor WSGI al arrancar o al reciclar workers. En cada proceso se mide el tiempo de
+# importación y configuración (hasta tener la aplicación WSGI y las URLs cargadas), los módulos
+# importados, la memoria residente máxima y el tiempo de la primera solicitud y de las siguientes.
+# Los procesos usan una copia temporal de datos generados, así que la base de datos real
+# nunca se modifica.
+
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from .bench import copia_con_datos
+
+# Perfiles que se comparan: nombre -> módulo de configuración.
+PERFILES = {
+    'desarrollo': 'proyectotaller.settings',
+    'produccion': 'proyectotaller.settings_produccion',
+}
+
+# Módulo de configuración de cada perfil: el del proyecto, apuntando a la copia de datos.
+CONFIGURACION_PERFIL = """
+from {modulo} import *
+
+DATABASES['default']['NAME'] = {ruta!r}
+ALLOWED_HOSTS = ['127.0.0.1']
+LOGGING['loggers']['gestion.instrumentacion']['level'] = 'WARNING'
+"""
+
+# Programa que ejecuta cada proceso medido. Escribe sus resultados como JSON en la salida estándar.
+MEDICION_PROCESO = """
+import json, resource, sys, time
+inicio = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+from django.urls import get_resolver
+aplicacion = get_wsgi_application()
+get_resolver().url_patterns # Carga las URLs y las vistas, como hace la primera solicitud
+arranque = time.perf_counter() - inicio
+modulos = len(sys.modules)
+
+from wsgiref.util import setup_testing_defaults
+
+def solicitar(url):
+    entorno = {{'PATH_INFO': url, 'HTTP_HOST': '127.0.0.1'}}
+    setup_testing_defaults(entorno)
+    estados = []
+    inicio = time.perf_counter()
+    cuerpo = aplicacion(entorno, lambda estado, cabeceras, exc_info=None: estados.append(estado))
+    b''.join(cuerpo)
+    if hasattr(cuerpo, 'close'):
+        cuerpo.close()
+    if not estados[0].startswith('200'):
+        raise SystemExit(f'{{url}} respondió {{estados[0]}}')
+    return time.perf_counter() - inicio
+
+urls = {urls!r}
+primera = sum(solicitar(url) for url in urls)
+siguientes = [sum(solicitar(url) for url in urls) for _ in range({repeticiones})]
+print(json.dumps({{
+    'arranque_s': arranque,
+    'modulos': modulos,
+    'primera_solicitud_s': primera,
+    'solicitud_s': sum(siguientes) / len(siguientes),
+    # ru_maxrss está en kilobytes en Linux
+    'memoria_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}}))
+"""
+
+
+class Command(BaseCommand):
+    """
+    Comando de Django para comparar el arranque de los workers con la configuración de desarrollo y la de producción.
+    """
+    help = (
+        'Mide el tiempo de importación, los módulos cargados, la memoria y la primera solicitud de '
+        'cada proceso del servidor con la configuración de desarrollo y con la de producción.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--trabajadores', type=int, default=5, help='Procesos que se inician por perfil.')
+        parser.add_argument('--ordenes', type=int, default=500, help='Órdenes de reparación a generar.')
+        parser.add_argument('--urls', default='/,/gestion/ordenes/', help='URLs a solicitar en cada proceso, separadas por comas.')
+        parser.add_argument('--repeticiones', type=int, default=5, help='Veces que se repiten las solicitudes después de la primera.')
+        parser.add_argument('--seed', type=int, default=1, help='Semilla para generar los datos.')
+        parser.add_argument('--salida', default='', help='Archivo JSON donde se escriben los resultados (opcional).')
+
+    def handle(self, *args, **options):
+        """
+        Lógica principal: prepara los datos, mide cada perfil y muestra la comparación.
+        """
+        if options['trabajadores'] < 1 or options['repeticiones'] < 1:
+            raise CommandError('--trabajadores y --repeticiones deben ser mayores que cero.')
+        urls = [url.strip() for url in options['urls'].split(',') if url.strip()]
+
+        directorio = tempfile.mkdtemp(prefix='bench_arranque_')
+        try:
+            ruta = os.path.join(directorio, 'datos.sqlite3')
+            self.stdout.write(self.style.SUCCESS(f"Generando datos para {options['ordenes']} órdenes..."))
+            copia_con_datos(ruta, options['ordenes'], options['seed'])
+            programa = MEDICION_PROCESO.format(urls=urls, repeticiones=options['repeticiones'])
+
+            resultados = {}
+            for perfil, modulo in PERFILES.items():
+                nombre_modulo = f'bench_arranque_{perfil}'
+                with open(os.path.join(directorio, f'{nombre_modulo}.py'), 'w', encoding='utf-8') as archivo:
+                    archivo.write(CONFIGURACION_PERFIL.format(modulo=modulo, ruta=ruta))
+                entorno = dict(
+                    os.environ,
+                    DJANGO_SETTINGS_MODULE=nombre_modulo,
+                    PYTHONPATH=os.pathsep.join([directorio, str(settings.BASE_DIR), os.environ.get('PYTHONPATH', '')]),
+                    # La configuración de producción exige una clave secreta; para medir basta una cualquiera.
+                    DJANGO_SECRET_KEY=os.environ.get('DJANGO_SECRET_KEY') or 'bench-arranque',
+                )
+                procesos = [self.medir_proceso(programa, entorno, perfil) for _ in range(options['trabajadores'])]
+                resultados[perfil] = self.resumir(procesos)
+        finally:
+            shutil.rmtree(directorio, ignore_errors=True)
+
+        self.mostrar(resultados)
+        if options['salida']:
+            informe = {
+                'ordenes': options['ordenes'],
+                'trabajadores': options['trabajadores'],
+                'urls': urls,
+                'resultados': resultados,
+            }
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                json.dump(informe, archivo, indent=2, ensure_ascii=False)
+            self.stdout.write(self.style.SUCCESS(f"Resultados escritos en {options['salida']}."))
+
+    def medir_proceso(self, programa, entorno, perfil):
+        """
+        Ejecuta el programa de medición en un proceso nuevo y devuelve sus resultados.
+        """
+        proceso = subprocess.run(
+            [sys.executable, '-c', programa], env=entorno, cwd=str(settings.BASE_DIR),
+            capture_output=True, text=True,
+        )
+        if proceso.returncode != 0:
+            raise CommandError(f'El proceso del perfil {perfil} falló:\n{proceso.stderr or proceso.stdout}')
+        return json.loads(proceso.stdout.strip().splitlines()[-1])
+
+    def resumir(self, procesos):
+        """
+        Agrega las mediciones de los procesos de un perfil: mediana de los tiempos y de la memoria.
+        """
+        return {
+            'arranque_ms': round(statistics.median(p['arranque_s'] for p in procesos) * 1000, 1),
+            'primera_solicitud_ms': round(statistics.median(p['primera_solicitud_s'] for p in procesos) * 1000, 1),
+            'solicitud_ms': round(statistics.median(p['solicitud_s'] for p in procesos) * 1000, 1),
+            'modulos': round(statistics.median(p['modulos'] for p in procesos)),
+            'memoria_mb': round(statistics.median(p['memoria_mb'] for p in procesos), 1),
+        }
+
+    def mostrar(self, resultados):
+        """
+        Escribe la tabla de comparación por perfil.
+        """
+        self.stdout.write(
+            f"{'perfil':<11} {'arranque':>10} {'1ª solicitud':>13} {'solicitud':>10} {'módulos':>8} {'memoria':>9}"
+        )
+        for perfil, resultado in resultados.items():
+            self.stdout.write(
+                f"{perfil:<11} {resultado['arranque_ms']:>8.1f}ms {resultado['primera_solicitud_ms']:>11.1f}ms "
+                f"{resultado['solicitud_ms']:>8.1f}ms {resultado['modulos']:>8} {resultado['memoria_mb']:>7.1f}MB"
+            )
@@ -0,0 +1,271 @@
+# gestion/management/commands/bench_async.py
+# Este archivo define el comando 'bench_async', que compara tres formas de servir la aplicación
+# ante muchos clientes concurrentes:
+# - 'wsgi': vistas síncronas en un servidor WSGI con un número fijo de hilos (como gunicorn gthread).
+# - 'asgi_sync': las mismas vistas síncronas en un único proceso de uvicorn (ASGI).
+# - 'asgi': vistas asíncronas en un único proceso de uvicorn con bucle de eventos.
+#
+# Cada cliente simulado abre una conexión, envía su solicitud en varios trozos repartidos en
+# '--lentitud' segundos (un cliente lento, por ejemplo en una red móvil) y lee la respuesta.
+# Los servidores se ejecutan en subprocesos sobre una copia temporal de datos generados,
+# así que la base de datos real nunca se modifica.
+
+import asyncio
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from .bench import copia_con_datos, percentil
+
+# Formas de servir la aplicación que se comparan.
+MODOS = ('wsgi', 'asgi_sync', 'asgi')
+
+# Módulo de configuración que usan los servidores de prueba: la del proyecto, apuntando a la copia.
+CONFIGURACION_SERVIDOR = """
+from proyectotaller.settings import *
+
+DATABASES['default']['NAME'] = {ruta!r}
+DEBUG = False
+ALLOWED_HOSTS = ['127.0.0.1']
+LOGGING['loggers']['gestion.instrumentacion']['level'] = 'WARNING'
+"""
+
+
+class ManejadorSilencioso(WSGIRequestHandler):
+    """
+    Manejador WSGI que no escribe una línea de log por cada solicitud.
+    """
+    def log_message(self, format, *args):
+        pass
+
+
+class ServidorWSGIHilos(WSGIServer):
+    """
+    Servidor WSGI que atiende cada conexión en un conjunto fijo de hilos.
+    Mientras un hilo espera a que un cliente termine de enviar su solicitud, no atiende a nadie más.
+    """
+    request_queue_size = 1024
+
+    def __init__(self, direccion, hilos):
+        super().__init__(direccion, ManejadorSilencioso)
+        self.hilos = ThreadPoolExecutor(hilos)
+
+    def process_request(self, request, client_address):
+        self.hilos.submit(self.atender, request, client_address)
+
+    def atender(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+class Command(BaseCommand):
+    """
+    Comando de Django para comparar el servidor WSGI con hilos y el servidor ASGI con bucle de eventos.
+    """
+    help = (
+        'Mide solicitudes por segundo y latencias con muchos clientes concurrentes (opcionalmente lentos), '
+        'sirviendo la aplicación con WSGI e hilos y con ASGI (uvicorn) y vistas asíncronas.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ordenes', type=int, default=2000, help='Órdenes de reparación a generar.')
+        parser.add_argument('--clientes', type=int, default=50, help='Clientes concurrentes simulados.')
+        parser.add_argument('--hilos', type=int, default=8, help='Hilos del servidor WSGI.')
+        parser.add_argument('--duracion', type=float, default=5, help='Segundos que se mide cada combinación.')
+        parser.add_argument(
+            '--lentitud',
+            default='0,1',
+            help='Segundos que tarda cada cliente en enviar su solicitud, separados por comas (0 = cliente rápido).'
+        )
+        parser.add_argument('--urls', default='/,/gestion/ordenes/,/gestion/servicios/', help='URLs a solicitar, separadas por comas.')
+        parser.add_argument('--seed', type=int, default=1, help='Semilla para generar los datos.')
+        parser.add_argument('--salida', default='', help='Archivo JSON donde se escriben los resultados (opcional).')
+        # Uso interno: ejecuta uno de los servidores (lo usa el propio comando en un subproceso).
+        parser.add_argument('--servir', choices=MODOS, help='Ejecuta el servidor indicado y no mide nada.')
+        parser.add_argument('--puerto', type=int, default=0, help='Puerto del servidor (con --servir).')
+
+    def handle(self, *args, **options):
+        """
+        Lógica principal: prepara los datos, mide cada servidor con cada lentitud y muestra la comparación.
+        """
+        if options['servir']:
+            return self.servir(options['servir'], options['puerto'], options['hilos'])
+        try:
+            lentitudes = [float(valor) for valor in options['lentitud'].split(',') if valor.strip()]
+        except ValueError:
+            raise CommandError('--lentitud debe ser una lista de números separados por comas.')
+        try:
+            import uvicorn # noqa: F401
+        except ImportError:
+            raise CommandError('El servidor ASGI requiere uvicorn: pip install -r requirements.txt')
+        self.options = options
+        self.urls = [url.strip() for url in options['urls'].split(',') if url.strip()]
+
+        directorio = tempfile.mkdtemp(prefix='bench_async_')
+        try:
+            ruta = self.preparar_datos(directorio)
+            with open(os.path.join(directorio, 'bench_async_settings.py'), 'w', encoding='utf-8') as archivo:
+                archivo.write(CONFIGURACION_SERVIDOR.format(ruta=ruta))
+            resultados = []
+            for modo in MODOS:
+                with self.servidor(modo, directorio) as puerto:
+                    for lentitud in lentitudes:
+                        resultado = asyncio.run(self.medir(puerto, lentitud))
+                        resultado.update(modo=modo, lentitud_s=lentitud)
+                        resultados.append(resultado)
+                        self.stdout.write(
+                            f"{modo:<9} lentitud={lentitud:>4.1f}s solicitudes/s={resultado['solicitudes_por_segundo']:>8.1f} "
+                            f"p50={resultado['latencia_ms']['p50']:>8.1f}ms p99={resultado['latencia_ms']['p99']:>8.1f}ms "
+                            f"errores={resultado['errores']}"
+                        )
+        finally:
+            shutil.rmtree(directorio, ignore_errors=True)
+
+        if options['salida']:
+            informe = {
+                'ordenes': options['ordenes'],
+                'clientes': options['clientes'],
+                'hilos_wsgi': options['hilos'],
+                'duracion_s': options['duracion'],
+                'urls': self.urls,
+                'resultados': resultados,
+            }
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                json.dump(informe, archivo, indent=2, ensure_ascii=False)
+            self.stdout.write(self.style.SUCCESS(f"Resultados escritos en {options['salida']}."))
+
+    def preparar_datos(self, directorio):
+        """
+        Genera los datos en la base de datos de test y los copia a un archivo en 'directorio'.
+        Devuelve la ruta de la copia.
+        """
+        ruta = os.path.join(directorio, 'datos.sqlite3')
+        self.stdout.write(self.style.SUCCESS(f"Generando datos para {self.options['ordenes']} órdenes..."))
+        copia_con_datos(ruta, self.options['ordenes'], self.options['seed'])
+        return ruta
+
+    @contextmanager
+    def servidor(self, modo, directorio):
+        """
+        Inicia el servidor indicado en un subproceso, entrega su puerto y lo detiene al salir.
+        """
+        with socket.socket() as libre:
+            libre.bind(('127.0.0.1', 0))
+            puerto = libre.getsockname()[1]
+        entorno = dict(
+            os.environ,
+            DJANGO_SETTINGS_MODULE='bench_async_settings',
+            PYTHONPATH=os.pathsep.join([directorio, str(settings.BASE_DIR), os.environ.get('PYTHONPATH', '')]),
+        )
+        proceso = subprocess.Popen(
+            [sys.executable, str(settings.BASE_DIR / 'manage.py'), 'bench_async',
+             '--servir', modo, '--puerto', str(puerto), '--hilos', str(self.options['hilos'])],
+            env=entorno,
+        )
+        try:
+            self.esperar_puerto(puerto, proceso)
+            yield puerto
+        finally:
+            proceso.terminate()
+            proceso.wait(timeout=10)
+
+    def esperar_puerto(self, puerto, proceso, limite=30):
+        """
+        Espera a que el servidor acepte conexiones en 'puerto'.
+        """
+        fin = time.monotonic() + limite
+        while time.monotonic() < fin:
+            if proceso.poll() is not None:
+                raise CommandError('El servidor de prueba terminó antes de aceptar conexiones.')
+            try:
+                socket.create_connection(('127.0.0.1', puerto), timeout=1).close()
+                return
+            except OSError:
+                time.sleep(0.1)
+        raise CommandError(f'El servidor de prueba no respondió en el puerto {puerto}.')
+
+    async def medir(self, puerto, lentitud):
+        """
+        Lanza los clientes concurrentes durante '--duracion' segundos y agrega sus resultados.
+        """
+        fin = time.monotonic() + self.options['duracion']
+        latencias, errores = [], []
+        inicio = time.monotonic()
+        await asyncio.gather(*(
+            self.cliente(numero, puerto, lentitud, fin, latencias, errores)
+            for numero in range(self.options['clientes'])
+        ))
+        transcurrido = time.monotonic() - inicio
+        return {
+            'solicitudes': len(latencias),
+            'solicitudes_por_segundo': round(len(latencias) / transcurrido, 1),
+            'latencia_ms': {
+                'p50': round(percentil(latencias, 50), 1) if latencias else 0,
+                'p99': round(percentil(latencias, 99), 1) if latencias else 0,
+                'media': round(statistics.mean(latencias), 1) if latencias else 0,
+            },
+            'errores': len(errores),
+        }
+
+    async def cliente(self, numero, puerto, lentitud, fin, latencias, errores):
+        """
+        Cliente simulado: repite solicitudes hasta 'fin', enviando cada una en trozos repartidos
+        en 'lentitud' segundos. Solo cuentan como exitosas las respuestas 200.
+        """
+        trozos = 5
+        peticion = 0
+        while time.monotonic() < fin:
+            url = self.urls[(numero + peticion) % len(self.urls)]
+            peticion += 1
+            datos = f'GET {url} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n\r\n'.encode()
+            tamano = -(-len(datos) // trozos)
+            inicio = time.perf_counter()
+            try:
+                lector, escritor = await asyncio.open_connection('127.0.0.1', puerto)
+                for posicion in range(0, len(datos), tamano):
+                    if posicion and lentitud:
+                        await asyncio.sleep(lentitud / (trozos - 1))
+                    escritor.write(datos[posicion:posicion + tamano])
+                    await escritor.drain()
+                respuesta = await lector.read()
+                escritor.close()
+            except OSError as error:
+                errores.append(str(error))
+                continue
+            estado = respuesta.split(b' ', 2)[1] if respuesta.count(b' ') >= 2 else b''
+            if estado == b'200':
+                latencias.append((time.perf_counter() - inicio) * 1000)
+            else:
+                errores.append(estado.decode(errors='replace') or 'sin respuesta')
+
+    def servir(self, modo, puerto, hilos):
+        """
+        Ejecuta el servidor indicado hasta que el proceso reciba una señal de término.
+        """
+        if modo in ('asgi', 'asgi_sync'):
+            import uvicorn
+            if modo == 'asgi_sync':
+                settings.ROOT_URLCONF_ASYNC = None # Desactiva EnrutamientoAsyncMiddleware
+            uvicorn.run('proyectotaller.asgi:application', host='127.0.0.1', port=puerto,
+                        log_level='warning', access_log=False, lifespan='off')
+            return
+        from proyectotaller.wsgi import application
+        servidor = ServidorWSGIHilos(('127.0.0.1', puerto), hilos)
+        servidor.set_app(application)
+        servidor.serve_forever()
@@ -0,0 +1,205 @@
+# gestion/management/commands/bench_concurrencia.py
+# Este archivo define el comando 'bench_concurrencia', que mide el rendimiento de lectura y
+# escritura de SQLite con varios trabajadores concurrentes. Compara la configuración por defecto
+# de Django ('antes': diario de reversión, transacciones diferidas y una conexión por solicitud)
+# con la configuración de DATABASES en settings.py ('despues': WAL, PRAGMAs, transacciones
+# IMMEDIATE y conexiones persistentes).
+#
+# Los datos se generan en la base de datos de test y se copian a un archivo temporal por cada
+# configuración, así que la base de datos real nunca se modifica.
+
+import json
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, connections, transaction
+
+from gestion.models import Vehiculo, OrdenReparacion
+
+from .bench import percentil
+
+
+class Command(BaseCommand):
+    """
+    Comando de Django para medir lecturas y escrituras concurrentes antes y después de ajustar SQLite.
+    """
+    help = (
+        'Mide lecturas y escrituras por segundo, latencias y errores "database is locked" con varios '
+        'trabajadores concurrentes, con la configuración SQLite por defecto y con la de settings.py.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ordenes', type=int, default=100000, help='Órdenes de reparación a generar.')
+        parser.add_argument('--trabajadores', type=int, default=8, help='Hilos concurrentes, cada uno con su conexión.')
+        parser.add_argument('--duracion', type=float, default=10, help='Segundos que se mide cada configuración.')
+        parser.add_argument('--escrituras', type=float, default=0.2, help='Proporción de operaciones de escritura (0 a 1).')
+        parser.add_argument('--seed', type=int, default=1, help='Semilla para generar los datos.')
+        parser.add_argument('--salida', default='', help='Archivo JSON donde se escriben los resultados (opcional).')
+
+    def handle(self, *args, **options):
+        """
+        Lógica principal: genera los datos, mide cada configuración y muestra la comparación.
+        """
+        self.options = options
+        configuraciones = {
+            # Configuración por defecto del backend sqlite3 de Django.
+            'antes': {'OPTIONS': {}, 'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False},
+            # Configuración actual de settings.py.
+            'despues': {
+                'OPTIONS': dict(connection.settings_dict['OPTIONS']),
+                'CONN_MAX_AGE': connection.settings_dict['CONN_MAX_AGE'],
+                'CONN_HEALTH_CHECKS': connection.settings_dict['CONN_HEALTH_CHECKS'],
+            },
+        }
+
+        directorio = tempfile.mkdtemp(prefix='bench_concurrencia_')
+        nombre_original = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.stdout.write(self.style.SUCCESS(f"Generando datos para {options['ordenes']} órdenes..."))
+            call_command(
+                'generate_data',
+                mode='reset',
+                clientes=max(1, options['ordenes'] // 5),
+                vehiculos=max(1, options['ordenes'] // 3),
+                servicios=50,
+                ordenes=options['ordenes'],
+                seed=options['seed'],
+                stdout=StringIO(),
+            )
+            self.ids_vehiculos = list(Vehiculo.objects.values_list('pk', flat=True))
+            self.max_orden = OrdenReparacion.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+
+            # Cada configuración parte de una copia idéntica de los datos, en modo de diario por defecto.
+            rutas = {}
+            for nombre in configuraciones:
+                rutas[nombre] = os.path.join(directorio, f'{nombre}.sqlite3')
+                with connection.cursor() as cursor:
+                    cursor.execute('VACUUM INTO %s', [rutas[nombre]])
+
+            resultados = {
+                nombre: self.medir(nombre, rutas[nombre], configuracion)
+                for nombre, configuracion in configuraciones.items()
+            }
+        finally:
+            connection.creation.destroy_test_db(nombre_original, verbosity=0)
+            for archivo in os.listdir(directorio):
+                os.remove(os.path.join(directorio, archivo))
+            os.rmdir(directorio)
+
+        for nombre, resultado in resultados.items():
+            self.stdout.write(
+                f"{nombre:<8} lecturas/s={resultado['lecturas_por_segundo']:>9.1f} "
+                f"escrituras/s={resultado['escrituras_por_segundo']:>8.1f} "
+                f"lectura p99={resultado['lectura_ms']['p99']:>8.2f}ms "
+                f"escritura p99={resultado['escritura_ms']['p99']:>8.2f}ms "
+                f"bloqueos={resultado['errores_bloqueo']}"
+            )
+        if options['salida']:
+            informe = {
+                'ordenes': options['ordenes'],
+                'trabajadores': options['trabajadores'],
+                'duracion_s': options['duracion'],
+                'proporcion_escrituras': options['escrituras'],
+                'resultados': resultados,
+            }
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                json.dump(informe, archivo, indent=2, ensure_ascii=False)
+            self.stdout.write(self.style.SUCCESS(f"Resultados escritos en {options['salida']}."))
+
+    def medir(self, nombre, ruta, configuracion):
+        """
+        Ejecuta los trabajadores contra la copia 'ruta' con la configuración indicada
+        y devuelve las métricas agregadas.
+        """
+        alias = f'bench_{nombre}'
+        connections.settings[alias] = dict(connection.settings_dict, NAME=ruta, TEST={}, **configuracion)
+        fin = time.perf_counter() + self.options['duracion']
+        lecturas, escrituras, errores = [], [], []
+        hilos = [
+            threading.Thread(target=self.trabajador, args=(alias, semilla, fin, lecturas, escrituras, errores))
+            for semilla in range(self.options['trabajadores'])
+        ]
+        inicio = time.perf_counter()
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        transcurrido = time.perf_counter() - inicio
+        del connections.settings[alias]
+
+        def latencias(valores):
+            if not valores:
+                return {'p50': 0, 'p99': 0, 'media': 0}
+            return {
+                'p50': round(percentil(valores, 50), 3),
+                'p99': round(percentil(valores, 99), 3),
+                'media': round(statistics.mean(valores), 3),
+            }
+
+        return {
+            'lecturas': len(lecturas),
+            'escrituras': len(escrituras),
+            'lecturas_por_segundo': round(len(lecturas) / transcurrido, 1),
+            'escrituras_por_segundo': round(len(escrituras) / transcurrido, 1),
+            'lectura_ms': latencias(lecturas),
+            'escritura_ms': latencias(escrituras),
+            'errores_bloqueo': len(errores),
+        }
+
+    def trabajador(self, alias, semilla, fin, lecturas, escrituras, errores):
+        """
+        Repite operaciones hasta el tiempo 'fin'. Cada operación simula una solicitud:
+        al terminar se cierra la conexión si la configuración no la reutiliza, como hace Django.
+        """
+        aleatorio = random.Random(semilla)
+        conexion = connections[alias]
+        try:
+            while time.perf_counter() < fin:
+                escribir = aleatorio.random() < self.options['escrituras']
+                inicio = time.perf_counter()
+                try:
+                    if escribir:
+                        self.escritura(alias, aleatorio)
+                    else:
+                        self.lectura(alias)
+                except OperationalError as error:
+                    errores.append(str(error))
+                else:
+                    (escrituras if escribir else lecturas).append((time.perf_counter() - inicio) * 1000)
+                finally:
+                    conexion.close_if_unusable_or_obsolete()
+        finally:
+            conexion.close()
+
+    def lectura(self, alias):
+        """
+        Lectura típica: la primera página del listado de órdenes con su vehículo y cliente.
+        """
+        list(
+            OrdenReparacion.objects.using(alias)
+            .select_related('vehiculo__cliente')
+            .order_by('-fecha_ingreso', '-id')[:50]
+        )
+
+    def escritura(self, alias, aleatorio):
+        """
+        Escritura típica: lee un vehículo, registra una orden nueva y cambia el estado de otra,
+        todo en una transacción.
+        """
+        with transaction.atomic(using=alias):
+            vehiculo = Vehiculo.objects.using(alias).get(pk=aleatorio.choice(self.ids_vehiculos))
+            OrdenReparacion.objects.using(alias).create(
+                vehiculo=vehiculo,
+                fecha_ingreso=date.today() - timedelta(days=aleatorio.randint(0, 30)),
+                estado='ingresado',
+            )
+            OrdenReparacion.objects.using(alias).filter(pk=aleatorio.randint(1, self.max_orden)).update(estado='en_progreso')
@@ -0,0 +1,60 @@
+# gestion/management/commands/export_orders.py
+# Este archivo define el comando 'export_orders', que exporta todas las órdenes de reparación,
+# con su vehículo, su cliente y sus servicios, en CSV o NDJSON (ver exportacion.py).
+# Escribe la salida por lotes, así que la memoria usada no depende del tamaño de la tabla.
+
+from django.core.management.base import BaseCommand, CommandError
+from gestion.exportacion import LOTE_EXPORTACION, exportar_ordenes, lectura_consistente
+from gestion.forms import FiltroExportacionForm
+
+class Command(BaseCommand):
+    """
+    Comando de Django para exportar las órdenes de reparación.
+    """
+    help = 'Exporta las órdenes de reparación con su vehículo, cliente y servicios en CSV o NDJSON, por lotes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--formato', choices=['csv', 'ndjson'], default='csv', help='Formato de salida.')
+        parser.add_argument('--desde', help='Fecha de ingreso mínima (AAAA-MM-DD).')
+        parser.add_argument('--hasta', help='Fecha de ingreso máxima (AAAA-MM-DD).')
+        parser.add_argument('--estado', help='Exporta solo las órdenes en este estado.')
+        parser.add_argument('--incluir-archivadas', action='store_true', help='Exporta también las órdenes archivadas.')
+        parser.add_argument('--lote', type=int, default=LOTE_EXPORTACION, help='Órdenes leídas por consulta.')
+        parser.add_argument('--salida', default='-', help="Archivo de salida ('-' para la salida estándar).")
+
+    def handle(self, *args, **options):
+        """
+        Lógica principal del comando.
+        """
+        if options['lote'] < 1:
+            raise CommandError('--lote debe ser mayor que cero.')
+        # Los filtros se validan con el mismo formulario que usa la vista de exportación.
+        form = FiltroExportacionForm({
+            'formato': options['formato'],
+            'desde': options['desde'],
+            'hasta': options['hasta'],
+            'estado': options['estado'],
+            'archivadas': options['incluir_archivadas'],
+        })
+        if not form.is_valid():
+            errores = '; '.join(f'{campo}: {" ".join(mensajes)}' for campo, mensajes in form.errors.items())
+            raise CommandError(f'Filtros inválidos: {errores}')
+        filtros = form.cleaned_data
+        formato = filtros.pop('formato')
+
+        if options['salida'] == '-':
+            self.exportar(formato, options['lote'], filtros, lambda bloque: self.stdout.write(bloque, ending=''))
+            return
+        with open(options['salida'], 'w', encoding='utf-8', newline='') as archivo:
+            self.exportar(formato, options['lote'], filtros, archivo.write)
+        self.stderr.write(self.style.SUCCESS(f"Órdenes exportadas a {options['salida']}."))
+
+    def exportar(self, formato, lote, filtros, escribir):
+        """
+        Escribe la exportación bloque a bloque con la función 'escribir'.
+        """
+        # Una sola transacción de lectura: todos los lotes ven la misma versión de la base de datos,
+        # sin tomar el bloqueo de escritura (ver exportacion.lectura_consistente).
+        with lectura_consistente():
+            for bloque in exportar_ordenes(formato, lote, **filtros):
+                escribir(bloque)
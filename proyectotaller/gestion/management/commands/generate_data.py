@@ -1,19 +1,34 @@
 # gestion/management/commands/generate_data.py
 # Este archivo define un comando de administración personalizado de Django.
 # Su propósito es generar datos de ejemplo para los modelos de la aplicación 'gestion',
-# lo cual es útil para pruebas y desarrollo.
+# lo cual es útil para pruebas y desarrollo. Con las opciones --clientes, --vehiculos,
+# --servicios y --ordenes también permite generar millones de filas para pruebas de rendimiento.
 
 from django.core.management.base import BaseCommand
-from django.db import connection # Importar connection para resetear secuencias
-from gestion.models import Cliente, Vehiculo, Servicio, OrdenReparacion
+from django.db import connection, transaction # connection para borrar tablas y resetear secuencias
+from django.db.models import Max
+from django.utils import timezone
+from gestion.cache import incrementar_version
+from gestion.models import Cliente, Vehiculo, Servicio, OrdenReparacion, OrdenArchivada, ResumenOrdenes
 from datetime import date, timedelta
 import random
 
+# Tablas intermedias de la relación ManyToMany entre órdenes (activas y archivadas) y servicios.
+OrdenServicio = OrdenReparacion.servicios.through
+ArchivadaServicio = OrdenArchivada.servicios.through
+
+# Modelos que comparten la numeración de IDs de otro: las órdenes archivadas conservan el ID que
+# tenían como órdenes activas (ver archivo.py), así que una orden nueva no puede reutilizarlo.
+NUMERACION_COMPARTIDA = {OrdenReparacion: [OrdenArchivada]}
+
 class Command(BaseCommand):
     """
     Comando de Django para generar datos de ejemplo.
     """
-    help = 'Genera 10 entradas de datos de ejemplo para los modelos Cliente, Vehiculo, Servicio y OrdenReparacion.'
+    help = (
+        'Genera datos de ejemplo para los modelos Cliente, Vehiculo, Servicio y OrdenReparacion '
+        '(10 de cada uno por defecto; use --clientes/--vehiculos/--servicios/--ordenes para más).'
+    )
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -21,7 +36,23 @@ class Command(BaseCommand):
             type=str,
             choices=['reset', 'append'],
             default=None, # Change default to None to trigger interactive prompt
-            help='Define el modo de generación de datos: "reset" para eliminar y generar desde 0, "append" para añadir 10 más.'
+            help='Define el modo de generación de datos: "reset" para eliminar y generar desde 0, "append" para añadir más.'
+        )
+        parser.add_argument('--clientes', type=int, default=10, help='Cantidad de clientes a generar.')
+        parser.add_argument('--vehiculos', type=int, default=10, help='Cantidad de vehículos a generar.')
+        parser.add_argument('--servicios', type=int, default=10, help='Cantidad de servicios a generar.')
+        parser.add_argument('--ordenes', type=int, default=10, help='Cantidad de órdenes de reparación a generar.')
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=None,
+            help='Semilla del generador aleatorio; con la misma semilla y modo "reset" se obtienen los mismos datos.'
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=10000,
+            help='Cantidad de filas insertadas por lote y transacción.'
         )
 
     def handle(self, *args, **kwargs):
@@ -29,11 +60,13 @@ class Command(BaseCommand):
         Lógica principal del comando para generar datos.
         """
         mode = kwargs['mode']
+        self.rng = random.Random(kwargs['seed']) # Generador propio para que --seed sea determinista
+        self.lote = max(1, kwargs['lote'])
 
         if mode is None: # If mode is not provided via argument, ask the user
             self.stdout.write(self.style.WARNING('No se especificó el modo de generación de datos.'))
             while True:
-                choice = input("¿Desea agregar 10 más (append) o 10 desde 0 (reset)? (append/reset): ").lower()
+                choice = input("¿Desea agregar más datos (append) o generarlos desde 0 (reset)? (append/reset): ").lower()
                 if choice in ['append', 'reset']:
                     mode = choice
                     break
@@ -41,93 +74,218 @@ class Command(BaseCommand):
                     self.stdout.write(self.style.ERROR('Opción inválida. Por favor, escriba "append" o "reset".'))
 
         if mode == 'reset':
-            self.stdout.write(self.style.SUCCESS('Eliminando datos existentes...'))
-            # Elimina todos los registros existentes de cada modelo para asegurar un estado limpio.
-            Cliente.objects.all().delete()
-            Vehiculo.objects.all().delete()
-            Servicio.objects.all().delete()
-            OrdenReparacion.objects.all().delete()
-            self.stdout.write(self.style.SUCCESS('Datos existentes eliminados.'))
-
-            self.stdout.write(self.style.SUCCESS('Reseteando secuencias de IDs...'))
-            with connection.cursor() as cursor:
-                for model in [Cliente, Vehiculo, Servicio, OrdenReparacion]:
-                    table_name = model._meta.db_table
-                    cursor.execute(f"UPDATE SQLITE_SEQUENCE SET SEQ=0 WHERE NAME='{table_name}';")
-            self.stdout.write(self.style.SUCCESS('Secuencias de IDs reseteadas.'))
+            self.resetear()
         elif mode == 'append':
-            self.stdout.write(self.style.SUCCESS('Añadiendo 10 nuevos registros a los datos existentes...'))
-        
-        # El resto del código de generación de datos se mantiene igual,
-        # ya que siempre generará 10 nuevos registros.
-
-        self.stdout.write(self.style.SUCCESS('Generando 10 clientes y 10 vehículos...'))
-        clientes = []
-        vehiculos = []
-        # Bucle para crear 10 clientes y 10 vehículos asociados.
-        for i in range(1, 11):
-            cliente = Cliente.objects.create(
-                nombre=f'Cliente{i}',
-                apellido=f'Apellido{i}',
-                telefono=f'9{random.randint(10000000, 99999999)}',
-                email=f'cliente{i}@example.com' if i % 2 == 0 else None # Email opcional
+            self.stdout.write(self.style.SUCCESS('Añadiendo nuevos registros a los datos existentes...'))
+
+        clientes = self.generar_clientes(kwargs['clientes'])
+        vehiculos = self.generar_vehiculos(kwargs['vehiculos'], clientes)
+        servicios = self.generar_servicios(kwargs['servicios'])
+        self.generar_ordenes(kwargs['ordenes'], vehiculos, servicios)
+
+        # Las inserciones directas no emiten señales, así que se invalidan los listados cacheados.
+        for modelo in [Cliente, Vehiculo, Servicio]:
+            incrementar_version(modelo)
+
+        self.stdout.write(self.style.SUCCESS('Generación de datos de ejemplo completada.'))
+
+    def resetear(self):
+        """
+        Elimina todos los datos con DELETE directos sobre las tablas, sin pasar por el
+        recolector de borrado del ORM (que cargaría cada fila dependiente en memoria),
+        y resetea las secuencias de IDs.
+        """
+        self.stdout.write(self.style.SUCCESS('Eliminando datos existentes...'))
+        # Orden de borrado: primero las tablas que dependen de otras.
+        # El resumen del panel se vacía después de las órdenes (activas y archivadas), ya que sus triggers lo actualizan al borrarlas.
+        modelos = [OrdenServicio, OrdenReparacion, ArchivadaServicio, OrdenArchivada, ResumenOrdenes, Vehiculo, Servicio, Cliente]
+        with transaction.atomic(), connection.cursor() as cursor:
+            for model in modelos:
+                cursor.execute(f'DELETE FROM {connection.ops.quote_name(model._meta.db_table)}')
+        self.stdout.write(self.style.SUCCESS('Datos existentes eliminados.'))
+
+        self.stdout.write(self.style.SUCCESS('Reseteando secuencias de IDs...'))
+        with connection.cursor() as cursor:
+            for model in modelos:
+                cursor.execute("UPDATE SQLITE_SEQUENCE SET SEQ=0 WHERE NAME=%s;", [model._meta.db_table])
+        self.stdout.write(self.style.SUCCESS('Secuencias de IDs reseteadas.'))
+
+    def siguiente_numero(self, modelo):
+        """
+        Devuelve el número desde el cual numerar los nuevos registros de un modelo,
+        para que nombres y patentes no choquen con los existentes en modo 'append'.
+        Incluye las filas eliminadas pendientes de purga, que el manager predeterminado oculta,
+        y en las órdenes también las archivadas (ver NUMERACION_COMPARTIDA).
+        """
+        modelos = [modelo, *NUMERACION_COMPARTIDA.get(modelo, [])]
+        return max(m._base_manager.aggregate(maximo=Max('id'))['maximo'] or 0 for m in modelos) + 1
+
+    def insertar_por_lotes(self, modelo, campos, filas):
+        """
+        Inserta las filas producidas por el iterable 'filas' (tuplas con los valores de 'campos',
+        precedidos por el ID) en lotes de tamaño self.lote, con una transacción por lote.
+
+        Se usa un INSERT parametrizado con executemany en lugar de bulk_create: con millones
+        de filas el costo de crear una instancia de modelo por fila domina el tiempo total.
+        Los IDs se asignan de forma explícita y correlativa, por lo que se conocen de antemano
+        sin necesidad de leerlos de vuelta.
+        """
+        if 'modificado' not in campos and any(campo.name == 'modificado' for campo in modelo._meta.concrete_fields):
+            # La fecha de modificación (auto_now) se completa aquí, ya que el INSERT no pasa por save().
+            ahora = connection.ops.adapt_datetimefield_value(timezone.now())
+            campos = campos + ['modificado']
+            filas = (fila + (ahora,) for fila in filas)
+        quote = connection.ops.quote_name
+        columnas = ['id'] + [modelo._meta.get_field(campo).column for campo in campos]
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            quote(modelo._meta.db_table),
+            ', '.join(quote(columna) for columna in columnas),
+            ', '.join(['%s'] * len(columnas)),
+        )
+        lote = []
+        for fila in filas:
+            lote.append(fila)
+            if len(lote) >= self.lote:
+                self.insertar_lote(sql, lote)
+                lote = []
+        if lote:
+            self.insertar_lote(sql, lote)
+
+    def insertar_lote(self, sql, lote):
+        """
+        Inserta un lote de filas en una única transacción.
+        """
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(sql, lote)
+
+    def generar_clientes(self, cantidad):
+        """
+        Genera 'cantidad' clientes y devuelve el rango de sus IDs.
+        """
+        self.stdout.write(self.style.SUCCESS(f'Generando {cantidad} clientes...'))
+        inicio = self.siguiente_numero(Cliente)
+        rng = self.rng
+        filas = (
+            (
+                i,
+                f'Cliente{i}',
+                f'Apellido{i}',
+                f'9{rng.randint(10000000, 99999999)}',
+                f'cliente{i}@example.com' if i % 2 == 0 else None, # Email opcional
             )
-            clientes.append(cliente)
-            # Generar patente única para evitar conflictos en modo 'append'
-            unique_patente = f'PAT{random.randint(10000, 99999)}{i:02d}'
-            vehiculo = Vehiculo.objects.create(
-                patente=unique_patente,
-                marca=random.choice(['Toyota', 'Nissan', 'Ford', 'Chevrolet', 'BMW']),
-                modelo=random.choice(['Corolla', 'Versa', 'Focus', 'Cruze', 'X5']),
-                año=random.randint(2010, 2023),
-                cliente=cliente # Asocia el vehículo al cliente creado
+            for i in range(inicio, inicio + cantidad)
+        )
+        self.insertar_por_lotes(Cliente, ['nombre', 'apellido', 'telefono', 'email'], filas)
+        self.stdout.write(self.style.SUCCESS(f'{cantidad} clientes generados.'))
+        return range(inicio, inicio + cantidad)
+
+    def generar_vehiculos(self, cantidad, clientes):
+        """
+        Genera 'cantidad' vehículos asociados a clientes y devuelve la lista de sus IDs.
+        Si no se generaron clientes en esta ejecución, se usan los existentes.
+        """
+        self.stdout.write(self.style.SUCCESS(f'Generando {cantidad} vehículos...'))
+        if cantidad and not clientes:
+            clientes = list(Cliente.objects.values_list('id', flat=True))
+        if cantidad and not clientes:
+            self.stdout.write(self.style.WARNING('No hay clientes a los que asociar vehículos.'))
+            return []
+        inicio = self.siguiente_numero(Vehiculo)
+        rng = self.rng
+        marcas = ['Toyota', 'Nissan', 'Ford', 'Chevrolet', 'BMW']
+        modelos = ['Corolla', 'Versa', 'Focus', 'Cruze', 'X5']
+        # Los primeros vehículos se reparten uno por cliente; el resto, a clientes al azar.
+        filas = (
+            (
+                i,
+                f'PAT{i:07d}', # Patente única derivada del número correlativo
+                rng.choice(marcas),
+                rng.choice(modelos),
+                rng.randint(2010, 2023),
+                clientes[n] if n < len(clientes) else rng.choice(clientes),
             )
-            vehiculos.append(vehiculo)
-        self.stdout.write(self.style.SUCCESS('10 clientes y 10 vehículos generados.'))
+            for n, i in enumerate(range(inicio, inicio + cantidad))
+        )
+        self.insertar_por_lotes(Vehiculo, ['patente', 'marca', 'modelo', 'año', 'cliente'], filas)
+        self.stdout.write(self.style.SUCCESS(f'{cantidad} vehículos generados.'))
+        return range(inicio, inicio + cantidad)
 
-        self.stdout.write(self.style.SUCCESS('Generando 10 servicios...'))
-        servicios = []
+    def generar_servicios(self, cantidad):
+        """
+        Genera 'cantidad' servicios con nombres y precios predefinidos.
+        Devuelve una lista de tuplas (id, precio).
+        """
+        self.stdout.write(self.style.SUCCESS(f'Generando {cantidad} servicios...'))
         nombres_servicios = [
             'Cambio de Aceite', 'Revisión General', 'Cambio de Frenos', 'Alineación',
             'Balanceo', 'Cambio de Neumáticos', 'Diagnóstico Motor', 'Reparación Eléctrica',
             'Cambio de Batería', 'Lavado Detallado'
         ]
-        # Precios en pesos chilenos 
+        # Precios en pesos chilenos
         precios_servicios = [35000, 60000, 120000, 45000, 30000, 200000, 80000, 150000, 70000, 40000]
+        inicio = self.siguiente_numero(Servicio)
+        servicios = [
+            # Nombre único derivado del número correlativo
+            (i, f'{nombres_servicios[i % 10]} {i}', precios_servicios[i % 10])
+            for i in range(inicio, inicio + cantidad)
+        ]
+        self.insertar_por_lotes(Servicio, ['nombre', 'precio'], servicios)
+        self.stdout.write(self.style.SUCCESS(f'{cantidad} servicios generados.'))
+        return [(pk, precio) for pk, _, precio in servicios]
 
-        # Bucle para crear 10 servicios con nombres y precios predefinidos.
-        for i in range(10):
-            # Generar nombre de servicio único para evitar conflictos en modo 'append'
-            unique_service_name = f'{nombres_servicios[i]} {random.randint(1000, 9999)}'
-            servicio = Servicio.objects.create(
-                nombre=unique_service_name,
-                precio=precios_servicios[i]
-            )
-            servicios.append(servicio)
-        self.stdout.write(self.style.SUCCESS('10 servicios generados.'))
+    def generar_ordenes(self, cantidad, vehiculos, servicios):
+        """
+        Genera 'cantidad' órdenes de reparación con 1 a 3 servicios cada una.
+        El monto total se calcula al generar la orden, ya que se conocen los precios de los
+        servicios elegidos, y los enlaces orden-servicio se insertan sobre la tabla intermedia
+        en la misma transacción que su lote de órdenes.
+        """
+        self.stdout.write(self.style.SUCCESS(f'Generando {cantidad} órdenes de reparación...'))
+        if cantidad and not vehiculos:
+            vehiculos = list(Vehiculo.objects.values_list('id', flat=True))
+        if cantidad and not servicios:
+            servicios = list(Servicio.objects.values_list('id', 'precio'))
+        if cantidad and not (vehiculos and servicios):
+            self.stdout.write(self.style.WARNING('Se necesitan vehículos y servicios para generar órdenes.'))
+            return
 
-        self.stdout.write(self.style.SUCCESS('Generando 10 órdenes de reparación...'))
-        ordenes = []
+        rng = self.rng
         estados = ['ingresado', 'en_progreso', 'finalizado']
-        # Bucle para crear 10 órdenes de reparación.
-        for i in range(10):
-            vehiculo_elegido = random.choice(vehiculos) # Selecciona un vehículo al azar
-            fecha_ingreso = date(2025, 9, 1) + timedelta(days=i) # Fecha de ingreso incremental
-            estado_elegido = random.choice(estados) # Estado aleatorio
-            fecha_salida = None
-            if estado_elegido == 'finalizado':
-                fecha_salida = fecha_ingreso + timedelta(days=random.randint(1, 7)) # Fecha de salida si está finalizado
-
-            orden = OrdenReparacion.objects.create(
-                vehiculo=vehiculo_elegido,
-                fecha_ingreso=fecha_ingreso,
-                fecha_salida=fecha_salida,
-                estado=estado_elegido
-            )
-            servicios_asociados = random.sample(servicios, random.randint(1, 3)) # Asocia 1 a 3 servicios al azar
-            orden.servicios.set(servicios_asociados)
-            orden.calcular_monto_total() # Calcula el monto total de la orden
-            ordenes.append(orden)
-        self.stdout.write(self.style.SUCCESS('10 órdenes de reparación generadas.'))
-
-        self.stdout.write(self.style.SUCCESS('Generación de datos de ejemplo completada.'))
+        fecha_base = date(2020, 1, 1)
+        fechas = [fecha_base + timedelta(days=d) for d in range((date(2025, 9, 30) - fecha_base).days + 1)]
+        inicio = self.siguiente_numero(OrdenReparacion)
+        siguiente_enlace = self.siguiente_numero(OrdenServicio)
+        campos_orden = ['vehiculo', 'fecha_ingreso', 'fecha_salida', 'estado', 'monto_total']
+        campos_enlace = ['ordenreparacion', 'servicio']
+        generadas = 0
+        while generadas < cantidad:
+            ordenes = []
+            enlaces = []
+            for n in range(generadas, min(generadas + self.lote, cantidad)):
+                pk = inicio + n
+                # Las fechas avanzan con el número de orden (con algo de variación), como en un taller real
+                # donde las órdenes nuevas reciben IDs mayores; así los índices por fecha crecen por el final.
+                fecha_ingreso = fechas[min(len(fechas) - 1, n * len(fechas) // cantidad + rng.randint(0, 2))]
+                estado_elegido = rng.choice(estados) # Estado aleatorio
+                fecha_salida = None
+                if estado_elegido == 'finalizado':
+                    fecha_salida = fecha_ingreso + timedelta(days=rng.randint(1, 7)) # Fecha de salida si está finalizado
+                elegidos = rng.sample(servicios, min(rng.randint(1, 3), len(servicios))) # Asocia 1 a 3 servicios al azar
+                ordenes.append((
+                    pk,
+                    rng.choice(vehiculos), # Selecciona un vehículo al azar
+                    fecha_ingreso.isoformat(),
+                    fecha_salida.isoformat() if fecha_salida else None,
+                    estado_elegido,
+                    sum(precio for _, precio in elegidos),
+                ))
+                for servicio_id, _ in elegidos:
+                    enlaces.append((siguiente_enlace, pk, servicio_id))
+                    siguiente_enlace += 1
+            with transaction.atomic():
+                self.insertar_por_lotes(OrdenReparacion, campos_orden, ordenes)
+                self.insertar_por_lotes(OrdenServicio, campos_enlace, enlaces)
+            generadas += len(ordenes)
+            if cantidad > self.lote:
+                self.stdout.write(f'  {generadas}/{cantidad} órdenes...')
+        self.stdout.write(self.style.SUCCESS(f'{cantidad} órdenes de reparación generadas.'))
@@ -0,0 +1,85 @@
+# gestion/management/commands/import_clientes.py
+# Este archivo define el comando 'import_clientes', que importa clientes y vehículos desde un
+# archivo CSV por lotes (ver importacion.py) y escribe las filas rechazadas, con sus errores,
+# en un archivo CSV aparte para corregirlas y volver a importarlas. Si el archivo no se puede leer
+# a mitad (codificación o formato inválidos), informa la línea y lo que ya se importó.
+
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+from gestion.importacion import COLUMNAS_CLIENTE, COLUMNAS_VEHICULO, LOTE_IMPORTACION, ArchivoInvalido, importar_clientes, leer_csv
+
+class Command(BaseCommand):
+    """
+    Comando de Django para importar clientes y vehículos desde un CSV.
+    """
+    help = (
+        'Importa clientes y vehículos desde un CSV (columnas nombre, apellido, telefono, email, '
+        'patente, marca, modelo, año), validando con las reglas de los formularios e insertando por lotes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Archivo CSV a importar (codificación UTF-8).')
+        parser.add_argument('--lote', type=int, default=LOTE_IMPORTACION, help='Filas procesadas por transacción.')
+        parser.add_argument(
+            '--rechazos',
+            default='',
+            help='Archivo CSV donde se escriben las filas rechazadas (por defecto <archivo>.rechazos.csv).'
+        )
+        parser.add_argument('--simular', action='store_true', help='Valida el archivo sin guardar nada.')
+
+    def handle(self, *args, **options):
+        """
+        Lógica principal del comando.
+        """
+        if options['lote'] < 1:
+            raise CommandError('--lote debe ser mayor que cero.')
+        ruta_rechazos = options['rechazos'] or f"{options['archivo']}.rechazos.csv"
+
+        importado = {'filas': 0, 'clientes_creados': 0, 'vehiculos_creados': 0} # Hasta el último lote procesado
+
+        def progreso(resultado):
+            importado.update(resultado)
+            if options['verbosity'] > 1:
+                self.stdout.write(f"  {resultado['filas']} filas procesadas...")
+
+        try:
+            # 'utf-8-sig' acepta también los CSV guardados por Excel (con BOM)
+            with open(options['archivo'], encoding='utf-8-sig', newline='') as archivo, \
+                    open(ruta_rechazos, 'w', encoding='utf-8', newline='') as rechazos:
+                escritor = csv.writer(rechazos)
+                escritor.writerow(['fila', 'errores', *COLUMNAS_CLIENTE, *COLUMNAS_VEHICULO])
+
+                def rechazar(numero, fila, errores):
+                    columnas = [fila.get(columna) or '' for columna in COLUMNAS_CLIENTE + COLUMNAS_VEHICULO]
+                    escritor.writerow([numero, '; '.join(errores), *columnas])
+
+                lector = None
+                try:
+                    lector = leer_csv(archivo)
+                    resultado = importar_clientes(
+                        lector, options['lote'], simular=options['simular'], rechazar=rechazar, progreso=progreso,
+                    )
+                except (UnicodeDecodeError, csv.Error) as exc:
+                    if lector is None:
+                        linea = 'en la cabecera'
+                    elif isinstance(exc, csv.Error):
+                        linea = f'en la línea {lector.line_num}'
+                    else:
+                        # El texto se decodifica por bloques: el error está en una línea posterior
+                        linea = f'después de la línea {lector.line_num}'
+                    guardado = 'No se guardó nada (simulación).' if options['simular'] else (
+                        f"Ya se importaron las primeras {importado['filas']} filas: {importado['clientes_creados']} "
+                        f"clientes y {importado['vehiculos_creados']} vehículos creados."
+                    )
+                    raise CommandError(f'No se pudo leer el archivo {linea}: {exc}. {guardado}')
+        except (OSError, ArchivoInvalido) as exc:
+            raise CommandError(str(exc))
+
+        prefijo = 'Simulación: ' if options['simular'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefijo}{resultado['filas']} filas, {resultado['clientes_creados']} clientes creados, "
+            f"{resultado['clientes_existentes']} clientes existentes, {resultado['vehiculos_creados']} vehículos creados."
+        ))
+        if resultado['rechazadas']:
+            self.stdout.write(self.style.WARNING(f"{resultado['rechazadas']} filas rechazadas, escritas en {ruta_rechazos}."))
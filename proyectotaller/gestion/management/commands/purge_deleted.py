@@ -0,0 +1,41 @@
+# gestion/management/commands/purge_deleted.py
+# Este archivo define el comando 'purge_deleted', que borra por lotes los clientes y vehículos
+# marcados como eliminados y todas sus órdenes (ver eliminacion.py). Se puede programar
+# periódicamente (por ejemplo con cron) además de, o en lugar de, la purga en segundo plano.
+
+from django.core.management.base import BaseCommand, CommandError
+from gestion.eliminacion import purgar_eliminados
+from gestion.models import Cliente, Vehiculo
+
+class Command(BaseCommand):
+    """
+    Comando de Django para purgar los clientes y vehículos eliminados.
+    """
+    help = 'Borra por lotes, cada uno en una transacción, los clientes y vehículos eliminados y todas sus órdenes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=None, help='Filas borradas por transacción (por defecto PURGA_LOTE).')
+        parser.add_argument(
+            '--simular',
+            action='store_true',
+            help='Solo informa cuántos clientes y vehículos están pendientes de purga, sin borrar nada.'
+        )
+
+    def handle(self, *args, **options):
+        """
+        Lógica principal del comando.
+        """
+        if options['lote'] is not None and options['lote'] < 1:
+            raise CommandError('--lote debe ser mayor que cero.')
+        if options['simular']:
+            clientes = Cliente.todos.filter(eliminado_en__isnull=False).count()
+            vehiculos = Vehiculo.todos.filter(eliminado_en__isnull=False).count()
+            self.stdout.write(f'Pendientes de purga: {clientes} clientes y {vehiculos} vehículos.')
+            return
+
+        def progreso(paso, total):
+            self.stdout.write(f'  {paso}: {total} filas borradas...')
+
+        totales = purgar_eliminados(options['lote'], progreso=progreso if options['verbosity'] > 1 else None)
+        resumen = ', '.join(f'{paso}={total}' for paso, total in totales.items())
+        self.stdout.write(self.style.SUCCESS(f'Purga completada: {resumen}.'))
@@ -0,0 +1,19 @@
+# gestion/management/commands/rebuild_busqueda.py
+# Este archivo define el comando 'rebuild_busqueda', que reconstruye desde cero el índice
+# de búsqueda de texto completo (FTS5) de clientes y vehículos.
+
+from django.core.management.base import BaseCommand
+from gestion.busqueda import reconstruir_indice
+
+class Command(BaseCommand):
+    """
+    Comando de Django para reconstruir el índice de búsqueda.
+    """
+    help = 'Reconstruye el índice de búsqueda de texto completo de clientes y vehículos.'
+
+    def handle(self, *args, **options):
+        """
+        Lógica principal del comando.
+        """
+        entradas = reconstruir_indice()
+        self.stdout.write(self.style.SUCCESS(f'Índice de búsqueda reconstruido: {entradas} entradas.'))
@@ -0,0 +1,35 @@
+# gestion/management/commands/rebuild_kpis.py
+# Este archivo define el comando 'rebuild_kpis', que reconstruye desde cero la tabla
+# ResumenOrdenes usada por el panel de inicio, o solo verifica que coincida con las órdenes.
+
+from django.core.management.base import BaseCommand, CommandError
+from gestion.kpis import diferencias_resumen, reconstruir_resumen
+
+class Command(BaseCommand):
+    """
+    Comando de Django para reconstruir o verificar el resumen de órdenes del panel.
+    """
+    help = 'Reconstruye el resumen de órdenes (KPI del panel de inicio) a partir de la tabla de órdenes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verificar',
+            action='store_true',
+            help='Solo compara el resumen actual con uno calculado desde cero, sin modificarlo.'
+        )
+
+    def handle(self, *args, **options):
+        """
+        Lógica principal del comando.
+        """
+        if options['verificar']:
+            diferencias = diferencias_resumen()
+            for mes, estado, actual, esperado in diferencias:
+                self.stdout.write(self.style.WARNING(f'{mes} {estado}: actual={actual} esperado={esperado}'))
+            if diferencias:
+                raise CommandError(f'El resumen tiene {len(diferencias)} filas desincronizadas.')
+            self.stdout.write(self.style.SUCCESS('El resumen coincide con las órdenes.'))
+            return
+
+        filas = reconstruir_resumen()
+        self.stdout.write(self.style.SUCCESS(f'Resumen reconstruido: {filas} filas.'))
@@ -0,0 +1,55 @@
+# gestion/management/commands/recompute_totals.py
+# Este archivo define el comando 'recompute_totals', que revisa por lotes el monto total de las
+# órdenes de reparación, informa cuántas están desviadas de la suma de sus servicios y las corrige.
+
+from django.core.management.base import BaseCommand, CommandError
+from gestion.ordenes import LOTE_RECALCULO, recalcular_totales
+
+class Command(BaseCommand):
+    """
+    Comando de Django para recalcular los montos totales de las órdenes de reparación.
+    """
+    help = (
+        'Recalcula por lotes el monto total de las órdenes no finalizadas (o de todas, con '
+        '--incluir-finalizadas) a partir de los precios actuales de sus servicios, e informa el desvío.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=LOTE_RECALCULO, help='Órdenes revisadas por transacción.')
+        parser.add_argument(
+            '--incluir-finalizadas',
+            action='store_true',
+            help='También recalcula las órdenes finalizadas, que normalmente conservan su monto histórico.'
+        )
+        parser.add_argument(
+            '--verificar',
+            action='store_true',
+            help='Solo informa las órdenes con monto desviado, sin modificarlas.'
+        )
+
+    def handle(self, *args, **options):
+        """
+        Lógica principal del comando.
+        """
+        if options['lote'] < 1:
+            raise CommandError('--lote debe ser mayor que cero.')
+
+        def progreso(resultado):
+            self.stdout.write(f"  {resultado['revisadas']} órdenes revisadas, {resultado['con_desvio']} con desvío...")
+
+        resultado = recalcular_totales(
+            lote=options['lote'],
+            incluir_finalizadas=options['incluir_finalizadas'],
+            aplicar=not options['verificar'],
+            progreso=progreso if options['verbosity'] > 1 else None,
+        )
+        mensaje = (
+            f"Órdenes revisadas: {resultado['revisadas']}. Con monto desviado: {resultado['con_desvio']} "
+            f"(diferencia total ${resultado['desvio_total']:,.0f})."
+        )
+        if options['verificar']:
+            if resultado['con_desvio']:
+                raise CommandError(mensaje)
+            self.stdout.write(self.style.SUCCESS(mensaje))
+            return
+        self.stdout.write(self.style.SUCCESS(f"{mensaje} Montos corregidos."))
@@ -0,0 +1,119 @@
+# gestion/management/commands/run_tasks.py
+# Este archivo define el comando 'run_tasks', el proceso que ejecuta las tareas en segundo plano
+# encoladas en la base de datos (ver tareas.py). Cada hilo reclama una tarea pendiente, la
+# ejecuta y pasa a la siguiente; cuando la cola está vacía, espera '--intervalo' segundos.
+# Al arrancar y luego cada '--recuperar-cada' segundos devuelve a la cola las tareas que dejó
+# en curso un proceso que terminó sin completarlas (por ejemplo, un proceso web con TAREAS_EN_PROCESO).
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from gestion.models import Tarea
+from gestion.tareas import ejecutar_tarea, reclamar_tarea, recuperar_interrumpidas
+
+class Command(BaseCommand):
+    """
+    Comando de Django para ejecutar las tareas en segundo plano.
+    """
+    help = 'Ejecuta las tareas en segundo plano encoladas en la base de datos, con varios hilos y reintentos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hilos', type=int, default=4, help='Tareas que se ejecutan a la vez.')
+        parser.add_argument('--intervalo', type=float, default=1.0, help='Segundos de espera cuando no hay tareas pendientes.')
+        parser.add_argument(
+            '--recuperar-cada',
+            type=float,
+            default=60.0,
+            help='Segundos entre cada búsqueda de tareas interrumpidas por otro proceso.'
+        )
+        parser.add_argument(
+            '--una-vez',
+            action='store_true',
+            help='Ejecuta las tareas pendientes y termina, en lugar de esperar tareas nuevas.'
+        )
+
+    def handle(self, *args, **options):
+        """
+        Lógica principal del comando: recupera las tareas interrumpidas y lanza los hilos hasta
+        que se vacíe la cola (con --una-vez) o se detenga el proceso (Ctrl+C).
+        """
+        if options['hilos'] < 1:
+            raise CommandError('--hilos debe ser mayor que cero.')
+        self.detener = threading.Event()
+        self.intervalo = options['intervalo']
+        self.una_vez = options['una_vez']
+        self.salida = threading.Lock() # Evita que se mezclen las líneas escritas por distintos hilos
+        self.recuperacion = threading.Lock() # Solo un hilo busca tareas interrumpidas a la vez
+        self.recuperar_cada = options['recuperar_cada']
+        self.proxima_recuperacion = 0 # La primera búsqueda se hace al arrancar
+        self.recuperar()
+        try:
+            if options['hilos'] == 1:
+                self.trabajador() # Un solo hilo: se ejecuta en el hilo principal, con su conexión
+            else:
+                connection.close() # Cada hilo abre su propia conexión
+                with ThreadPoolExecutor(options['hilos'], thread_name_prefix='run_tasks') as hilos:
+                    trabajadores = [hilos.submit(self.trabajador_en_hilo) for _ in range(options['hilos'])]
+                    try:
+                        for trabajador in trabajadores:
+                            trabajador.result()
+                    except KeyboardInterrupt:
+                        self.detener.set()
+                        raise
+        except KeyboardInterrupt:
+            self.stdout.write('Detenido: las tareas en curso se terminaron.')
+            return
+        self.stdout.write(self.style.SUCCESS('Sin tareas pendientes.'))
+
+    def trabajador(self):
+        """
+        Bucle de cada hilo: reclama y ejecuta tareas hasta que se le pida detenerse.
+        """
+        while not self.detener.is_set():
+            tarea = reclamar_tarea()
+            if tarea is None:
+                if self.recuperar():
+                    continue # Hay tareas devueltas a la cola: se ejecutan sin esperar
+                if self.una_vez:
+                    return
+                self.detener.wait(self.intervalo)
+                continue
+            self.escribir(f'{tarea}: intento {tarea.intentos} de {tarea.max_intentos}...')
+            inicio = time.perf_counter()
+            estado = ejecutar_tarea(tarea)
+            duracion = time.perf_counter() - inicio
+            estilo = self.style.SUCCESS if estado == Tarea.COMPLETADA else self.style.ERROR
+            self.escribir(estilo(f'Tarea N°{tarea.pk} - {tarea.nombre}: {estado} en {duracion:.1f}s.'))
+
+    def recuperar(self):
+        """
+        Devuelve a la cola las tareas interrumpidas (ver recuperar_interrumpidas), como máximo una
+        vez cada '--recuperar-cada' segundos entre todos los hilos. Devuelve la cantidad recuperada.
+        """
+        with self.recuperacion:
+            if time.monotonic() < self.proxima_recuperacion:
+                return 0
+            self.proxima_recuperacion = time.monotonic() + self.recuperar_cada
+            recuperadas = recuperar_interrumpidas()
+        if recuperadas:
+            self.escribir(self.style.WARNING(f'{recuperadas} tareas interrumpidas devueltas a la cola.'))
+        return recuperadas
+
+    def trabajador_en_hilo(self):
+        """
+        Bucle de un hilo del conjunto; al terminar cierra la conexión del hilo.
+        """
+        try:
+            self.trabajador()
+        finally:
+            connection.close()
+
+    def escribir(self, linea):
+        """
+        Escribe una línea en la salida del comando desde cualquier hilo.
+        """
+        with self.salida:
+            self.stdout.write(linea)
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0003_alter_cliente_options_alter_ordenreparacion_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['apellido', 'nombre'], name='cliente_apellido_nombre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ordenreparacion',
+            index=models.Index(fields=['fecha_ingreso', 'id'], name='orden_fecha_ingreso_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ordenreparacion',
+            index=models.Index(fields=['estado', 'fecha_ingreso', 'id'], name='orden_estado_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ordenreparacion',
+            index=models.Index(condition=models.Q(('fecha_salida__isnull', True)), fields=['fecha_ingreso', 'id'], name='orden_abierta_idx'),
+        ),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:06
+
+from django.db import migrations, models
+
+# Triggers que mantienen gestion_resumenordenes al día con cada cambio en gestion_ordenreparacion.
+# Cada orden suma (o resta) su cantidad y monto en la fila de su mes de ingreso y estado.
+TRIGGERS = [
+    """
+    CREATE TRIGGER resumen_orden_insert AFTER INSERT ON gestion_ordenreparacion
+    BEGIN
+        INSERT INTO gestion_resumenordenes (mes, estado, cantidad, monto)
+        VALUES (strftime('%Y-%m', NEW.fecha_ingreso), NEW.estado, 1, NEW.monto_total)
+        ON CONFLICT (mes, estado) DO UPDATE SET
+            cantidad = cantidad + excluded.cantidad,
+            monto = monto + excluded.monto;
+    END
+    """,
+    """
+    CREATE TRIGGER resumen_orden_delete AFTER DELETE ON gestion_ordenreparacion
+    BEGIN
+        UPDATE gestion_resumenordenes
+        SET cantidad = cantidad - 1, monto = monto - OLD.monto_total
+        WHERE mes = strftime('%Y-%m', OLD.fecha_ingreso) AND estado = OLD.estado;
+    END
+    """,
+    """
+    CREATE TRIGGER resumen_orden_update AFTER UPDATE OF fecha_ingreso, estado, monto_total ON gestion_ordenreparacion
+    WHEN OLD.fecha_ingreso IS NOT NEW.fecha_ingreso
+        OR OLD.estado IS NOT NEW.estado
+        OR OLD.monto_total IS NOT NEW.monto_total
+    BEGIN
+        UPDATE gestion_resumenordenes
+        SET cantidad = cantidad - 1, monto = monto - OLD.monto_total
+        WHERE mes = strftime('%Y-%m', OLD.fecha_ingreso) AND estado = OLD.estado;
+        INSERT INTO gestion_resumenordenes (mes, estado, cantidad, monto)
+        VALUES (strftime('%Y-%m', NEW.fecha_ingreso), NEW.estado, 1, NEW.monto_total)
+        ON CONFLICT (mes, estado) DO UPDATE SET
+            cantidad = cantidad + excluded.cantidad,
+            monto = monto + excluded.monto;
+    END
+    """,
+]
+
+# Carga inicial del resumen a partir de las órdenes ya existentes.
+CARGA_INICIAL = """
+    INSERT INTO gestion_resumenordenes (mes, estado, cantidad, monto)
+    SELECT strftime('%Y-%m', fecha_ingreso), estado, COUNT(*), COALESCE(SUM(monto_total), 0)
+    FROM gestion_ordenreparacion
+    GROUP BY 1, 2
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0004_indices_consultas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenOrdenes',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.CharField(max_length=7, verbose_name='Mes')),
+                ('estado', models.CharField(choices=[('ingresado', 'Ingresado'), ('en_progreso', 'En Progreso'), ('finalizado', 'Finalizado')], max_length=20, verbose_name='Estado')),
+                ('cantidad', models.IntegerField(default=0, verbose_name='Cantidad')),
+                ('monto', models.DecimalField(decimal_places=0, default=0, max_digits=14, verbose_name='Monto')),
+            ],
+            options={
+                'verbose_name': 'Resumen de Órdenes',
+                'verbose_name_plural': 'Resúmenes de Órdenes',
+                'ordering': ['mes', 'estado'],
+                'constraints': [models.UniqueConstraint(fields=('mes', 'estado'), name='resumen_mes_estado_uniq')],
+            },
+        ),
+        migrations.RunSQL(
+            sql=TRIGGERS + [CARGA_INICIAL],
+            reverse_sql=[
+                'DROP TRIGGER IF EXISTS resumen_orden_insert',
+                'DROP TRIGGER IF EXISTS resumen_orden_delete',
+                'DROP TRIGGER IF EXISTS resumen_orden_update',
+            ],
+        ),
+    ]
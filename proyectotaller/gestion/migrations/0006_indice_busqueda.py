@@ -0,0 +1,98 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:17
+
+from django.db import migrations
+
+# Tabla virtual FTS5 con el texto buscable de clientes y vehículos.
+# El rowid identifica la fila de origen: 2 * id para clientes y 2 * id + 1 para vehículos,
+# de modo que los triggers actualizan o borran cada entrada por rowid sin recorrer el índice.
+# 'cliente_id' permite agrupar los resultados por cliente sin consultar las tablas de origen.
+CREAR_TABLA = """
+    CREATE VIRTUAL TABLE gestion_busqueda USING fts5(
+        texto,
+        cliente_id UNINDEXED,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3 4'
+    )
+"""
+
+TEXTO_CLIENTE = "{0}.nombre || ' ' || {0}.apellido || ' ' || {0}.telefono || ' ' || COALESCE({0}.email, '')"
+TEXTO_VEHICULO = "{0}.patente || ' ' || {0}.marca || ' ' || {0}.modelo"
+
+TRIGGERS = [
+    f"""
+    CREATE TRIGGER busqueda_cliente_insert AFTER INSERT ON gestion_cliente
+    BEGIN
+        INSERT INTO gestion_busqueda (rowid, texto, cliente_id)
+        VALUES (2 * NEW.id, {TEXTO_CLIENTE.format('NEW')}, NEW.id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER busqueda_cliente_update AFTER UPDATE OF nombre, apellido, telefono, email ON gestion_cliente
+    BEGIN
+        DELETE FROM gestion_busqueda WHERE rowid = 2 * OLD.id;
+        INSERT INTO gestion_busqueda (rowid, texto, cliente_id)
+        VALUES (2 * NEW.id, {TEXTO_CLIENTE.format('NEW')}, NEW.id);
+    END
+    """,
+    """
+    CREATE TRIGGER busqueda_cliente_delete AFTER DELETE ON gestion_cliente
+    BEGIN
+        DELETE FROM gestion_busqueda WHERE rowid = 2 * OLD.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER busqueda_vehiculo_insert AFTER INSERT ON gestion_vehiculo
+    BEGIN
+        INSERT INTO gestion_busqueda (rowid, texto, cliente_id)
+        VALUES (2 * NEW.id + 1, {TEXTO_VEHICULO.format('NEW')}, NEW.cliente_id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER busqueda_vehiculo_update AFTER UPDATE OF patente, marca, modelo, cliente_id ON gestion_vehiculo
+    BEGIN
+        DELETE FROM gestion_busqueda WHERE rowid = 2 * OLD.id + 1;
+        INSERT INTO gestion_busqueda (rowid, texto, cliente_id)
+        VALUES (2 * NEW.id + 1, {TEXTO_VEHICULO.format('NEW')}, NEW.cliente_id);
+    END
+    """,
+    """
+    CREATE TRIGGER busqueda_vehiculo_delete AFTER DELETE ON gestion_vehiculo
+    BEGIN
+        DELETE FROM gestion_busqueda WHERE rowid = 2 * OLD.id + 1;
+    END
+    """,
+]
+
+# Carga inicial del índice con los clientes y vehículos ya existentes.
+CARGA_INICIAL = [
+    f"""
+    INSERT INTO gestion_busqueda (rowid, texto, cliente_id)
+    SELECT 2 * c.id, {TEXTO_CLIENTE.format('c')}, c.id FROM gestion_cliente c
+    """,
+    f"""
+    INSERT INTO gestion_busqueda (rowid, texto, cliente_id)
+    SELECT 2 * v.id + 1, {TEXTO_VEHICULO.format('v')}, v.cliente_id FROM gestion_vehiculo v
+    """,
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0005_resumen_ordenes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=[CREAR_TABLA] + TRIGGERS + CARGA_INICIAL,
+            reverse_sql=[
+                'DROP TRIGGER IF EXISTS busqueda_cliente_insert',
+                'DROP TRIGGER IF EXISTS busqueda_cliente_update',
+                'DROP TRIGGER IF EXISTS busqueda_cliente_delete',
+                'DROP TRIGGER IF EXISTS busqueda_vehiculo_insert',
+                'DROP TRIGGER IF EXISTS busqueda_vehiculo_update',
+                'DROP TRIGGER IF EXISTS busqueda_vehiculo_delete',
+                'DROP TABLE IF EXISTS gestion_busqueda',
+            ],
+        ),
+    ]
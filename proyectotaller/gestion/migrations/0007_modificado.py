@@ -0,0 +1,57 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:27
+
+from django.db import migrations, models
+
+# Tablas que reciben la columna 'modificado'.
+TABLAS = ['gestion_cliente', 'gestion_vehiculo', 'gestion_servicio', 'gestion_ordenreparacion']
+
+# AddField de un campo NOT NULL hace que Django reconstruya la tabla en SQLite (crear, copiar,
+# borrar y renombrar), lo que elimina los triggers de las migraciones 0005 y 0006. Por eso la
+# columna se agrega con ALTER TABLE ... ADD COLUMN, que conserva la tabla y sus triggers, y luego
+# se rellena con la fecha actual. El estado de los modelos se actualiza con AddField.
+AGREGAR_COLUMNAS = [
+    sql
+    for tabla in TABLAS
+    for sql in (
+        f"ALTER TABLE {tabla} ADD COLUMN modificado datetime NOT NULL DEFAULT '1970-01-01 00:00:00'",
+        f"UPDATE {tabla} SET modificado = strftime('%Y-%m-%d %H:%M:%f', 'now')",
+    )
+]
+QUITAR_COLUMNAS = [f"ALTER TABLE {tabla} DROP COLUMN modificado" for tabla in TABLAS]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0006_indice_busqueda'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(sql=AGREGAR_COLUMNAS, reverse_sql=QUITAR_COLUMNAS),
+            ],
+            state_operations=[
+                migrations.AddField(
+                    model_name='cliente',
+                    name='modificado',
+                    field=models.DateTimeField(auto_now=True, verbose_name='Modificado'),
+                ),
+                migrations.AddField(
+                    model_name='ordenreparacion',
+                    name='modificado',
+                    field=models.DateTimeField(auto_now=True, verbose_name='Modificado'),
+                ),
+                migrations.AddField(
+                    model_name='servicio',
+                    name='modificado',
+                    field=models.DateTimeField(auto_now=True, verbose_name='Modificado'),
+                ),
+                migrations.AddField(
+                    model_name='vehiculo',
+                    name='modificado',
+                    field=models.DateTimeField(auto_now=True, verbose_name='Modificado'),
+                ),
+            ],
+        ),
+    ]
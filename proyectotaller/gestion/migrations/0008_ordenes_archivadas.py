@@ -0,0 +1,65 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Triggers que mantienen gestion_resumenordenes al día con la tabla de órdenes archivadas.
+# Archivar una orden la borra de gestion_ordenreparacion (el trigger de la migración 0005 la resta)
+# y la inserta aquí (este trigger la vuelve a sumar), así que el panel sigue contándola.
+TRIGGERS = [
+    """
+    CREATE TRIGGER resumen_archivada_insert AFTER INSERT ON gestion_ordenarchivada
+    BEGIN
+        INSERT INTO gestion_resumenordenes (mes, estado, cantidad, monto)
+        VALUES (strftime('%Y-%m', NEW.fecha_ingreso), NEW.estado, 1, NEW.monto_total)
+        ON CONFLICT (mes, estado) DO UPDATE SET
+            cantidad = cantidad + excluded.cantidad,
+            monto = monto + excluded.monto;
+    END
+    """,
+    """
+    CREATE TRIGGER resumen_archivada_delete AFTER DELETE ON gestion_ordenarchivada
+    BEGIN
+        UPDATE gestion_resumenordenes
+        SET cantidad = cantidad - 1, monto = monto - OLD.monto_total
+        WHERE mes = strftime('%Y-%m', OLD.fecha_ingreso) AND estado = OLD.estado;
+    END
+    """,
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0007_modificado'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrdenArchivada',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha_ingreso', models.DateField(verbose_name='Fecha de Ingreso')),
+                ('fecha_salida', models.DateField(blank=True, null=True, verbose_name='Fecha de Salida')),
+                ('estado', models.CharField(choices=[('ingresado', 'Ingresado'), ('en_progreso', 'En Progreso'), ('finalizado', 'Finalizado')], max_length=20, verbose_name='Estado')),
+                ('monto_total', models.DecimalField(decimal_places=0, default=0, max_digits=10, verbose_name='Monto Total')),
+                ('modificado', models.DateTimeField(verbose_name='Modificado')),
+                ('archivada_en', models.DateTimeField(verbose_name='Archivada en')),
+                ('servicios', models.ManyToManyField(related_name='ordenes_archivadas', to='gestion.servicio', verbose_name='Servicios')),
+                ('vehiculo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ordenes_archivadas', to='gestion.vehiculo', verbose_name='Vehículo')),
+            ],
+            options={
+                'verbose_name': 'Orden Archivada',
+                'verbose_name_plural': 'Órdenes Archivadas',
+                'ordering': ['-fecha_ingreso'],
+                'indexes': [models.Index(fields=['vehiculo', 'fecha_ingreso', 'id'], name='archivada_vehiculo_fecha_idx')],
+            },
+        ),
+        migrations.RunSQL(
+            sql=TRIGGERS,
+            reverse_sql=[
+                'DROP TRIGGER IF EXISTS resumen_archivada_insert',
+                'DROP TRIGGER IF EXISTS resumen_archivada_delete',
+            ],
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:34
+
+from django.db import migrations, models
+
+# Las columnas 'eliminado_en' son nulas y sin valor por defecto, así que en SQLite se agregan con
+# ALTER TABLE ADD COLUMN, sin reconstruir las tablas ni perder los triggers de búsqueda (0006).
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0008_ordenes_archivadas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cliente',
+            name='eliminado_en',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Eliminado en'),
+        ),
+        migrations.AddField(
+            model_name='vehiculo',
+            name='eliminado_en',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Eliminado en'),
+        ),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(condition=models.Q(('eliminado_en__isnull', False)), fields=['eliminado_en'], name='cliente_eliminado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehiculo',
+            index=models.Index(condition=models.Q(('eliminado_en__isnull', False)), fields=['eliminado_en'], name='vehiculo_eliminado_idx'),
+        ),
+    ]
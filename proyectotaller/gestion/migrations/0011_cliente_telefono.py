@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0010_tareas'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['telefono'], name='cliente_telefono_idx'),
+        ),
+    ]
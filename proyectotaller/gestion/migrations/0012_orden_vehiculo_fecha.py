@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0011_cliente_telefono'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ordenreparacion',
+            index=models.Index(fields=['vehiculo', 'fecha_ingreso', 'id'], name='orden_vehiculo_fecha_idx'),
+        ),
+    ]
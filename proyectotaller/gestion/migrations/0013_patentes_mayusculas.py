@@ -0,0 +1,40 @@
+# Las patentes se guardan en mayúsculas (ver VehiculoForm.clean_patente) para que la búsqueda por
+# prefijo del autocompletado, que usa el índice único de 'patente', encuentre todos los vehículos.
+# Esta migración pasa a mayúsculas las patentes ya guardadas con un solo UPDATE, que también
+# actualiza el índice de búsqueda mediante sus triggers (0006).
+
+from django.db import migrations
+from django.db.models import Count
+from django.db.models.functions import Upper
+from django.utils import timezone
+
+
+def patentes_en_mayusculas(apps, schema_editor):
+    """
+    Pasa a mayúsculas las patentes existentes, incluidas las de vehículos eliminados pendientes de purga.
+    Si dos patentes solo se diferencian en mayúsculas no se cambia nada y la migración falla,
+    para que se resuelva a mano cuál de los vehículos conservar.
+    """
+    Vehiculo = apps.get_model('gestion', 'Vehiculo')
+    repetidas = list(
+        Vehiculo.objects.annotate(mayusculas=Upper('patente'))
+        .values('mayusculas').annotate(cantidad=Count('pk')).filter(cantidad__gt=1)
+        .values_list('mayusculas', flat=True)
+    )
+    if repetidas:
+        raise RuntimeError(
+            "Estas patentes están guardadas más de una vez con distintas mayúsculas: "
+            f"{', '.join(sorted(repetidas))}. Cambie o elimine los vehículos repetidos y vuelva a migrar."
+        )
+    Vehiculo.objects.exclude(patente=Upper('patente')).update(patente=Upper('patente'), modificado=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0012_orden_vehiculo_fecha'),
+    ]
+
+    operations = [
+        migrations.RunPython(patentes_en_mayusculas, migrations.RunPython.noop),
+    ]
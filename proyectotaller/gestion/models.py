@@ -3,7 +3,20 @@
 # Cada clase de modelo representa una tabla en la base de datos y define
 # los campos y relaciones entre los datos.
 
-from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+class ActivosManager(models.Manager):
+    """
+    Manager predeterminado de Cliente y Vehiculo: excluye las filas marcadas como eliminadas
+    (ver eliminacion.py), de modo que listados, formularios, búsquedas y relaciones inversas
+    (cliente.vehiculos) no las muestran. Las filas eliminadas siguen accesibles con el manager 'todos'.
+    """
+    def get_queryset(self):
+        return super().get_queryset().filter(eliminado_en__isnull=True)
 
 # Modelo Cliente
 class Cliente(models.Model):
@@ -15,11 +28,24 @@ class Cliente(models.Model):
     apellido = models.CharField(max_length=100, verbose_name="Apellido") # Apellido del cliente
     telefono = models.CharField(max_length=15, verbose_name="Teléfono") # Número de teléfono del cliente
     email = models.EmailField(blank=True, null=True, verbose_name="Email") # Email del cliente (opcional)
+    modificado = models.DateTimeField(auto_now=True, verbose_name="Modificado") # Fecha y hora de la última modificación (ETag de la API)
+    eliminado_en = models.DateTimeField(blank=True, null=True, editable=False, verbose_name="Eliminado en") # Fecha de eliminación, pendiente de purga (ver eliminacion.py)
+
+    objects = ActivosManager() # Solo clientes no eliminados
+    todos = models.Manager() # Todos los clientes, incluidos los eliminados pendientes de purga
 
     class Meta:
         verbose_name = "Cliente"
         verbose_name_plural = "Clientes"
         ordering = ['apellido', 'nombre'] # Ordenar clientes por apellido y luego por nombre
+        indexes = [
+            # Permite listar clientes en el orden de 'ordering' sin ordenar toda la tabla
+            models.Index(fields=['apellido', 'nombre'], name='cliente_apellido_nombre_idx'),
+            # Búsqueda de clientes existentes por teléfono al importar (ver importacion.py)
+            models.Index(fields=['telefono'], name='cliente_telefono_idx'),
+            # Índice parcial con solo los clientes eliminados pendientes de purga
+            models.Index(fields=['eliminado_en'], condition=models.Q(eliminado_en__isnull=False), name='cliente_eliminado_idx'),
+        ]
 
     def __str__(self):
         """
@@ -43,11 +69,20 @@ class Vehiculo(models.Model):
         related_name='vehiculos',
         verbose_name="Cliente"
     ) # Relación uno a muchos con el modelo Cliente
+    modificado = models.DateTimeField(auto_now=True, verbose_name="Modificado") # Fecha y hora de la última modificación (ETag de la API)
+    eliminado_en = models.DateTimeField(blank=True, null=True, editable=False, verbose_name="Eliminado en") # Fecha de eliminación, pendiente de purga (ver eliminacion.py)
+
+    objects = ActivosManager() # Solo vehículos no eliminados
+    todos = models.Manager() # Todos los vehículos, incluidos los eliminados pendientes de purga
 
     class Meta:
         verbose_name = "Vehículo"
         verbose_name_plural = "Vehículos"
         ordering = ['patente'] # Ordenar vehículos por patente
+        indexes = [
+            # Índice parcial con solo los vehículos eliminados pendientes de purga
+            models.Index(fields=['eliminado_en'], condition=models.Q(eliminado_en__isnull=False), name='vehiculo_eliminado_idx'),
+        ]
 
     def __str__(self):
         """
@@ -63,6 +98,7 @@ class Servicio(models.Model):
     """
     nombre = models.CharField(max_length=100, unique=True, verbose_name="Nombre del Servicio") # Nombre único del servicio
     precio = models.DecimalField(max_digits=10, decimal_places=0, verbose_name="Precio") # Precio del servicio
+    modificado = models.DateTimeField(auto_now=True, verbose_name="Modificado") # Fecha y hora de la última modificación (ETag de la API)
 
     class Meta:
         verbose_name = "Servicio"
@@ -75,6 +111,75 @@ class Servicio(models.Model):
         """
         return f"{self.nombre} (${self.precio})"
 
+def monto_total_subconsulta():
+    """
+    Expresión SQL que calcula el monto total de cada orden (OuterRef('pk')) sumando
+    los precios de sus servicios directamente en la base de datos.
+    Devuelve 0 para órdenes sin servicios.
+    """
+    servicios_de_la_orden = (
+        OrdenReparacion.servicios.through.objects
+        .filter(ordenreparacion_id=OuterRef('pk'))
+        .values('ordenreparacion_id')
+        .annotate(total=Sum('servicio__precio'))
+        .values('total')
+    )
+    return Coalesce(
+        Subquery(servicios_de_la_orden),
+        Value(0),
+        output_field=DecimalField(max_digits=10, decimal_places=0),
+    )
+
+class OrdenReparacionQuerySet(models.QuerySet):
+    """
+    QuerySet personalizado para OrdenReparacion con operaciones en bloque.
+    """
+    def visibles(self):
+        """
+        Excluye las órdenes de vehículos eliminados (pendientes de purga, ver eliminacion.py).
+        Al eliminar un cliente se marcan también sus vehículos, así que basta con mirar el vehículo.
+        """
+        return self.filter(vehiculo__eliminado_en__isnull=True)
+
+    def abiertas(self):
+        """
+        Órdenes no finalizadas. Las finalizadas conservan el monto con el que se cerraron,
+        aunque después cambie el precio de sus servicios.
+        """
+        return self.exclude(estado='finalizado')
+
+    def con_desvio(self):
+        """
+        Órdenes cuyo 'monto_total' no coincide con la suma actual de los precios de sus servicios,
+        anotadas con el monto correcto en 'monto_calculado'.
+        """
+        return self.annotate(monto_calculado=monto_total_subconsulta()).exclude(monto_total=F('monto_calculado'))
+
+    def recalcular_montos(self):
+        """
+        Recalcula el monto total de todas las órdenes del queryset con un único UPDATE,
+        sin cargar las órdenes ni sus servicios en Python. Devuelve el número de filas actualizadas.
+        También actualiza la fecha de modificación, que update() no cambia por sí solo.
+        """
+        return self.update(monto_total=monto_total_subconsulta(), modificado=timezone.now())
+
+    def cambiar_estado(self, estado, fecha_salida=None):
+        """
+        Cambia al estado 'estado' todas las órdenes del queryset cuya transición esté permitida
+        (ver OrdenReparacion.TRANSICIONES), con un único UPDATE en una transacción.
+        Al finalizar, las órdenes sin fecha de salida reciben 'fecha_salida' (por defecto, hoy).
+        Las órdenes cuyo estado actual no permite el cambio se dejan igual.
+        Devuelve el número de órdenes actualizadas; lanza ValueError si el estado no existe.
+        """
+        if estado not in dict(OrdenReparacion.ESTADO_CHOICES):
+            raise ValueError(f"Estado desconocido: {estado}")
+        origenes = [origen for origen, destinos in OrdenReparacion.TRANSICIONES.items() if estado in destinos]
+        cambios = {'estado': estado, 'modificado': timezone.now()}
+        if estado == 'finalizado':
+            cambios['fecha_salida'] = Coalesce('fecha_salida', Value(fecha_salida or timezone.localdate()))
+        with transaction.atomic():
+            return self.filter(estado__in=origenes).update(**cambios)
+
 # Modelo OrdenReparacion
 class OrdenReparacion(models.Model):
     """
@@ -88,6 +193,12 @@ class OrdenReparacion(models.Model):
         ('en_progreso', 'En Progreso'),
         ('finalizado', 'Finalizado'),
     ]
+    # Transiciones permitidas: estado actual -> estados a los que puede pasar.
+    TRANSICIONES = {
+        'ingresado': ['en_progreso', 'finalizado'],
+        'en_progreso': ['finalizado'],
+        'finalizado': [],
+    }
 
     vehiculo = models.ForeignKey(
         Vehiculo,
@@ -114,23 +225,189 @@ class OrdenReparacion(models.Model):
         default=0,
         verbose_name="Monto Total"
     ) # Monto total calculado de la reparación
+    modificado = models.DateTimeField(auto_now=True, verbose_name="Modificado") # Fecha y hora de la última modificación (ETag de la API)
+
+    objects = OrdenReparacionQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Orden de Reparación"
         verbose_name_plural = "Órdenes de Reparación"
         ordering = ['-fecha_ingreso'] # Ordenar órdenes por fecha de ingreso descendente
+        indexes = [
+            # Orden del listado y de la paginación por cursor (-fecha_ingreso, -id)
+            models.Index(fields=['fecha_ingreso', 'id'], name='orden_fecha_ingreso_idx'),
+            # Filtro por estado manteniendo el orden por fecha de ingreso
+            models.Index(fields=['estado', 'fecha_ingreso', 'id'], name='orden_estado_fecha_idx'),
+            # Historial de un vehículo por fecha de ingreso (ver archivo.pagina_historial)
+            models.Index(fields=['vehiculo', 'fecha_ingreso', 'id'], name='orden_vehiculo_fecha_idx'),
+            # Índice parcial con solo las órdenes abiertas (sin fecha de salida)
+            models.Index(
+                fields=['fecha_ingreso', 'id'],
+                condition=models.Q(fecha_salida__isnull=True),
+                name='orden_abierta_idx',
+            ),
+        ]
 
     def calcular_monto_total(self):
         """
         Calcula el monto total de la orden sumando los precios de los servicios asociados.
-        Guarda el resultado en el campo 'monto_total'.
+        La suma se hace con un solo agregado SQL y solo se actualiza la columna 'monto_total',
+        sin volver a guardar el resto de la orden.
         """
-        total = sum(servicio.precio for servicio in self.servicios.all())
+        total = self.servicios.aggregate(total=Sum('precio'))['total'] or 0
+        ahora = timezone.now() # update() no aplica auto_now: la fecha de modificación se fija aquí
+        OrdenReparacion.objects.filter(pk=self.pk).update(monto_total=total, modificado=ahora)
         self.monto_total = total
-        self.save()
+        self.modificado = ahora
 
     def __str__(self):
         """
         Representación en cadena del objeto OrdenReparacion.
         """
         return f"Orden N°{self.id} - {self.vehiculo.patente} - {self.estado}"
+
+# Modelo OrdenArchivada
+class OrdenArchivada(models.Model):
+    """
+    Orden de reparación finalizada que se trasladó fuera de la tabla de órdenes activas
+    con 'manage.py archive_orders' (ver archivo.py).
+    Conserva el mismo ID y los mismos campos que la orden original, más la fecha de archivo,
+    y tiene su propia tabla de enlaces con los servicios. Es de solo lectura.
+    """
+    id = models.BigIntegerField(primary_key=True, verbose_name="ID") # Mismo ID que tenía la orden activa
+    vehiculo = models.ForeignKey(
+        Vehiculo,
+        on_delete=models.CASCADE,
+        related_name='ordenes_archivadas',
+        verbose_name="Vehículo"
+    ) # Relación uno a muchos con el modelo Vehiculo
+    servicios = models.ManyToManyField(
+        Servicio,
+        related_name='ordenes_archivadas',
+        verbose_name="Servicios"
+    ) # Relación muchos a muchos con el modelo Servicio (tabla de enlaces propia)
+    fecha_ingreso = models.DateField(verbose_name="Fecha de Ingreso") # Fecha en que el vehículo ingresó al taller
+    fecha_salida = models.DateField(blank=True, null=True, verbose_name="Fecha de Salida") # Fecha de salida del vehículo
+    estado = models.CharField(
+        max_length=20,
+        choices=OrdenReparacion.ESTADO_CHOICES,
+        verbose_name="Estado"
+    ) # Estado de la orden al archivarla (siempre 'finalizado')
+    monto_total = models.DecimalField(
+        max_digits=10,
+        decimal_places=0,
+        default=0,
+        verbose_name="Monto Total"
+    ) # Monto total de la reparación al archivarla
+    modificado = models.DateTimeField(verbose_name="Modificado") # Última modificación de la orden activa
+    archivada_en = models.DateTimeField(verbose_name="Archivada en") # Fecha y hora en que se archivó
+
+    class Meta:
+        verbose_name = "Orden Archivada"
+        verbose_name_plural = "Órdenes Archivadas"
+        ordering = ['-fecha_ingreso'] # Mismo orden que las órdenes activas
+        indexes = [
+            # Historial de un vehículo ordenado por fecha de ingreso
+            models.Index(fields=['vehiculo', 'fecha_ingreso', 'id'], name='archivada_vehiculo_fecha_idx'),
+        ]
+
+    def __str__(self):
+        """
+        Representación en cadena del objeto OrdenArchivada.
+        """
+        return f"Orden N°{self.id} (archivada) - {self.vehiculo.patente} - {self.estado}"
+
+# Modelo ResumenOrdenes
+class ResumenOrdenes(models.Model):
+    """
+    Resumen de órdenes de reparación por mes de ingreso y estado, usado por el panel de inicio.
+    Cada fila guarda la cantidad de órdenes y la suma de sus montos.
+
+    La tabla se mantiene de forma incremental mediante triggers de SQLite sobre la tabla de
+    órdenes (ver la migración 0005), de modo que cualquier alta, cambio de estado, cambio de
+    monto o borrado de una orden actualiza solo la fila afectada, incluso cuando el cambio se
+    hace con update(), bulk_create() o SQL directo. Las órdenes archivadas siguen contando:
+    la tabla de órdenes archivadas tiene sus propios triggers (migración 0008), así que
+    archivar una orden resta y vuelve a sumar la misma fila. Se puede reconstruir con
+    'manage.py rebuild_kpis'.
+    """
+    mes = models.CharField(max_length=7, verbose_name="Mes") # Mes de ingreso en formato 'AAAA-MM'
+    estado = models.CharField(
+        max_length=20,
+        choices=OrdenReparacion.ESTADO_CHOICES,
+        verbose_name="Estado"
+    ) # Estado de las órdenes resumidas
+    cantidad = models.IntegerField(default=0, verbose_name="Cantidad") # Cantidad de órdenes
+    monto = models.DecimalField(
+        max_digits=14,
+        decimal_places=0,
+        default=0,
+        verbose_name="Monto"
+    ) # Suma de 'monto_total' de las órdenes
+
+    class Meta:
+        verbose_name = "Resumen de Órdenes"
+        verbose_name_plural = "Resúmenes de Órdenes"
+        ordering = ['mes', 'estado'] # Ordenar por mes y estado
+        constraints = [
+            # Una fila por mes y estado; también es el destino del 'ON CONFLICT' de los triggers
+            models.UniqueConstraint(fields=['mes', 'estado'], name='resumen_mes_estado_uniq'),
+        ]
+
+    def __str__(self):
+        """
+        Representación en cadena del objeto ResumenOrdenes.
+        """
+        return f"{self.mes} - {self.estado}: {self.cantidad} órdenes (${self.monto})"
+
+# Modelo Tarea
+class Tarea(models.Model):
+    """
+    Tarea en segundo plano guardada en la base de datos (ver tareas.py).
+    Las vistas la encolan y responden de inmediato; la ejecuta después un hilo del propio proceso
+    o 'manage.py run_tasks'. Guarda los argumentos, el avance, los reintentos y el resultado o error.
+    """
+    PENDIENTE = 'pendiente'
+    EN_CURSO = 'en_curso'
+    COMPLETADA = 'completada'
+    FALLIDA = 'fallida'
+    ESTADO_CHOICES = [
+        (PENDIENTE, 'Pendiente'),
+        (EN_CURSO, 'En curso'),
+        (COMPLETADA, 'Completada'),
+        (FALLIDA, 'Fallida'),
+    ]
+
+    nombre = models.CharField(max_length=100, verbose_name="Nombre") # Nombre de la tarea registrada (ver tareas.TAREAS)
+    argumentos = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder, verbose_name="Argumentos") # Argumentos con nombre de la tarea
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default=PENDIENTE, verbose_name="Estado")
+    intentos = models.PositiveIntegerField(default=0, verbose_name="Intentos") # Ejecuciones iniciadas hasta ahora
+    max_intentos = models.PositiveIntegerField(default=3, verbose_name="Máximo de Intentos")
+    ejecutar_desde = models.DateTimeField(default=timezone.now, verbose_name="Ejecutar desde") # Se pospone al reintentar
+    progreso = models.PositiveIntegerField(default=0, verbose_name="Progreso") # Unidades de trabajo completadas
+    total = models.PositiveIntegerField(blank=True, null=True, verbose_name="Total") # Unidades de trabajo, si se conocen
+    mensaje = models.CharField(max_length=200, blank=True, verbose_name="Mensaje") # Descripción del avance
+    resultado = models.JSONField(blank=True, null=True, encoder=DjangoJSONEncoder, verbose_name="Resultado") # Valor devuelto por la tarea
+    error = models.TextField(blank=True, verbose_name="Error") # Traza del último error
+    creada = models.DateTimeField(auto_now_add=True, verbose_name="Creada")
+    iniciada = models.DateTimeField(blank=True, null=True, verbose_name="Iniciada") # Inicio del último intento
+    terminada = models.DateTimeField(blank=True, null=True, verbose_name="Terminada")
+
+    class Meta:
+        verbose_name = "Tarea"
+        verbose_name_plural = "Tareas"
+        ordering = ['-creada']
+        indexes = [
+            # Búsqueda de la próxima tarea a ejecutar: solo recorre las pendientes
+            models.Index(
+                fields=['ejecutar_desde', 'id'],
+                condition=models.Q(estado='pendiente'),
+                name='tarea_pendiente_idx',
+            ),
+        ]
+
+    def __str__(self):
+        """
+        Representación en cadena del objeto Tarea.
+        """
+        return f"Tarea N°{self.id} - {self.nombre} - {self.estado}"
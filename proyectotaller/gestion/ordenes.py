@@ -0,0 +1,93 @@
+# gestion/ordenes.py
+# Este archivo contiene la lógica de escritura de las órdenes de reparación.
+# Centraliza en un solo lugar cómo se guardan la orden, sus servicios y su monto total,
+# para que las vistas (y cualquier otro código) lo hagan de forma atómica y consistente.
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import transaction
+
+from .models import OrdenReparacion
+
+# Cantidad de órdenes revisadas por transacción al recalcular todos los montos.
+LOTE_RECALCULO = 1000
+
+# Indica si el recálculo automático del monto (ver signals.py) está suspendido en el contexto actual.
+_recalculo_diferido = ContextVar('recalculo_diferido', default=False)
+
+
+def recalculo_diferido():
+    """
+    Devuelve True si el recálculo automático de 'monto_total' está suspendido.
+    """
+    return _recalculo_diferido.get()
+
+
+@contextmanager
+def diferir_recalculo():
+    """
+    Suspende el recálculo automático de 'monto_total' mientras se modifican los servicios,
+    para que quien llama lo haga una sola vez al final.
+    """
+    token = _recalculo_diferido.set(True)
+    try:
+        yield
+    finally:
+        _recalculo_diferido.reset(token)
+
+
+def guardar_orden_reparacion(form):
+    """
+    Guarda una orden de reparación a partir de un OrdenReparacionForm válido.
+
+    Dentro de una única transacción se guarda la orden, se sincronizan sus servicios y
+    se recalcula 'monto_total' con un agregado SQL que actualiza solo esa columna.
+    Si algo falla, no queda ninguna parte de la orden escrita.
+    Devuelve la instancia de OrdenReparacion guardada.
+    """
+    with transaction.atomic():
+        orden = form.save(commit=False) # Prepara la instancia sin guardarla aún
+        orden.save() # Inserta o actualiza la fila de la orden
+        with diferir_recalculo():
+            form.save_m2m() # Sincroniza los servicios sin recalcular en cada add/remove
+        orden.calcular_monto_total() # Un solo agregado SQL y un UPDATE de 'monto_total'
+    return orden
+
+
+def repreciar_servicio(servicio):
+    """
+    Recalcula con un único UPDATE el monto total de las órdenes no finalizadas que incluyen
+    'servicio', después de un cambio de precio. Las órdenes finalizadas (y las archivadas)
+    conservan el monto con el que se cerraron. Devuelve el número de órdenes actualizadas.
+    """
+    return OrdenReparacion.objects.abiertas().filter(servicios=servicio).recalcular_montos()
+
+
+def recalcular_totales(lote=LOTE_RECALCULO, incluir_finalizadas=False, aplicar=True, progreso=None):
+    """
+    Revisa todas las órdenes (por defecto solo las no finalizadas) por lotes de IDs consecutivos y
+    corrige, con un UPDATE por lote en su propia transacción, las que tienen 'monto_total' desviado
+    de la suma de sus servicios. Con aplicar=False solo informa el desvío.
+    Si se indica, 'progreso' se llama después de cada lote con el resultado acumulado.
+    Devuelve un diccionario con las órdenes revisadas, las desviadas y la suma de las diferencias.
+    """
+    ordenes = OrdenReparacion.objects.all() if incluir_finalizadas else OrdenReparacion.objects.abiertas()
+    resultado = {'revisadas': 0, 'con_desvio': 0, 'desvio_total': 0}
+    ultimo = 0
+    while True:
+        with transaction.atomic():
+            ids = list(ordenes.filter(pk__gt=ultimo).order_by('pk').values_list('pk', flat=True)[:lote])
+            if not ids:
+                return resultado
+            desviadas = list(
+                OrdenReparacion.objects.filter(pk__in=ids).con_desvio().values_list('pk', 'monto_total', 'monto_calculado')
+            )
+            if desviadas and aplicar:
+                OrdenReparacion.objects.filter(pk__in=[pk for pk, _, _ in desviadas]).recalcular_montos()
+        ultimo = ids[-1]
+        resultado['revisadas'] += len(ids)
+        resultado['con_desvio'] += len(desviadas)
+        resultado['desvio_total'] += sum(calculado - monto for _, monto, calculado in desviadas)
+        if progreso:
+            progreso(resultado)
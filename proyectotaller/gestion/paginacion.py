@@ -0,0 +1,130 @@
+# gestion/paginacion.py
+# Este archivo implementa la paginación por cursor (keyset) usada por los listados grandes.
+# A diferencia de la paginación por OFFSET, cada página se obtiene filtrando a partir
+# de la última fila vista, por lo que el costo de una página no depende de su posición
+# ni del tamaño total de la tabla.
+
+from django.db.models import Q
+
+# Tamaño de página por defecto y máximo permitido desde la URL.
+TAMANO_PAGINA = 50
+TAMANO_PAGINA_MAXIMO = 200
+
+
+class CursorInvalido(ValueError):
+    """
+    Se lanza cuando un cursor recibido en la URL no puede decodificarse.
+    """
+
+
+class PaginaKeyset:
+    """
+    Resultado de una página obtenida por cursor.
+    Contiene los objetos de la página y los cursores para la página siguiente y anterior
+    (None cuando no existe una página en esa dirección).
+    """
+    def __init__(self, objetos, siguiente=None, anterior=None):
+        self.objetos = objetos
+        self.siguiente = siguiente
+        self.anterior = anterior
+
+    def __iter__(self):
+        return iter(self.objetos)
+
+    def __len__(self):
+        return len(self.objetos)
+
+    def __bool__(self):
+        return bool(self.objetos)
+
+
+def codificar_cursor(objeto, campo):
+    """
+    Genera el cursor de un objeto a partir del valor de `campo` y su clave primaria.
+    Por ejemplo, '2025-09-01_15' para una orden ingresada el 2025-09-01 con id 15.
+    """
+    valor = getattr(objeto, campo)
+    valor = valor.isoformat() if hasattr(valor, 'isoformat') else str(valor)
+    return f"{valor}_{objeto.pk}"
+
+
+def decodificar_cursor(modelo, campo, cursor):
+    """
+    Convierte un cursor en la tupla (valor, pk) usando el campo del modelo para validar el valor.
+    Lanza CursorInvalido si el cursor está mal formado.
+    """
+    valor, separador, pk = cursor.rpartition('_')
+    if not separador:
+        raise CursorInvalido(cursor)
+    try:
+        return modelo._meta.get_field(campo).to_python(valor), int(pk)
+    except Exception as exc:
+        raise CursorInvalido(cursor) from exc
+
+
+def leer_tamano_pagina(request, parametro='n'):
+    """
+    Obtiene el tamaño de página desde la URL, acotado entre 1 y TAMANO_PAGINA_MAXIMO.
+    """
+    try:
+        tamano = int(request.GET.get(parametro, TAMANO_PAGINA))
+    except (TypeError, ValueError):
+        tamano = TAMANO_PAGINA
+    return max(1, min(tamano, TAMANO_PAGINA_MAXIMO))
+
+
+def consulta_keyset(queryset, campo, despues=None, antes=None, tamano=TAMANO_PAGINA):
+    """
+    Devuelve el queryset (ya ordenado y limitado a `tamano + 1` filas) que obtiene una página.
+    Lanza CursorInvalido si alguno de los cursores está mal formado.
+    """
+    modelo = queryset.model
+    if antes:
+        # Hacia atrás: se recorre en orden ascendente y luego se invierte la página.
+        valor, pk = decodificar_cursor(modelo, campo, antes)
+        filtro = Q(**{f'{campo}__gt': valor}) | Q(**{campo: valor, 'pk__gt': pk})
+        return queryset.filter(filtro).order_by(campo, 'pk')[:tamano + 1]
+    if despues:
+        valor, pk = decodificar_cursor(modelo, campo, despues)
+        filtro = Q(**{f'{campo}__lt': valor}) | Q(**{campo: valor, 'pk__lt': pk})
+        queryset = queryset.filter(filtro)
+    return queryset.order_by(f'-{campo}', '-pk')[:tamano + 1]
+
+
+def armar_pagina(filas, campo, despues=None, antes=None, tamano=TAMANO_PAGINA):
+    """
+    Construye la PaginaKeyset a partir de las filas leídas con consulta_keyset.
+    """
+    hay_mas = len(filas) > tamano
+    if antes:
+        objetos = filas[:tamano][::-1]
+        siguiente = codificar_cursor(objetos[-1], campo) if objetos else None
+        anterior = codificar_cursor(objetos[0], campo) if objetos and hay_mas else None
+        return PaginaKeyset(objetos, siguiente, anterior)
+    objetos = filas[:tamano]
+    siguiente = codificar_cursor(objetos[-1], campo) if objetos and hay_mas else None
+    # Solo existe una página anterior si llegamos aquí avanzando desde otra página.
+    anterior = codificar_cursor(objetos[0], campo) if objetos and despues else None
+    return PaginaKeyset(objetos, siguiente, anterior)
+
+
+def paginar_keyset(queryset, campo, despues=None, antes=None, tamano=TAMANO_PAGINA):
+    """
+    Pagina un queryset en orden descendente por (`campo`, pk).
+
+    - `despues`: cursor de la última fila de la página anterior; devuelve las filas siguientes.
+    - `antes`: cursor de la primera fila de la página actual; devuelve las filas previas.
+
+    Solo se leen `tamano + 1` filas por página (la fila extra indica si hay más páginas),
+    por lo que la consulta aprovecha un índice sobre (`campo`, id) sin ordenar toda la tabla.
+    """
+    filas = list(consulta_keyset(queryset, campo, despues, antes, tamano))
+    return armar_pagina(filas, campo, despues, antes, tamano)
+
+
+async def apaginar_keyset(queryset, campo, despues=None, antes=None, tamano=TAMANO_PAGINA):
+    """
+    Versión asíncrona de paginar_keyset, para las vistas asíncronas (ver vistas_async.py).
+    """
+    filas = [objeto async for objeto in consulta_keyset(queryset, campo, despues, antes, tamano)]
+    return armar_pagina(filas, campo, despues, antes, tamano)
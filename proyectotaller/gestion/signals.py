@@ -0,0 +1,73 @@
+# gestion/signals.py
+# Este archivo define los receptores de señales de la aplicación 'gestion'.
+# Se registran en GestionConfig.ready() para que se conecten al iniciar Django.
+
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .cache import incrementar_version
+from .models import Cliente, Vehiculo, Servicio, OrdenReparacion
+from .ordenes import recalculo_diferido, repreciar_servicio
+
+
+@receiver(m2m_changed, sender=OrdenReparacion.servicios.through)
+def actualizar_monto_total(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Mantiene 'monto_total' sincronizado cuando cambian los servicios de una orden
+    mediante orden.servicios.set()/add()/remove()/clear(), o desde el lado del servicio
+    con servicio.ordenes_reparacion.add()/remove()/clear().
+    """
+    if recalculo_diferido():
+        return # Quien modifica los servicios recalculará el monto al terminar
+
+    if not reverse:
+        # Cambio desde la orden: se recalcula solo esa orden.
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            instance.calcular_monto_total()
+        return
+
+    # Cambio desde el servicio: 'instance' es el Servicio y 'pk_set' las órdenes afectadas.
+    if action == 'pre_clear':
+        # clear() no informa las órdenes afectadas, así que se guardan antes de borrar los enlaces.
+        instance._ordenes_afectadas = list(instance.ordenes_reparacion.values_list('pk', flat=True))
+    elif action in ('post_add', 'post_remove'):
+        OrdenReparacion.objects.filter(pk__in=pk_set).recalcular_montos()
+    elif action == 'post_clear':
+        ordenes = getattr(instance, '_ordenes_afectadas', [])
+        OrdenReparacion.objects.filter(pk__in=ordenes).recalcular_montos()
+
+
+@receiver(post_save, sender=Cliente)
+@receiver(post_save, sender=Vehiculo)
+@receiver(post_save, sender=Servicio)
+@receiver(post_delete, sender=Cliente)
+@receiver(post_delete, sender=Vehiculo)
+@receiver(post_delete, sender=Servicio)
+def invalidar_cache_listados(sender, **kwargs):
+    """
+    Incrementa la versión del modelo modificado para invalidar los listados cacheados que lo muestran
+    (ver cache.py). Los borrados en cascada también emiten post_delete por cada fila eliminada.
+    """
+    incrementar_version(sender)
+
+
+@receiver(pre_save, sender=Servicio)
+def recordar_precio_anterior(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Guarda en la instancia el precio que tiene el servicio en la base de datos antes de guardarlo,
+    para que repreciar_ordenes sepa si cambió.
+    """
+    if raw or instance.pk is None or (update_fields is not None and 'precio' not in update_fields):
+        return
+    instance._precio_anterior = Servicio.objects.filter(pk=instance.pk).values_list('precio', flat=True).first()
+
+
+@receiver(post_save, sender=Servicio)
+def repreciar_ordenes(sender, instance, created, **kwargs):
+    """
+    Si cambió el precio del servicio, recalcula el monto total de las órdenes no finalizadas
+    que lo incluyen con un único UPDATE (ver ordenes.repreciar_servicio).
+    """
+    precio_anterior = instance.__dict__.pop('_precio_anterior', None)
+    if not created and precio_anterior is not None and precio_anterior != instance.precio:
+        repreciar_servicio(instance)
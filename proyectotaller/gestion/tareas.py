@@ -0,0 +1,244 @@
+# gestion/tareas.py
+# Este archivo implementa una cola de tareas en segundo plano guardada en la propia base de datos
+# (modelo Tarea), para las operaciones lentas que no deben bloquear una solicitud: recálculo de
+# montos, archivo de órdenes, purga de eliminados, etc. No requiere un servidor de colas externo.
+#
+# - Las tareas se registran por nombre con el decorador @tarea.
+# - Las vistas las encolan con encolar(), que solo inserta una fila, y responden de inmediato.
+# - Las ejecuta 'manage.py run_tasks' (varios hilos, en un proceso aparte) y, si TAREAS_EN_PROCESO
+#   está activa, también un hilo del mismo proceso que las encoló, al confirmarse la transacción
+#   (y, para los reintentos, cuando vence su espera).
+# - Cada ejecución reclama la tarea con un UPDATE condicionado a su estado, así que una tarea
+#   nunca la ejecutan dos hilos o procesos a la vez.
+# - Si la tarea falla se reintenta, con una espera que se duplica en cada intento, hasta
+#   'max_intentos'; después queda como fallida con la traza del error.
+# - La tarea informa su avance llamando al objeto 'avance' que recibe como primer argumento.
+
+import logging
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Min
+from django.utils import timezone
+
+from .models import Tarea
+
+logger = logging.getLogger(__name__)
+
+# Tareas registradas: nombre -> (función, máximo de intentos).
+TAREAS = {}
+
+# Evita que dos hilos de ejecución en segundo plano se lancen a la vez en el mismo proceso.
+_ejecucion_en_curso = threading.Lock()
+# Indica que se encolaron tareas nuevas mientras el hilo en segundo plano estaba en curso.
+_tareas_nuevas = threading.Event()
+# Temporizador que llama a despertar() cuando toca el próximo reintento (ver _programar_reintento).
+_reintento = None
+
+
+def tarea(nombre, max_intentos=3):
+    """
+    Decorador que registra una función como tarea con el nombre indicado.
+    La función recibe el objeto 'avance' y los argumentos con nombre con que se encoló;
+    lo que devuelve (serializable a JSON) se guarda como resultado de la tarea.
+    """
+    def registrar(funcion):
+        TAREAS[nombre] = (funcion, max_intentos)
+        return funcion
+    return registrar
+
+
+class Avance:
+    """
+    Permite a una tarea en ejecución informar su avance, que se guarda en la fila de la tarea
+    con un UPDATE (lo muestra 'manage.py run_tasks' y la vista de estado de la tarea).
+    """
+    def __init__(self, tarea_id):
+        self.tarea_id = tarea_id
+
+    def __call__(self, progreso, total=None, mensaje=''):
+        Tarea.objects.filter(pk=self.tarea_id).update(progreso=progreso, total=total, mensaje=mensaje[:200])
+
+
+def encolar(nombre, unica=False, **argumentos):
+    """
+    Encola la tarea 'nombre' con los argumentos indicados y devuelve su fila (Tarea).
+    Con unica=True no se encola otra si ya hay una pendiente con el mismo nombre: sirve para
+    tareas que procesan todo lo que encuentran al ejecutarse, como la purga de eliminados.
+    La tarea se ejecuta después de confirmarse la transacción actual.
+    """
+    if nombre not in TAREAS:
+        raise ValueError(f"Tarea desconocida: {nombre}.")
+    pendiente = Tarea.objects.filter(nombre=nombre, estado=Tarea.PENDIENTE).first() if unica else None
+    nueva = pendiente or Tarea.objects.create(nombre=nombre, argumentos=argumentos, max_intentos=TAREAS[nombre][1])
+    if settings.TAREAS_EN_PROCESO:
+        transaction.on_commit(despertar)
+    return nueva
+
+
+def reclamar_tarea():
+    """
+    Marca como en curso la próxima tarea pendiente que ya se puede ejecutar y la devuelve,
+    o devuelve None si no hay ninguna. Si otro hilo o proceso reclama la misma tarea primero,
+    el UPDATE condicionado no cambia ninguna fila y se prueba con la siguiente.
+    """
+    ahora = timezone.now()
+    candidatas = list(
+        Tarea.objects
+        .filter(estado=Tarea.PENDIENTE, ejecutar_desde__lte=ahora, nombre__in=list(TAREAS))
+        .order_by('ejecutar_desde', 'id')
+        .values_list('pk', flat=True)[:10]
+    )
+    for pk in candidatas:
+        reclamada = Tarea.objects.filter(pk=pk, estado=Tarea.PENDIENTE).update(
+            estado=Tarea.EN_CURSO, intentos=F('intentos') + 1, iniciada=ahora, progreso=0, total=None, mensaje='',
+        )
+        if reclamada:
+            return Tarea.objects.get(pk=pk)
+    return None
+
+
+def ejecutar_tarea(tarea):
+    """
+    Ejecuta una tarea ya reclamada y guarda su resultado. Si falla y le quedan intentos,
+    vuelve a quedar pendiente después de TAREAS_ESPERA_REINTENTO segundos, el doble en cada intento;
+    si no, queda como fallida. Devuelve el estado final de la tarea.
+    """
+    funcion, _ = TAREAS[tarea.nombre]
+    try:
+        resultado = funcion(Avance(tarea.pk), **tarea.argumentos)
+    except Exception:
+        logger.exception('Error en la tarea %s (intento %s de %s)', tarea, tarea.intentos, tarea.max_intentos)
+        cambios = {'error': traceback.format_exc()}
+        if tarea.intentos < tarea.max_intentos:
+            espera = settings.TAREAS_ESPERA_REINTENTO * 2 ** (tarea.intentos - 1)
+            cambios.update(estado=Tarea.PENDIENTE, ejecutar_desde=timezone.now() + timedelta(seconds=espera))
+        else:
+            cambios.update(estado=Tarea.FALLIDA, terminada=timezone.now())
+    else:
+        cambios = {'estado': Tarea.COMPLETADA, 'resultado': resultado, 'error': '', 'terminada': timezone.now()}
+    Tarea.objects.filter(pk=tarea.pk).update(**cambios)
+    return cambios['estado']
+
+
+def procesar_pendientes():
+    """
+    Ejecuta, una tras otra, las tareas pendientes que ya se pueden ejecutar, hasta que no quede
+    ninguna. Devuelve la cantidad de tareas ejecutadas.
+    """
+    ejecutadas = 0
+    while tarea_actual := reclamar_tarea():
+        ejecutar_tarea(tarea_actual)
+        ejecutadas += 1
+    return ejecutadas
+
+
+def recuperar_interrumpidas():
+    """
+    Devuelve a la cola las tareas que llevan en curso más de TAREAS_TIEMPO_MAXIMO segundos,
+    porque el proceso que las ejecutaba terminó sin completarlas. Las que ya agotaron sus
+    intentos quedan como fallidas. Devuelve la cantidad de tareas recuperadas.
+    """
+    ahora = timezone.now()
+    interrumpidas = Tarea.objects.filter(
+        estado=Tarea.EN_CURSO, iniciada__lt=ahora - timedelta(seconds=settings.TAREAS_TIEMPO_MAXIMO)
+    )
+    fallidas = interrumpidas.filter(intentos__gte=F('max_intentos')).update(
+        estado=Tarea.FALLIDA, error='Interrumpida: el proceso que la ejecutaba terminó.', terminada=ahora,
+    )
+    return fallidas + interrumpidas.update(estado=Tarea.PENDIENTE, ejecutar_desde=ahora)
+
+
+def despertar():
+    """
+    Lanza un hilo en segundo plano que ejecuta las tareas pendientes, salvo que ya haya uno en
+    curso en el proceso; en ese caso ese hilo vuelve a revisar la cola al terminar.
+    """
+    _tareas_nuevas.set()
+    if _ejecucion_en_curso.acquire(blocking=False):
+        threading.Thread(target=_procesar_en_segundo_plano, name='tareas', daemon=True).start()
+
+
+def _procesar_en_segundo_plano():
+    """
+    Cuerpo del hilo lanzado por despertar().
+    """
+    try:
+        while True:
+            try:
+                while _tareas_nuevas.is_set():
+                    _tareas_nuevas.clear()
+                    procesar_pendientes()
+                _programar_reintento()
+            except Exception:
+                # Las tareas siguen en la base de datos; las retomará el próximo hilo o 'run_tasks'.
+                logger.exception('Error al procesar las tareas en segundo plano')
+            finally:
+                _ejecucion_en_curso.release()
+            # Un despertar() llegado entre la última revisión y la liberación del candado no pudo
+            # lanzar otro hilo: si lo hubo (y nadie tomó el candado entretanto), este hilo continúa.
+            if not (_tareas_nuevas.is_set() and _ejecucion_en_curso.acquire(blocking=False)):
+                break
+    finally:
+        connection.close() # El hilo no pertenece a ninguna solicitud: cierra su conexión
+
+
+def _programar_reintento():
+    """
+    Programa un despertar() para cuando se pueda ejecutar la próxima tarea pendiente pospuesta
+    (un reintento), para que el hilo del proceso la ejecute aunque no se encolen tareas nuevas.
+    Reemplaza al temporizador anterior. Se llama con _ejecucion_en_curso tomado.
+    """
+    global _reintento
+    proxima = (
+        Tarea.objects
+        .filter(estado=Tarea.PENDIENTE, nombre__in=list(TAREAS))
+        .aggregate(proxima=Min('ejecutar_desde'))['proxima']
+    )
+    if _reintento is not None:
+        _reintento.cancel()
+        _reintento = None
+    if proxima is not None:
+        _reintento = threading.Timer(max((proxima - timezone.now()).total_seconds(), 0), despertar)
+        _reintento.daemon = True # No impide que el proceso termine
+        _reintento.start()
+
+
+# --- Tareas de la aplicación ---
+# Se importan dentro de cada función porque esos módulos también encolan tareas.
+
+@tarea('purgar_eliminados')
+def purgar_eliminados(avance, lote=None):
+    """
+    Borra por lotes los clientes y vehículos eliminados y todas sus órdenes (ver eliminacion.py).
+    """
+    from .eliminacion import purgar_eliminados as purgar
+    return purgar(lote, progreso=lambda paso, total: avance(total, mensaje=f'{paso}: {total} filas borradas'))
+
+
+@tarea('recalcular_totales')
+def recalcular_totales(avance, incluir_finalizadas=False):
+    """
+    Corrige el monto total de las órdenes desviado de la suma de sus servicios (ver ordenes.py).
+    """
+    from .models import OrdenReparacion
+    from .ordenes import recalcular_totales as recalcular
+    ordenes = OrdenReparacion.objects.all() if incluir_finalizadas else OrdenReparacion.objects.abiertas()
+    total = ordenes.count()
+    return recalcular(
+        incluir_finalizadas=incluir_finalizadas,
+        progreso=lambda resultado: avance(resultado['revisadas'], total, f"{resultado['con_desvio']} órdenes corregidas"),
+    )
+
+
+@tarea('archivar_ordenes')
+def archivar_ordenes(avance, dias=365):
+    """
+    Archiva las órdenes finalizadas hace más de 'dias' días (ver archivo.py).
+    """
+    from .archivo import archivar_ordenes as archivar
+    limite = timezone.localdate() - timedelta(days=dias)
+    return {'archivadas': archivar(limite, progreso=lambda total: avance(total, mensaje=f'{total} órdenes archivadas'))}
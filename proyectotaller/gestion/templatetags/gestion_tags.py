@@ -0,0 +1,25 @@
+# gestion/templatetags/gestion_tags.py
+# Este archivo define etiquetas de plantilla propias de la aplicación 'gestion'.
+# Se cargan en las plantillas con {% load gestion_tags %}.
+
+from django import template
+
+register = template.Library()
+
+
+@register.simple_tag
+def version_fila(orden):
+    """
+    Devuelve la versión de la fila de una orden en el listado, para usarla como clave de
+    {% cache %}: cambia cuando se modifica la orden, su vehículo, su cliente o alguno de sus
+    servicios (todos guardan su fecha de modificación en 'modificado'), y también si cambia
+    el conjunto de servicios de la orden.
+    Solo lee datos ya cargados (select_related y prefetch_related), sin hacer consultas.
+    """
+    partes = [
+        orden.modificado.timestamp(),
+        orden.vehiculo.modificado.timestamp(),
+        orden.vehiculo.cliente.modificado.timestamp(),
+    ]
+    partes.extend(f'{servicio.pk}:{servicio.modificado.timestamp()}' for servicio in orden.servicios.all())
+    return '|'.join(str(parte) for parte in partes)
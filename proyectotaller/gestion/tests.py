@@ -3,9 +3,43 @@
 # Aquí se pueden escribir pruebas para los modelos, vistas, formularios, etc.,
 # para asegurar que el código funciona como se espera.
 
-from django.test import TestCase
-from .models import Cliente, Vehiculo, Servicio, OrdenReparacion
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.contrib.admin import helpers as admin_helpers
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection
+from django.db.models import Q
+from django.http import HttpResponse
+from django.template import engines
+from django.template.loaders.cached import Loader as CachedLoader
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+from .busqueda import LIMITE_RESULTADOS, buscar
+from .eliminacion import eliminar_cliente, eliminar_vehiculo, eliminar_vehiculos
+from .importacion import importar_clientes, leer_csv, validar_fila
+from .instrumentacion import InstrumentacionMiddleware
+from .kpis import diferencias_resumen, resumen_actual
+from .models import Cliente, Vehiculo, Servicio, OrdenReparacion, OrdenArchivada, ResumenOrdenes, Tarea
+from .tareas import TAREAS, _programar_reintento, despertar, encolar, procesar_pendientes, recuperar_interrumpidas, tarea
+from .templatetags.gestion_tags import version_fila
 from datetime import date, timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+import csv
+import gzip
+import importlib
+import json
+import os
+import sys
+import tempfile
+import threading
 
 class ClienteModelTest(TestCase):
     # Configuración inicial para las pruebas del modelo Cliente
@@ -192,3 +226,1490 @@ class OrdenReparacionModelTest(TestCase):
         # Intenta recuperar la orden eliminada y espera una excepción DoesNotExist
         with self.assertRaises(OrdenReparacion.DoesNotExist):
             OrdenReparacion.objects.get(id=orden_id)
+
+class OrdenReparacionListViewTest(TestCase):
+    # Configuración inicial para las pruebas del listado paginado de órdenes
+    def setUp(self):
+        self.cliente = Cliente.objects.create(nombre="Luis", apellido="Soto", telefono="555000111")
+        self.servicio = Servicio.objects.create(nombre="Alineación", precio=45000)
+
+    def crear_ordenes(self, cantidad):
+        # Crea 'cantidad' órdenes, cada una con su propio vehículo y un servicio
+        inicio = Vehiculo.objects.count()
+        for i in range(inicio, inicio + cantidad):
+            vehiculo = Vehiculo.objects.create(
+                patente=f"LST{i:04d}", marca="Ford", modelo="Focus", año=2018, cliente=self.cliente
+            )
+            orden = OrdenReparacion.objects.create(
+                vehiculo=vehiculo, fecha_ingreso=date(2025, 1, 1) + timedelta(days=i % 5)
+            )
+            orden.servicios.add(self.servicio)
+
+    def test_numero_de_consultas_constante(self):
+        """Verifica que una página usa el mismo número de consultas sin importar cuántas filas muestra."""
+        self.crear_ordenes(3)
+        with self.assertNumQueries(2):
+            self.client.get(reverse('orden_reparacion_list'))
+        self.crear_ordenes(20)
+        with self.assertNumQueries(2):
+            self.client.get(reverse('orden_reparacion_list'))
+
+    def test_recorrido_por_cursores(self):
+        """Verifica que los cursores recorren todas las órdenes en orden (-fecha_ingreso, -id) sin repetir."""
+        self.crear_ordenes(12)
+        esperadas = list(OrdenReparacion.objects.order_by('-fecha_ingreso', '-id').values_list('id', flat=True))
+        vistas = []
+        respuesta = self.client.get(reverse('orden_reparacion_list'), {'n': 5})
+        while True:
+            pagina = respuesta.context['pagina']
+            vistas.extend(orden.id for orden in pagina)
+            if not pagina.siguiente:
+                break
+            respuesta = self.client.get(reverse('orden_reparacion_list'), {'n': 5, 'despues': pagina.siguiente})
+        self.assertEqual(vistas, esperadas)
+        # Retrocede desde la última página y comprueba que se obtiene la página previa
+        previa = self.client.get(reverse('orden_reparacion_list'), {'n': 5, 'antes': pagina.anterior})
+        self.assertEqual([orden.id for orden in previa.context['pagina']], esperadas[5:10])
+
+    def test_cursor_invalido(self):
+        """Verifica que un cursor mal formado devuelve 404."""
+        respuesta = self.client.get(reverse('orden_reparacion_list'), {'despues': 'no-es-un-cursor'})
+        self.assertEqual(respuesta.status_code, 404)
+
+class MontoTotalOrdenTest(TestCase):
+    # Configuración inicial para las pruebas del cálculo del monto total
+    def setUp(self):
+        self.cliente = Cliente.objects.create(nombre="Marta", apellido="Rojas", telefono="555222333")
+        self.vehiculo = Vehiculo.objects.create(
+            patente="MNT001", marca="Kia", modelo="Rio", año=2019, cliente=self.cliente
+        )
+        self.aceite = Servicio.objects.create(nombre="Aceite", precio=35000)
+        self.frenos = Servicio.objects.create(nombre="Frenos", precio=120000)
+        self.orden = OrdenReparacion.objects.create(vehiculo=self.vehiculo, fecha_ingreso=date.today())
+
+    def monto_en_bd(self):
+        # Lee el monto directamente de la base de datos
+        return OrdenReparacion.objects.get(pk=self.orden.pk).monto_total
+
+    def test_monto_se_actualiza_con_set_add_remove(self):
+        """Verifica que el monto se mantiene al modificar servicios fuera de las vistas."""
+        self.orden.servicios.set([self.aceite, self.frenos])
+        self.assertEqual(self.monto_en_bd(), 155000)
+        self.orden.servicios.remove(self.frenos)
+        self.assertEqual(self.monto_en_bd(), 35000)
+        self.orden.servicios.clear()
+        self.assertEqual(self.monto_en_bd(), 0)
+
+    def test_monto_se_actualiza_desde_el_servicio(self):
+        """Verifica que el monto se mantiene al modificar la relación desde el lado del servicio."""
+        self.frenos.ordenes_reparacion.add(self.orden)
+        self.assertEqual(self.monto_en_bd(), 120000)
+        self.frenos.ordenes_reparacion.clear()
+        self.assertEqual(self.monto_en_bd(), 0)
+
+    def test_recalcular_montos_en_bloque(self):
+        """Verifica que recalcular_montos corrige montos desincronizados con un solo UPDATE."""
+        self.orden.servicios.set([self.aceite, self.frenos])
+        OrdenReparacion.objects.update(monto_total=1)
+        with self.assertNumQueries(1):
+            OrdenReparacion.objects.all().recalcular_montos()
+        self.assertEqual(self.monto_en_bd(), 155000)
+
+    def test_guardar_orden_desde_la_vista(self):
+        """Verifica que la vista de edición guarda servicios y monto total en la misma operación."""
+        respuesta = self.client.post(reverse('orden_reparacion_update', args=[self.orden.pk]), {
+            'vehiculo': self.vehiculo.pk,
+            'servicios': [self.aceite.pk, self.frenos.pk],
+            'fecha_ingreso': date.today().isoformat(),
+            'estado': 'en_progreso',
+        })
+        self.assertEqual(respuesta.status_code, 302)
+        self.assertEqual(self.monto_en_bd(), 155000)
+
+class GenerateDataCommandTest(TestCase):
+    # Pruebas del comando generate_data en modo de escala
+
+    def generar(self, **opciones):
+        # Ejecuta el comando en modo 'reset' sin mostrar su salida
+        call_command('generate_data', mode='reset', stdout=StringIO(), **opciones)
+
+    def test_cantidades_y_montos(self):
+        """Verifica las cantidades generadas y que cada monto coincide con la suma de sus servicios."""
+        self.generar(clientes=5, vehiculos=8, servicios=4, ordenes=30, lote=7, seed=3)
+        self.assertEqual(Cliente.objects.count(), 5)
+        self.assertEqual(Vehiculo.objects.count(), 8)
+        self.assertEqual(Servicio.objects.count(), 4)
+        self.assertEqual(OrdenReparacion.objects.count(), 30)
+        montos = dict(OrdenReparacion.objects.values_list('id', 'monto_total'))
+        OrdenReparacion.objects.all().recalcular_montos()
+        self.assertEqual(dict(OrdenReparacion.objects.values_list('id', 'monto_total')), montos)
+
+    def test_semilla_determinista(self):
+        """Verifica que la misma semilla produce exactamente los mismos datos."""
+        campos = ('id', 'vehiculo_id', 'fecha_ingreso', 'estado', 'monto_total')
+        self.generar(ordenes=20, seed=42)
+        primera = list(OrdenReparacion.objects.order_by('id').values_list(*campos))
+        self.generar(ordenes=20, seed=42)
+        segunda = list(OrdenReparacion.objects.order_by('id').values_list(*campos))
+        self.assertEqual(primera, segunda)
+
+    def test_modo_append(self):
+        """Verifica que el modo 'append' añade registros sin conflictos de unicidad."""
+        self.generar(seed=1)
+        call_command('generate_data', mode='append', seed=1, stdout=StringIO())
+        self.assertEqual(Vehiculo.objects.count(), 20)
+        self.assertEqual(OrdenReparacion.objects.count(), 20)
+
+    def test_modo_append_no_reutiliza_ids_archivados(self):
+        """Verifica que las órdenes agregadas no reutilizan los IDs de las órdenes archivadas."""
+        self.generar(seed=1)
+        ultima = OrdenReparacion.objects.order_by('-pk').first()
+        OrdenReparacion.objects.filter(pk=ultima.pk).update(
+            estado='finalizado', fecha_ingreso=date(2000, 1, 1), fecha_salida=date(2000, 1, 2),
+        )
+        call_command('archive_orders', older_than=365 * 20, stdout=StringIO()) # Solo las anteriores al año 2006
+        self.assertTrue(OrdenArchivada.objects.filter(pk=ultima.pk).exists())
+        call_command('generate_data', mode='append', seed=1, stdout=StringIO())
+        activas = set(OrdenReparacion.objects.values_list('pk', flat=True))
+        self.assertFalse(activas & set(OrdenArchivada.objects.values_list('pk', flat=True)))
+
+class InstrumentacionMiddlewareTest(TestCase):
+    # Pruebas del middleware de instrumentación por solicitud
+    def setUp(self):
+        self.cliente = Cliente.objects.create(nombre="Eva", apellido="Lagos", telefono="555444333")
+        for i in range(6):
+            Vehiculo.objects.create(patente=f"INS{i:03d}", marca="Fiat", modelo="Uno", año=2015, cliente=self.cliente)
+
+    def test_cabecera_server_timing(self):
+        """Verifica que la respuesta incluye la cabecera Server-Timing con consultas y tiempos."""
+        respuesta = self.client.get(reverse('servicio_list'))
+        cabecera = respuesta['Server-Timing']
+        self.assertIn('db;dur=', cabecera)
+        self.assertIn('desc="1 consultas"', cabecera)
+        self.assertIn('tpl;dur=', cabecera)
+        self.assertIn('total;dur=', cabecera)
+
+    def test_log_estructurado(self):
+        """Verifica que cada solicitud produce una línea de log con la vista y la cantidad de consultas."""
+        with self.assertLogs('gestion.instrumentacion', level='INFO') as registro:
+            self.client.get(reverse('servicio_list'))
+        self.assertIn('vista=servicio_list', registro.output[0])
+        self.assertIn('consultas=1', registro.output[0])
+        self.assertEqual(registro.records[0].instrumentacion['consultas'], 1)
+
+    @override_settings(INSTRUMENTACION_UMBRAL_DUPLICADAS=3)
+    def test_advertencia_consultas_duplicadas(self):
+        """Verifica que se advierte cuando una vista repite la misma consulta sobre el umbral."""
+        def vista_n_mas_1(request):
+            # Consulta el cliente de cada vehículo por separado (patrón N+1)
+            for vehiculo in Vehiculo.objects.all():
+                vehiculo.cliente.nombre
+            return HttpResponse('ok')
+
+        middleware = InstrumentacionMiddleware(vista_n_mas_1)
+        with self.assertLogs('gestion.instrumentacion', level='WARNING') as registro:
+            middleware(RequestFactory().get('/'))
+        self.assertTrue(any('posible N+1' in linea and 'consultas_duplicadas=6' in linea for linea in registro.output))
+
+class IndicesConsultasTest(TestCase):
+    # Verifica con EXPLAIN QUERY PLAN que las consultas habituales usan los índices
+
+    def plan(self, queryset):
+        # Devuelve las líneas del plan de ejecución de SQLite para el queryset
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            return [fila[-1] for fila in cursor.fetchall()]
+
+    def assertSinRecorridoNiOrdenamiento(self, queryset):
+        # Ningún paso puede recorrer la tabla completa sin índice ni ordenar en una tabla temporal
+        plan = self.plan(queryset)
+        for paso in plan:
+            self.assertNotIn('TEMP B-TREE', paso, plan)
+            if paso.startswith('SCAN'):
+                self.assertIn('INDEX', paso, plan)
+        return plan
+
+    def test_listado_de_clientes(self):
+        """El listado de clientes (apellido, nombre) usa el índice compuesto."""
+        plan = self.assertSinRecorridoNiOrdenamiento(Cliente.objects.all())
+        self.assertIn('cliente_apellido_nombre_idx', ' '.join(plan))
+
+    def test_listado_de_ordenes(self):
+        """El listado de órdenes y sus páginas por cursor usan el índice por fecha de ingreso."""
+        self.assertSinRecorridoNiOrdenamiento(OrdenReparacion.objects.all())
+        plan = self.assertSinRecorridoNiOrdenamiento(
+            OrdenReparacion.objects.filter(fecha_ingreso__lt=date.today()).order_by('-fecha_ingreso', '-pk')[:51]
+        )
+        self.assertIn('orden_fecha_ingreso_idx', ' '.join(plan))
+
+    def test_ordenes_por_estado(self):
+        """El filtro por estado (ver shell_tests.txt) busca por índice sin ordenar aparte."""
+        plan = self.assertSinRecorridoNiOrdenamiento(OrdenReparacion.objects.filter(estado='en_progreso'))
+        self.assertIn('orden_estado_fecha_idx', ' '.join(plan))
+
+    def test_ordenes_abiertas(self):
+        """El filtro de órdenes sin fecha de salida usa el índice parcial de órdenes abiertas."""
+        plan = self.assertSinRecorridoNiOrdenamiento(OrdenReparacion.objects.filter(fecha_salida__isnull=True))
+        self.assertIn('orden_abierta_idx', ' '.join(plan))
+
+    def test_historial_de_vehiculo(self):
+        """El historial de un vehículo (ver shell_tests.txt) y sus páginas por cursor usan el índice por vehículo y fecha."""
+        consulta = OrdenReparacion.objects.filter(vehiculo_id=1).filter(
+            Q(fecha_ingreso__lt=date.today()) | Q(fecha_ingreso=date.today(), pk__lt=10)
+        ).order_by('-fecha_ingreso', '-pk')[:51]
+        plan = self.assertSinRecorridoNiOrdenamiento(consulta)
+        self.assertIn('orden_vehiculo_fecha_idx', ' '.join(plan))
+
+class ResumenOrdenesTest(TestCase):
+    # Pruebas del resumen de órdenes mantenido por triggers y del panel de inicio
+    def setUp(self):
+        self.cliente = Cliente.objects.create(nombre="Ana", apellido="Mella", telefono="555777888")
+        self.vehiculo = Vehiculo.objects.create(
+            patente="KPI001", marca="Mazda", modelo="3", año=2021, cliente=self.cliente
+        )
+        self.servicio = Servicio.objects.create(nombre="Diagnóstico", precio=80000)
+
+    def crear_orden(self, fecha, estado='ingresado'):
+        # Crea una orden con un servicio para la fecha y estado indicados
+        orden = OrdenReparacion.objects.create(vehiculo=self.vehiculo, fecha_ingreso=fecha, estado=estado)
+        orden.servicios.add(self.servicio)
+        return orden
+
+    def test_resumen_incremental_coincide_con_recalculo(self):
+        """Verifica que el resumen sigue altas, cambios de estado, de monto y borrados."""
+        orden = self.crear_orden(date(2025, 8, 10))
+        self.crear_orden(date(2025, 9, 3), 'en_progreso')
+        otra = self.crear_orden(date(2025, 9, 4))
+        orden.estado = 'finalizado'
+        orden.save()
+        OrdenReparacion.objects.filter(pk=otra.pk).update(estado='en_progreso') # Cambio sin señales
+        otra.servicios.clear()
+        self.crear_orden(date(2025, 9, 5)).delete()
+        self.assertEqual(diferencias_resumen(), [])
+        self.assertEqual(resumen_actual(), {
+            ('2025-08', 'finalizado'): (1, 80000),
+            ('2025-09', 'en_progreso'): (2, 80000),
+        })
+
+    def test_reconstruir_resumen(self):
+        """Verifica que rebuild_kpis reconstruye un resumen alterado."""
+        self.crear_orden(date(2025, 9, 1))
+        ResumenOrdenes.objects.update(cantidad=99)
+        self.assertNotEqual(diferencias_resumen(), [])
+        call_command('rebuild_kpis', stdout=StringIO())
+        call_command('rebuild_kpis', verificar=True, stdout=StringIO())
+        self.assertEqual(diferencias_resumen(), [])
+
+    def test_panel_en_una_consulta(self):
+        """Verifica que el panel de inicio usa una sola consulta sin importar el historial."""
+        for dia in range(1, 21):
+            self.crear_orden(date(2025, 9, dia), 'finalizado' if dia % 2 else 'ingresado')
+        with self.assertNumQueries(1):
+            respuesta = self.client.get(reverse('home'))
+        kpis = respuesta.context['kpis']
+        self.assertEqual(kpis['pendientes'], 10)
+        self.assertEqual(kpis['por_mes'][0]['facturado'], 10 * 80000)
+
+@override_settings(CACHE_LISTADOS_ACTIVA=True)
+class CacheListadosTest(TestCase):
+    # Pruebas de la caché de listados invalidada por versiones de modelo
+    def setUp(self):
+        cache.clear()
+        self.servicio = Servicio.objects.create(nombre="Balanceo", precio=30000)
+
+    def test_acierto_no_consulta_la_base_de_datos(self):
+        """Verifica que la segunda visita al listado se sirve desde la caché sin consultas."""
+        primera = self.client.get(reverse('servicio_list'))
+        with self.assertNumQueries(0):
+            segunda = self.client.get(reverse('servicio_list'))
+        self.assertEqual(primera.content, segunda.content)
+
+    def test_cambios_invalidan_la_cache(self):
+        """Verifica que crear, editar o eliminar un registro invalida el listado cacheado."""
+        self.client.get(reverse('servicio_list'))
+        Servicio.objects.create(nombre="Lavado", precio=15000)
+        self.assertContains(self.client.get(reverse('servicio_list')), "Lavado")
+        self.servicio.nombre = "Balanceo Premium"
+        self.servicio.save()
+        self.assertContains(self.client.get(reverse('servicio_list')), "Balanceo Premium")
+        self.servicio.delete()
+        self.assertNotContains(self.client.get(reverse('servicio_list')), "Balanceo Premium")
+
+    def test_vehiculos_se_invalidan_al_cambiar_el_cliente(self):
+        """Verifica que el listado de vehículos se invalida cuando cambia el nombre de un cliente."""
+        cliente = Cliente.objects.create(nombre="Rosa", apellido="Vera", telefono="555999000")
+        Vehiculo.objects.create(patente="CCH001", marca="Seat", modelo="Ibiza", año=2017, cliente=cliente)
+        self.client.get(reverse('vehiculo_list'))
+        cliente.apellido = "Vergara"
+        cliente.save()
+        self.assertContains(self.client.get(reverse('vehiculo_list')), "Vergara")
+
+    def test_contadores_en_metricas(self):
+        """Verifica que los aciertos y fallos se publican en la vista de métricas."""
+        self.client.get(reverse('cliente_list'))
+        self.client.get(reverse('cliente_list'))
+        self.client.get(reverse('cliente_list'))
+        respuesta = self.client.get(reverse('metricas'))
+        self.assertContains(respuesta, 'gestion_cache_aciertos_total{vista="cliente_list"} 2')
+        self.assertContains(respuesta, 'gestion_cache_fallos_total{vista="cliente_list"} 1')
+
+    @override_settings(CACHE_LISTADOS_ACTIVA=False)
+    def test_cache_desactivada(self):
+        """Verifica que sin activar la opción cada visita consulta la base de datos."""
+        self.client.get(reverse('servicio_list'))
+        with self.assertNumQueries(1):
+            self.client.get(reverse('servicio_list'))
+
+class AutocompletarTest(TestCase):
+    # Pruebas de los endpoints de autocompletado y del formulario de órdenes
+    def setUp(self):
+        self.cliente = Cliente.objects.create(nombre="Iván", apellido="Paz", telefono="555121212")
+        for patente in ["ABCD10", "ABCD11", "ABZZ99", "XYZW01"]:
+            Vehiculo.objects.create(patente=patente, marca="Suzuki", modelo="Swift", año=2020, cliente=self.cliente)
+        self.aceite = Servicio.objects.create(nombre="Cambio de Aceite", precio=35000)
+        Servicio.objects.create(nombre="Cambio de Frenos", precio=120000)
+        Servicio.objects.create(nombre="Alineación", precio=45000)
+
+    def test_vehiculos_por_prefijo_de_patente(self):
+        """Verifica que se devuelven solo las patentes con el prefijo buscado, sin importar mayúsculas."""
+        respuesta = self.client.get(reverse('autocompletar_vehiculos'), {'q': 'abc'})
+        textos = [r['texto'] for r in respuesta.json()['resultados']]
+        self.assertEqual(textos, ["Suzuki Swift (ABCD10)", "Suzuki Swift (ABCD11)"])
+
+    def test_patentes_en_minusculas_se_guardan_en_mayusculas(self):
+        """Verifica que una patente escrita en minúsculas se guarda en mayúsculas y aparece en el autocompletado."""
+        self.client.post(reverse('vehiculo_create'), {
+            'patente': 'abcd12', 'marca': 'Kia', 'modelo': 'Rio', 'año': 2019, 'cliente': self.cliente.pk,
+        })
+        self.assertTrue(Vehiculo.objects.filter(patente='ABCD12').exists())
+        cliente, vehiculo, errores = validar_fila({
+            'nombre': 'Iván', 'apellido': 'Paz', 'telefono': '555121212', 'patente': 'abcd13', 'marca': 'Kia', 'modelo': 'Rio', 'año': '2019',
+        })
+        self.assertEqual((vehiculo.patente, errores), ('ABCD13', {}))
+        respuesta = self.client.get(reverse('autocompletar_vehiculos'), {'q': 'abcd1'})
+        textos = [r['texto'] for r in respuesta.json()['resultados']]
+        self.assertEqual(textos, ["Suzuki Swift (ABCD10)", "Suzuki Swift (ABCD11)", "Kia Rio (ABCD12)"])
+
+    def test_migracion_pasa_patentes_a_mayusculas(self):
+        """Verifica que la migración 0013 pasa a mayúsculas las patentes guardadas antes en minúsculas."""
+        migracion = importlib.import_module('gestion.migrations.0013_patentes_mayusculas')
+        Vehiculo.objects.filter(patente='ABCD10').update(patente='abcd10')
+        migracion.patentes_en_mayusculas(django_apps, None)
+        self.assertTrue(Vehiculo.objects.filter(patente='ABCD10').exists())
+        # Dos patentes que solo se diferencian en mayúsculas: no se cambia nada
+        Vehiculo.objects.filter(patente='ABCD11').update(patente='abcd10')
+        with self.assertRaisesMessage(RuntimeError, 'ABCD10'):
+            migracion.patentes_en_mayusculas(django_apps, None)
+        self.assertTrue(Vehiculo.objects.filter(patente='abcd10').exists())
+
+    def test_servicios_por_prefijo_de_nombre(self):
+        """Verifica que los servicios se buscan por prefijo del nombre."""
+        respuesta = self.client.get(reverse('autocompletar_servicios'), {'q': 'cambio'})
+        self.assertEqual(len(respuesta.json()['resultados']), 2)
+
+    def test_busqueda_por_prefijo_usa_indice(self):
+        """Verifica con EXPLAIN QUERY PLAN que la búsqueda por prefijo usa el índice de patente."""
+        sql, params = Vehiculo.objects.filter(patente__gte='AB', patente__lt='AB\uffff').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            plan = ' '.join(fila[-1] for fila in cursor.fetchall())
+        self.assertIn('SEARCH gestion_vehiculo USING INDEX', plan)
+
+    def test_formulario_solo_renderiza_lo_seleccionado(self):
+        """Verifica que el formulario de órdenes no renderiza todos los vehículos y servicios."""
+        vehiculo = Vehiculo.objects.get(patente="XYZW01")
+        orden = OrdenReparacion.objects.create(vehiculo=vehiculo, fecha_ingreso=date.today())
+        orden.servicios.add(self.aceite)
+        respuesta = self.client.get(reverse('orden_reparacion_update', args=[orden.pk]))
+        self.assertContains(respuesta, "XYZW01")
+        self.assertContains(respuesta, "Cambio de Aceite")
+        self.assertNotContains(respuesta, "ABCD10")
+        self.assertNotContains(respuesta, "Cambio de Frenos")
+        self.assertContains(respuesta, 'data-autocompletar-url="/gestion/autocompletar/vehiculos/"')
+
+class BusquedaTest(TestCase):
+    # Pruebas de la búsqueda de texto completo de clientes y vehículos
+    def setUp(self):
+        self.juan = Cliente.objects.create(nombre="Juan", apellido="Pérez", telefono="912345678", email="juan@correo.cl")
+        self.maria = Cliente.objects.create(nombre="María", apellido="Juárez", telefono="987654321")
+        self.auto = Vehiculo.objects.create(patente="JKLM12", marca="Peugeot", modelo="208", año=2022, cliente=self.maria)
+
+    def ids(self, texto):
+        # Devuelve los IDs de los clientes encontrados, en orden de relevancia
+        return [cliente.id for cliente, _ in buscar(texto)]
+
+    def test_busca_por_nombre_telefono_email_y_patente(self):
+        """Verifica la búsqueda por prefijo de nombre, teléfono, email y patente, sin tildes."""
+        self.assertEqual(self.ids("juan"), [self.juan.id])
+        self.assertEqual(self.ids("perez"), [self.juan.id])
+        self.assertEqual(self.ids("91234"), [self.juan.id])
+        self.assertEqual(self.ids("juan@correo"), [self.juan.id])
+        self.assertEqual(self.ids("jklm"), [self.maria.id])
+        self.assertEqual(buscar("jklm")[0][1], {self.auto.id})
+
+    def test_indice_se_mantiene_sincronizado(self):
+        """Verifica que los cambios y borrados se reflejan en el índice."""
+        self.auto.patente = "ZZTT99"
+        self.auto.cliente = self.juan
+        self.auto.save()
+        self.assertEqual(self.ids("jklm"), [])
+        self.assertEqual(self.ids("zztt"), [self.juan.id])
+        self.juan.delete()
+        self.assertEqual(self.ids("zztt"), [])
+        self.assertEqual(self.ids("juan"), [])
+
+    def test_vista_en_consultas_acotadas(self):
+        """Verifica que la vista usa tres consultas sin importar cuántos vehículos haya."""
+        for i in range(5):
+            Vehiculo.objects.create(patente=f"JKLZ{i:02d}", marca="Kia", modelo="Soul", año=2019, cliente=self.maria)
+        with self.assertNumQueries(3):
+            respuesta = self.client.get(reverse('buscar'), {'q': 'jkl'})
+        self.assertContains(respuesta, "JKLZ04")
+
+    def test_reconstruir_indice(self):
+        """Verifica que rebuild_busqueda reconstruye el índice completo."""
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM gestion_busqueda')
+        self.assertEqual(self.ids("juan"), [])
+        call_command('rebuild_busqueda', stdout=StringIO())
+        self.assertEqual(self.ids("juan"), [self.juan.id])
+
+    def test_eliminados_no_ocupan_el_limite(self):
+        """Verifica que los clientes y vehículos eliminados se descartan antes de aplicar los límites."""
+        for i in range(LIMITE_RESULTADOS + 5):
+            oculto = Cliente.objects.create(nombre="Juan", apellido="Juan", telefono=f"91000{i:04d}", email="juan@juan.cl")
+            Vehiculo.objects.create(patente=f"JKLM{i:02d}X", marca="Kia", modelo="Rio", año=2019, cliente=self.juan)
+            eliminar_cliente(oculto)
+        eliminar_vehiculos(Vehiculo.objects.filter(patente__endswith='X'))
+        self.assertEqual(self.ids("juan"), [self.juan.id])
+        self.assertEqual(buscar("jklm"), [(self.maria, {self.auto.id})])
+
+    def test_texto_con_caracteres_especiales(self):
+        """Verifica que comillas y operadores de FTS5 en el texto no producen errores."""
+        self.assertEqual(self.ids('"juan" OR *'), [])
+        self.assertEqual(self.ids('---'), [])
+
+class ConexionSQLiteTest(TestCase):
+    # Pruebas de la configuración de las conexiones SQLite (settings.py)
+    def pragma(self, nombre):
+        # Devuelve el valor actual de un PRAGMA en la conexión de las pruebas
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {nombre}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_aplicados_al_conectar(self):
+        """Verifica que cada conexión nueva aplica los PRAGMAs configurados."""
+        pragmas = settings.SQLITE_PRAGMAS
+        self.assertEqual(self.pragma('synchronous'), 1) # NORMAL
+        self.assertEqual(self.pragma('busy_timeout'), pragmas['busy_timeout'])
+        self.assertEqual(self.pragma('cache_size'), pragmas['cache_size'])
+        self.assertEqual(self.pragma('temp_store'), 2) # MEMORY
+
+    def test_transacciones_inmediatas_y_conexiones_persistentes(self):
+        """Verifica el modo de transacción y la reutilización de conexiones con comprobación de salud."""
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
+        self.assertGreater(connection.settings_dict['CONN_MAX_AGE'], 0)
+        self.assertTrue(connection.settings_dict['CONN_HEALTH_CHECKS'])
+
+class VistasAsyncTest(TestCase):
+    # Pruebas de las vistas asíncronas que se usan al servir la aplicación con ASGI
+    def setUp(self):
+        self.cliente = Cliente.objects.create(nombre="Rosa", apellido="Vidal", telefono="955000111")
+        self.vehiculo = Vehiculo.objects.create(patente="ASYN01", marca="Kia", modelo="Rio", año=2021, cliente=self.cliente)
+        self.servicio = Servicio.objects.create(nombre="Lavado", precio=10000)
+
+    def test_wsgi_usa_vistas_sincronas(self):
+        """Verifica que con el cliente síncrono (WSGI) se siguen usando las vistas de views.py."""
+        respuesta = self.client.get(reverse('cliente_list'))
+        self.assertEqual(respuesta.resolver_match.func.__module__, 'gestion.views')
+
+    async def test_listados_asincronos(self):
+        """Verifica que bajo ASGI los listados se resuelven con las vistas asíncronas."""
+        for nombre in ('home', 'cliente_list', 'vehiculo_list', 'servicio_list', 'orden_reparacion_list'):
+            respuesta = await self.async_client.get(reverse(nombre))
+            self.assertEqual(respuesta.status_code, 200, nombre)
+            self.assertEqual(respuesta.resolver_match.func.__module__, 'gestion.vistas_async', nombre)
+            self.assertIn('Server-Timing', respuesta)
+        respuesta = await self.async_client.get(reverse('vehiculo_list'))
+        self.assertContains(respuesta, "ASYN01")
+        self.assertContains(respuesta, "Rosa Vidal")
+
+    async def test_formularios_asincronos(self):
+        """Verifica que los formularios asíncronos crean y editan registros, y devuelven 404 si no existen."""
+        respuesta = await self.async_client.post(reverse('orden_reparacion_create'), {
+            'vehiculo': self.vehiculo.pk,
+            'servicios': [self.servicio.pk],
+            'fecha_ingreso': '2025-03-01',
+            'estado': 'ingresado',
+        })
+        self.assertRedirects(respuesta, reverse('orden_reparacion_list'), fetch_redirect_response=False)
+        orden = await OrdenReparacion.objects.aget(vehiculo=self.vehiculo)
+        self.assertEqual(orden.monto_total, 10000)
+
+        respuesta = await self.async_client.post(reverse('cliente_update', args=[self.cliente.pk]), {
+            'nombre': "Rosa", 'apellido': "Vidal", 'telefono': "955000999",
+        })
+        self.assertEqual(respuesta.status_code, 302)
+        self.assertEqual((await Cliente.objects.aget(pk=self.cliente.pk)).telefono, "955000999")
+
+        respuesta = await self.async_client.get(reverse('servicio_update', args=[self.servicio.pk + 100]))
+        self.assertEqual(respuesta.status_code, 404)
+        respuesta = await self.async_client.get(reverse('orden_reparacion_list'), {'despues': 'x'})
+        self.assertEqual(respuesta.status_code, 404)
+
+class ApiTest(TestCase):
+    # Pruebas de la API JSON de solo lectura
+    def setUp(self):
+        self.cliente = Cliente.objects.create(nombre="Eva", apellido="Lagos", telefono="944000111")
+        self.vehiculo = Vehiculo.objects.create(patente="APIX01", marca="Fiat", modelo="Uno", año=2012, cliente=self.cliente)
+        self.servicio = Servicio.objects.create(nombre="Pintura", precio=90000)
+        self.ordenes = []
+        for dia in range(5):
+            orden = OrdenReparacion.objects.create(vehiculo=self.vehiculo, fecha_ingreso=date(2025, 5, 1 + dia))
+            orden.servicios.add(self.servicio)
+            self.ordenes.append(orden)
+
+    def test_campos_y_paginacion(self):
+        """Verifica la selección de campos y el recorrido por cursores."""
+        respuesta = self.client.get(reverse('api_ordenes'), {'campos': 'id,estado,monto_total,servicios', 'n': 3})
+        datos = respuesta.json()
+        self.assertEqual(datos['resultados'][0], {
+            'id': self.ordenes[-1].id, 'estado': 'ingresado', 'monto_total': 90000, 'servicios': [self.servicio.id],
+        })
+        self.assertEqual(len(datos['resultados']), 3)
+        siguiente = self.client.get(reverse('api_ordenes'), {'campos': 'id', 'n': 3, 'despues': datos['siguiente']}).json()
+        self.assertEqual([fila['id'] for fila in siguiente['resultados']], [self.ordenes[1].id, self.ordenes[0].id])
+        self.assertIsNone(siguiente['siguiente'])
+
+        respuesta = self.client.get(reverse('api_vehiculos'), {'cliente': self.cliente.id})
+        self.assertEqual(respuesta.json()['resultados'][0]['patente'], "APIX01")
+        self.assertEqual(self.client.get(reverse('api_clientes'), {'campos': 'clave'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('api_ordenes'), {'despues': 'x'}).status_code, 400)
+
+    def test_get_condicional(self):
+        """Verifica que una página sin cambios responde 304 con una sola consulta, y que un cambio la invalida."""
+        respuesta = self.client.get(reverse('api_ordenes'))
+        etag = respuesta['ETag']
+        with self.assertNumQueries(1):
+            respuesta = self.client.get(reverse('api_ordenes'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 304)
+
+        # Cambiar los servicios de una orden actualiza su fecha de modificación y el ETag
+        self.ordenes[2].servicios.clear()
+        respuesta = self.client.get(reverse('api_ordenes'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertNotEqual(respuesta['ETag'], etag)
+
+        # Los campos pedidos forman parte del ETag
+        etag_id = self.client.get(reverse('api_ordenes'), {'campos': 'id'})['ETag']
+        self.assertNotEqual(etag_id, respuesta['ETag'])
+
+    def test_eliminar_fila_fuera_de_la_pagina_invalida_la_cache(self):
+        """Verifica que eliminar una fila de la página siguiente cambia la respuesta condicional de la página actual."""
+        otro = Vehiculo.objects.create(patente="APIX02", marca="Fiat", modelo="Uno", año=2013, cliente=self.cliente)
+        respuesta = self.client.get(reverse('api_vehiculos'), {'n': 1})
+        self.assertIsNotNone(respuesta.json()['siguiente'])
+        etag = respuesta['ETag']
+        eliminar_vehiculo(otro) # La fila de la página no cambia, pero ya no hay página siguiente
+        for cabecera in ({'HTTP_IF_NONE_MATCH': etag}, {'HTTP_IF_MODIFIED_SINCE': http_date()}):
+            respuesta = self.client.get(reverse('api_vehiculos'), {'n': 1}, **cabecera)
+            self.assertEqual(respuesta.status_code, 200)
+            self.assertIsNone(respuesta.json()['siguiente'])
+
+class CambioEstadoMasivoTest(TestCase):
+    # Pruebas del cambio de estado de varias órdenes a la vez
+    def setUp(self):
+        cliente = Cliente.objects.create(nombre="Iván", apellido="Mora", telefono="933000111")
+        vehiculo = Vehiculo.objects.create(patente="MASV01", marca="Audi", modelo="A3", año=2020, cliente=cliente)
+        self.ingresada = OrdenReparacion.objects.create(vehiculo=vehiculo, fecha_ingreso=date(2025, 6, 1))
+        self.en_progreso = OrdenReparacion.objects.create(
+            vehiculo=vehiculo, fecha_ingreso=date(2025, 6, 2), estado='en_progreso', fecha_salida=date(2025, 6, 5)
+        )
+        self.finalizada = OrdenReparacion.objects.create(
+            vehiculo=vehiculo, fecha_ingreso=date(2025, 6, 3), estado='finalizado', fecha_salida=date(2025, 6, 4)
+        )
+        self.ids = [self.ingresada.id, self.en_progreso.id, self.finalizada.id]
+
+    def test_un_solo_update_con_transiciones_validas(self):
+        """Verifica que solo cambian las órdenes con transición permitida, con un único UPDATE."""
+        with CaptureQueriesContext(connection) as consultas:
+            actualizadas = OrdenReparacion.objects.filter(pk__in=self.ids).cambiar_estado('en_progreso')
+        # Además del UPDATE solo se ejecutan el SAVEPOINT y el RELEASE de la transacción
+        self.assertEqual([c['sql'].split()[0] for c in consultas].count('UPDATE'), 1)
+        self.assertEqual(actualizadas, 1) # Solo la orden ingresada puede pasar a 'en_progreso'
+
+        actualizadas = OrdenReparacion.objects.filter(pk__in=self.ids).cambiar_estado('finalizado', date(2025, 6, 30))
+        self.assertEqual(actualizadas, 2)
+        self.ingresada.refresh_from_db()
+        self.en_progreso.refresh_from_db()
+        self.assertEqual(self.ingresada.estado, 'finalizado')
+        self.assertEqual(self.ingresada.fecha_salida, date(2025, 6, 30))
+        self.assertEqual(self.en_progreso.fecha_salida, date(2025, 6, 5)) # Conserva su fecha de salida
+        self.assertEqual(diferencias_resumen(), [])
+        with self.assertRaises(ValueError):
+            OrdenReparacion.objects.all().cambiar_estado('cancelado')
+
+    def test_vista_cambio_masivo(self):
+        """Verifica la vista de acción masiva con respuesta HTML (redirección) y JSON."""
+        volver = reverse('orden_reparacion_list') + '?n=10'
+        respuesta = self.client.post(reverse('orden_reparacion_cambiar_estado'), {
+            'ordenes': self.ids, 'estado': 'finalizado', 'volver': volver,
+        })
+        self.assertRedirects(respuesta, volver, fetch_redirect_response=False)
+        self.assertEqual(OrdenReparacion.objects.filter(estado='finalizado').count(), 3)
+        self.assertContains(self.client.get(volver), "2 órdenes cambiadas")
+
+        respuesta = self.client.post(
+            reverse('orden_reparacion_cambiar_estado'),
+            {'ordenes': self.ids, 'estado': 'en_progreso'},
+            HTTP_ACCEPT='application/json',
+        )
+        self.assertEqual(respuesta.json(), {'actualizadas': 0, 'omitidas': 3})
+        respuesta = self.client.post(reverse('orden_reparacion_cambiar_estado'), {'ordenes': self.ids, 'estado': 'x'})
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(self.client.get(reverse('orden_reparacion_cambiar_estado')).status_code, 405)
+
+
+class ArchivoOrdenesTest(TestCase):
+    # Pruebas del archivo de órdenes finalizadas antiguas
+    def setUp(self):
+        cliente = Cliente.objects.create(nombre="Olga", apellido="Reyes", telefono="944000222")
+        self.vehiculo = Vehiculo.objects.create(patente="ARCH01", marca="Fiat", modelo="Uno", año=2010, cliente=cliente)
+        self.servicio = Servicio.objects.create(nombre="Alineación", precio=20000)
+        hace_dos_anos = date.today() - timedelta(days=730)
+        self.antiguas = [
+            OrdenReparacion.objects.create(
+                vehiculo=self.vehiculo, fecha_ingreso=hace_dos_anos, fecha_salida=hace_dos_anos + timedelta(days=dia),
+                estado='finalizado',
+            )
+            for dia in range(3)
+        ]
+        for orden in self.antiguas:
+            orden.servicios.add(self.servicio)
+        # Antigua pero abierta, y finalizada hace poco: ninguna se archiva
+        self.abierta = OrdenReparacion.objects.create(vehiculo=self.vehiculo, fecha_ingreso=hace_dos_anos, estado='en_progreso')
+        self.reciente = OrdenReparacion.objects.create(
+            vehiculo=self.vehiculo, fecha_ingreso=date.today(), fecha_salida=date.today(), estado='finalizado'
+        )
+
+    def test_archivar_por_lotes(self):
+        """Verifica que se trasladan solo las órdenes finalizadas antiguas, con sus servicios y sin alterar el panel."""
+        resumen_antes = resumen_actual()
+        salida = StringIO()
+        call_command('archive_orders', older_than=365, lote=2, stdout=salida)
+        self.assertIn('Órdenes archivadas: 3', salida.getvalue())
+
+        ids_antiguas = {orden.pk for orden in self.antiguas}
+        self.assertFalse(OrdenReparacion.objects.filter(pk__in=ids_antiguas).exists())
+        self.assertEqual(set(OrdenReparacion.objects.values_list('pk', flat=True)), {self.abierta.pk, self.reciente.pk})
+        archivada = OrdenArchivada.objects.get(pk=self.antiguas[0].pk) # Conserva el ID original
+        self.assertEqual(archivada.monto_total, 20000)
+        self.assertEqual(list(archivada.servicios.all()), [self.servicio])
+        self.assertFalse(OrdenReparacion.servicios.through.objects.filter(ordenreparacion_id__in=ids_antiguas).exists())
+        # El panel sigue contando las órdenes archivadas
+        self.assertEqual(resumen_actual(), resumen_antes)
+        self.assertEqual(diferencias_resumen(), [])
+
+        call_command('archive_orders', older_than=365, stdout=salida) # Una segunda pasada no encuentra nada
+        self.assertEqual(OrdenArchivada.objects.count(), 3)
+
+    def test_historial_incluye_archivadas(self):
+        """Verifica que el historial del vehículo muestra las órdenes activas y archivadas, de la más reciente a la más antigua."""
+        call_command('archive_orders', older_than=365, stdout=StringIO())
+        respuesta = self.client.get(reverse('vehiculo_historial', args=[self.vehiculo.patente]))
+        self.assertEqual(respuesta.status_code, 200)
+        ordenes = respuesta.context['ordenes']
+        self.assertEqual(len(ordenes), 5)
+        self.assertEqual(ordenes[0].pk, self.reciente.pk)
+        self.assertEqual(sum(isinstance(orden, OrdenArchivada) for orden in ordenes), 3)
+        self.assertContains(respuesta, "(archivada)", count=3)
+        self.assertEqual(self.client.get(reverse('vehiculo_historial', args=['NOEXISTE'])).status_code, 404)
+
+    def test_historial_paginado_por_cursor(self):
+        """Verifica que el historial se recorre por cursor mezclando activas y archivadas, con consultas constantes."""
+        call_command('archive_orders', older_than=365, stdout=StringIO())
+        esperado = [self.reciente.pk, *sorted([self.abierta.pk, *(orden.pk for orden in self.antiguas)], reverse=True)]
+        url = reverse('vehiculo_historial', args=[self.vehiculo.patente])
+
+        vistas, paginas, parametros = [], [], {'n': 2}
+        while True:
+            with CaptureQueriesContext(connection) as consultas:
+                respuesta = self.client.get(url, parametros)
+            paginas.append(respuesta.context['pagina'])
+            vistas.extend(orden.pk for orden in respuesta.context['ordenes'])
+            self.assertLessEqual(len(consultas.captured_queries), 5) # Vehículo, dos tablas de órdenes y sus servicios
+            if not paginas[-1].siguiente:
+                break
+            parametros = {'n': 2, 'despues': paginas[-1].siguiente}
+        self.assertEqual(vistas, esperado)
+        self.assertEqual(len(paginas), 3)
+
+        # Volver desde la última página devuelve la anterior, con los servicios de las archivadas
+        respuesta = self.client.get(url, {'n': 2, 'antes': paginas[-1].anterior})
+        self.assertEqual([orden.pk for orden in respuesta.context['ordenes']], esperado[2:4])
+        self.assertContains(respuesta, "Alineación")
+        self.assertEqual(self.client.get(url, {'despues': 'no-es-cursor'}).status_code, 404)
+
+
+class EliminacionSuaveTest(TestCase):
+    # Pruebas del borrado en dos etapas de clientes y vehículos
+    def setUp(self):
+        self.cliente = Cliente.objects.create(nombre="Rosa", apellido="Fuentes", telefono="955000333")
+        self.otro = Cliente.objects.create(nombre="Tomás", apellido="Vera", telefono="955000444")
+        self.vehiculo = Vehiculo.objects.create(patente="BORR01", marca="Kia", modelo="Rio", año=2018, cliente=self.cliente)
+        self.vehiculo_otro = Vehiculo.objects.create(patente="BORR02", marca="Kia", modelo="Soul", año=2019, cliente=self.otro)
+        servicio = Servicio.objects.create(nombre="Frenos", precio=30000)
+        antigua = date.today() - timedelta(days=800)
+        for vehiculo in (self.vehiculo, self.vehiculo_otro):
+            for fecha, estado in ((antigua, 'finalizado'), (date.today(), 'ingresado')):
+                orden = OrdenReparacion.objects.create(vehiculo=vehiculo, fecha_ingreso=fecha, fecha_salida=fecha if estado == 'finalizado' else None, estado=estado)
+                orden.servicios.add(servicio)
+        call_command('archive_orders', older_than=365, stdout=StringIO()) # Una orden archivada por vehículo
+
+    def test_eliminar_cliente_oculta_y_purga(self):
+        """Verifica que eliminar un cliente lo oculta de inmediato y que la purga borra todos sus datos por lotes."""
+        with self.captureOnCommitCallbacks() as callbacks:
+            respuesta = self.client.post(reverse('cliente_delete', args=[self.cliente.pk]))
+        self.assertRedirects(respuesta, reverse('cliente_list'))
+        self.assertEqual(len(callbacks), 1) # Purga en segundo plano programada al confirmar
+
+        # Oculto en listados, búsquedas, historial y API, pero todavía en la base de datos
+        self.assertEqual(list(Cliente.objects.all()), [self.otro])
+        self.assertEqual(list(Vehiculo.objects.all()), [self.vehiculo_otro])
+        self.assertTrue(Cliente.todos.filter(pk=self.cliente.pk).exists())
+        self.assertNotContains(self.client.get(reverse('orden_reparacion_list')), "BORR01")
+        self.assertEqual(buscar("Rosa"), [])
+        self.assertEqual(self.client.get(reverse('vehiculo_historial', args=["BORR01"])).status_code, 404)
+        ids_api = {orden['vehiculo'] for orden in self.client.get(reverse('api_ordenes')).json()['resultados']}
+        self.assertEqual(ids_api, {self.vehiculo_otro.pk})
+
+        salida = StringIO()
+        call_command('purge_deleted', lote=1, stdout=salida)
+        self.assertIn('ordenes=1, ordenes_archivadas=1, vehiculos=1, clientes=1', salida.getvalue())
+        self.assertFalse(Cliente.todos.filter(pk=self.cliente.pk).exists())
+        self.assertFalse(Vehiculo.todos.filter(pk=self.vehiculo.pk).exists())
+        self.assertEqual(OrdenReparacion.objects.count(), 1)
+        self.assertEqual(OrdenArchivada.objects.count(), 1)
+        self.assertEqual(OrdenReparacion.servicios.through.objects.count(), 1)
+        self.assertEqual(OrdenArchivada.servicios.through.objects.count(), 1)
+        self.assertEqual(diferencias_resumen(), [])
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM gestion_busqueda WHERE cliente_id = %s', [self.cliente.pk])
+            self.assertEqual(cursor.fetchone()[0], 0)
+
+    def test_eliminar_vehiculo(self):
+        """Verifica que eliminar un vehículo oculta sus órdenes, conserva al cliente y reserva la patente hasta la purga."""
+        self.client.post(reverse('vehiculo_delete', args=[self.vehiculo.pk]))
+        self.assertEqual(list(self.cliente.vehiculos.all()), [])
+        self.assertEqual(OrdenReparacion.objects.visibles().filter(vehiculo=self.vehiculo).count(), 0)
+        self.assertEqual(buscar("BORR01"), [])
+        self.assertEqual([c for c, _ in buscar("Rosa")], [self.cliente]) # El cliente sigue visible
+
+        datos = {'patente': 'BORR01', 'marca': 'Kia', 'modelo': 'Rio', 'año': 2018, 'cliente': self.cliente.pk}
+        respuesta = self.client.post(reverse('vehiculo_create'), datos)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertContains(respuesta, "aún no se ha purgado")
+
+        call_command('purge_deleted', stdout=StringIO())
+        self.assertTrue(Cliente.objects.filter(pk=self.cliente.pk).exists())
+        self.assertRedirects(self.client.post(reverse('vehiculo_create'), datos), reverse('vehiculo_list'))
+
+
+class RepreciarServicioTest(TestCase):
+    # Pruebas del recálculo de montos al cambiar el precio de un servicio
+    def setUp(self):
+        cliente = Cliente.objects.create(nombre="Paula", apellido="Soto", telefono="966000555")
+        vehiculo = Vehiculo.objects.create(patente="PREC01", marca="Seat", modelo="Ibiza", año=2016, cliente=cliente)
+        self.servicio = Servicio.objects.create(nombre="Escáner", precio=10000)
+        otro = Servicio.objects.create(nombre="Lavado", precio=5000)
+        self.abierta = OrdenReparacion.objects.create(vehiculo=vehiculo, fecha_ingreso=date(2025, 7, 1))
+        self.finalizada = OrdenReparacion.objects.create(
+            vehiculo=vehiculo, fecha_ingreso=date(2025, 6, 1), fecha_salida=date(2025, 6, 2), estado='finalizado'
+        )
+        for orden in (self.abierta, self.finalizada):
+            orden.servicios.set([self.servicio, otro])
+
+    def test_cambio_de_precio_actualiza_ordenes_abiertas(self):
+        """Verifica que un cambio de precio recalcula solo las órdenes no finalizadas, con un único UPDATE."""
+        datos = {'nombre': 'Escáner', 'precio': 12000}
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.post(reverse('servicio_update', args=[self.servicio.pk]), datos)
+        actualizaciones = [c['sql'] for c in consultas if c['sql'].startswith('UPDATE "gestion_ordenreparacion"')]
+        self.assertEqual(len(actualizaciones), 1)
+        self.abierta.refresh_from_db()
+        self.finalizada.refresh_from_db()
+        self.assertEqual(self.abierta.monto_total, 17000)
+        self.assertEqual(self.finalizada.monto_total, 15000) # Conserva el monto histórico
+        self.assertEqual(diferencias_resumen(), [])
+
+        # Guardar sin cambiar el precio no toca las órdenes
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.post(reverse('servicio_update', args=[self.servicio.pk]), {'nombre': 'Escáner OBD', 'precio': 12000})
+        self.assertFalse([c for c in consultas if c['sql'].startswith('UPDATE "gestion_ordenreparacion"')])
+
+    def test_recompute_totals(self):
+        """Verifica que el comando informa el desvío y corrige por lotes solo las órdenes desviadas."""
+        OrdenReparacion.objects.update(monto_total=1) # Desvía ambas órdenes sin pasar por las señales
+        with self.assertRaises(CommandError):
+            call_command('recompute_totals', verificar=True, stdout=StringIO())
+
+        salida = StringIO()
+        call_command('recompute_totals', lote=1, stdout=salida)
+        self.assertIn('Con monto desviado: 1', salida.getvalue())
+        self.abierta.refresh_from_db()
+        self.finalizada.refresh_from_db()
+        self.assertEqual(self.abierta.monto_total, 15000)
+        self.assertEqual(self.finalizada.monto_total, 1) # Las finalizadas se omiten por defecto
+
+        call_command('recompute_totals', incluir_finalizadas=True, stdout=StringIO())
+        self.finalizada.refresh_from_db()
+        self.assertEqual(self.finalizada.monto_total, 15000)
+        call_command('recompute_totals', verificar=True, incluir_finalizadas=True, stdout=StringIO())
+
+
+class CacheFilasOrdenesTest(TestCase):
+    # Pruebas del cacheo por fila del listado de órdenes
+    def setUp(self):
+        cache.clear()
+        self.cliente = Cliente.objects.create(nombre="Julia", apellido="Lagos", telefono="977000666")
+        vehiculo = Vehiculo.objects.create(patente="FILA01", marca="Mazda", modelo="3", año=2021, cliente=self.cliente)
+        self.servicio = Servicio.objects.create(nombre="Pintura", precio=80000)
+        self.orden = OrdenReparacion.objects.create(
+            vehiculo=vehiculo, fecha_ingreso=date(2025, 8, 1), fecha_salida=date(2025, 8, 3), estado='finalizado'
+        )
+        self.orden.servicios.add(self.servicio)
+
+    def clave_fila(self, respuesta):
+        orden = list(respuesta.context['ordenes'])[0]
+        return make_template_fragment_key('orden_fila', [orden.pk, version_fila(orden)])
+
+    def test_fila_cacheada_y_versionada(self):
+        """Verifica que cada fila se guarda en la caché y que su clave cambia con el cliente o los servicios."""
+        respuesta = self.client.get(reverse('orden_reparacion_list'))
+        clave = self.clave_fila(respuesta)
+        self.assertIn("Julia Lagos", cache.get(clave))
+
+        # Cambiar el cliente invalida la fila
+        self.cliente.nombre = "Juliana"
+        self.cliente.save()
+        respuesta = self.client.get(reverse('orden_reparacion_list'))
+        self.assertNotEqual(self.clave_fila(respuesta), clave)
+        self.assertContains(respuesta, "Juliana Lagos")
+
+        # Cambiar el precio de un servicio de una orden finalizada (cuyo monto no cambia) también la invalida
+        self.servicio.precio = 90000
+        self.servicio.save()
+        respuesta = self.client.get(reverse('orden_reparacion_list'))
+        self.assertContains(respuesta, "Pintura ($90")
+        self.assertNotContains(respuesta, "Pintura ($80")
+
+    def test_cargador_de_plantillas_cacheado(self):
+        """Verifica que las plantillas se compilan una vez por proceso (cargador cached)."""
+        motor = engines.all()[0].engine
+        self.assertIsInstance(motor.template_loaders[0], CachedLoader)
+
+
+class ConfiguracionProduccionTest(TestCase):
+    # Pruebas de la configuración de producción y de sus archivos estáticos comprimidos
+    def cargar_configuracion(self, **entorno):
+        sys.modules.pop('proyectotaller.settings_produccion', None)
+        with mock.patch.dict(os.environ, entorno):
+            try:
+                return importlib.import_module('proyectotaller.settings_produccion')
+            finally:
+                sys.modules.pop('proyectotaller.settings_produccion', None)
+
+    def test_sin_aplicaciones_de_desarrollo(self):
+        """Verifica que la configuración de producción quita DEBUG y todo lo que solo sirve para desarrollar."""
+        produccion = self.cargar_configuracion(DJANGO_SECRET_KEY='clave', DJANGO_ALLOWED_HOSTS='taller.cl, www.taller.cl')
+        self.assertFalse(produccion.DEBUG)
+        self.assertEqual(produccion.SECRET_KEY, 'clave')
+        self.assertEqual(produccion.ALLOWED_HOSTS, ['taller.cl', 'www.taller.cl'])
+        self.assertNotIn('django_browser_reload', produccion.INSTALLED_APPS)
+        self.assertNotIn('tailwind', produccion.INSTALLED_APPS)
+        self.assertNotIn('django_browser_reload.middleware.BrowserReloadMiddleware', produccion.MIDDLEWARE)
+        self.assertNotIn('django.template.context_processors.debug', produccion.TEMPLATES[0]['OPTIONS']['context_processors'])
+        # La configuración de desarrollo no se modifica
+        self.assertIn('django.template.context_processors.debug', settings.TEMPLATES[0]['OPTIONS']['context_processors'])
+
+    def test_exige_clave_secreta(self):
+        """Verifica que la configuración de producción no arranca sin DJANGO_SECRET_KEY."""
+        from django.core.exceptions import ImproperlyConfigured
+        with self.assertRaises(ImproperlyConfigured):
+            self.cargar_configuracion(DJANGO_SECRET_KEY='')
+
+    def test_collectstatic_comprimido(self):
+        """Verifica que collectstatic guarda los archivos con hash y una copia .gz con el mismo contenido."""
+        with tempfile.TemporaryDirectory() as directorio, override_settings(
+            STATIC_ROOT=directorio,
+            STORAGES={**settings.STORAGES, 'staticfiles': {'BACKEND': 'gestion.almacenamiento.ManifestComprimido'}},
+        ):
+            call_command('collectstatic', interactive=False, verbosity=0)
+            comprimidos = list(Path(directorio).rglob('*.css.gz'))
+            self.assertTrue(comprimidos)
+            for comprimido in comprimidos:
+                original = comprimido.with_suffix('')
+                self.assertRegex(original.name, r'\.[0-9a-f]{12}\.css$') # Nombre con el hash del contenido
+                self.assertEqual(gzip.decompress(comprimido.read_bytes()), original.read_bytes())
+
+
+class TareasSegundoPlanoTest(TestCase):
+    # Pruebas de la cola de tareas en segundo plano guardada en la base de datos
+    def setUp(self):
+        cliente = Cliente.objects.create(nombre="Irene", apellido="Soto", telefono="988000777")
+        self.vehiculo = Vehiculo.objects.create(patente="TARE01", marca="Fiat", modelo="Uno", año=2015, cliente=cliente)
+        servicio = Servicio.objects.create(nombre="Embrague", precio=120000)
+        self.orden = OrdenReparacion.objects.create(vehiculo=self.vehiculo, fecha_ingreso=date(2025, 9, 1))
+        self.orden.servicios.add(servicio)
+        OrdenReparacion.objects.update(monto_total=1) # Monto desviado, sin pasar por las señales
+
+    def tearDown(self):
+        TAREAS.pop('prueba_falla', None)
+
+    def test_vista_encola_y_worker_ejecuta(self):
+        """Verifica que la vista encola el recálculo sin ejecutarlo y que 'run_tasks' lo completa."""
+        with self.captureOnCommitCallbacks() as callbacks:
+            respuesta = self.client.post(reverse('orden_reparacion_recalcular'), HTTP_ACCEPT='application/json')
+        self.assertEqual(respuesta.status_code, 202)
+        self.assertEqual(len(callbacks), 1) # Hilo en segundo plano lanzado al confirmar (TAREAS_EN_PROCESO)
+        self.orden.refresh_from_db()
+        self.assertEqual(self.orden.monto_total, 1) # La solicitud no esperó al recálculo
+        estado = self.client.get(respuesta.json()['estado']).json()
+        self.assertEqual(estado['estado'], 'pendiente')
+
+        # Un segundo clic antes de que se ejecute no encola otra tarea
+        self.client.post(reverse('orden_reparacion_recalcular'))
+        self.assertEqual(Tarea.objects.count(), 1)
+
+        salida = StringIO()
+        call_command('run_tasks', hilos=1, una_vez=True, stdout=salida)
+        self.assertIn('recalcular_totales: completada', salida.getvalue())
+        self.orden.refresh_from_db()
+        self.assertEqual(self.orden.monto_total, 120000)
+        estado = self.client.get(respuesta.json()['estado']).json()
+        self.assertEqual(estado['estado'], 'completada')
+        self.assertEqual((estado['progreso'], estado['total']), (1, 1))
+        self.assertEqual(estado['resultado']['con_desvio'], 1)
+
+    def test_despertar_mientras_el_hilo_termina(self):
+        """Verifica que una tarea encolada justo antes de que el hilo libere el candado no queda esperando."""
+        procesadas = []
+
+        class CandadoConCarrera:
+            # Candado que simula un encolar() entre la última revisión del hilo y su liberación
+            def __init__(self):
+                self.candado = threading.Lock()
+                self.carrera = True
+
+            def acquire(self, blocking=True):
+                return self.candado.acquire(blocking)
+
+            def release(self):
+                if self.carrera:
+                    self.carrera = False
+                    despertar() # No puede tomar el candado: el hilo todavía lo tiene
+                self.candado.release()
+
+        with mock.patch('gestion.tareas._ejecucion_en_curso', CandadoConCarrera()), \
+                mock.patch('gestion.tareas.procesar_pendientes', lambda: procesadas.append(True)):
+            despertar()
+            for hilo in threading.enumerate():
+                if hilo.name == 'tareas':
+                    hilo.join(timeout=5)
+        self.assertEqual(len(procesadas), 2) # La segunda revisión de la cola no se perdió
+
+    def test_reintentos(self):
+        """Verifica que una tarea que falla se reintenta más tarde y queda fallida al agotar sus intentos."""
+        llamadas = []
+
+        @tarea('prueba_falla', max_intentos=2)
+        def falla(avance, valor):
+            llamadas.append(valor)
+            raise RuntimeError('sin conexión')
+
+        pendiente = encolar('prueba_falla', valor=7)
+        with self.assertLogs('gestion.tareas', 'ERROR'):
+            self.assertEqual(procesar_pendientes(), 1)
+        pendiente.refresh_from_db()
+        self.assertEqual((pendiente.estado, pendiente.intentos), (Tarea.PENDIENTE, 1))
+        self.assertGreater(pendiente.ejecutar_desde, pendiente.iniciada) # Reintento pospuesto
+        self.assertEqual(procesar_pendientes(), 0) # Todavía no toca reintentarla
+
+        Tarea.objects.update(ejecutar_desde=pendiente.iniciada)
+        with self.assertLogs('gestion.tareas', 'ERROR'):
+            self.assertEqual(procesar_pendientes(), 1)
+        pendiente.refresh_from_db()
+        self.assertEqual((pendiente.estado, pendiente.intentos), (Tarea.FALLIDA, 2))
+        self.assertIn('RuntimeError: sin conexión', pendiente.error)
+        self.assertEqual(llamadas, [7, 7])
+        with self.assertRaises(ValueError):
+            encolar('no_existe')
+
+    def test_recuperar_interrumpidas(self):
+        """Verifica que una tarea en curso de un proceso que terminó vuelve a la cola."""
+        interrumpida = encolar('recalcular_totales')
+        Tarea.objects.update(estado=Tarea.EN_CURSO, intentos=1, iniciada=timezone.now() - timedelta(days=1))
+        self.assertEqual(recuperar_interrumpidas(), 1)
+        interrumpida.refresh_from_db()
+        self.assertEqual(interrumpida.estado, Tarea.PENDIENTE)
+
+    def test_worker_recupera_interrumpidas_mientras_espera(self):
+        """Verifica que 'run_tasks' recupera las tareas que un proceso dejó en curso después de que el worker arrancó."""
+        interrumpida = encolar('recalcular_totales')
+        Tarea.objects.update(estado=Tarea.EN_CURSO, intentos=1, iniciada=timezone.now() - timedelta(days=1))
+        busquedas = []
+
+        def recuperar():
+            # La primera búsqueda (al arrancar) no la encuentra: el proceso web terminó después
+            busquedas.append(True)
+            return recuperar_interrumpidas() if len(busquedas) > 1 else 0
+
+        salida = StringIO()
+        with mock.patch('gestion.management.commands.run_tasks.recuperar_interrumpidas', recuperar):
+            call_command('run_tasks', hilos=1, una_vez=True, recuperar_cada=0, stdout=salida)
+        self.assertIn('1 tareas interrumpidas devueltas a la cola', salida.getvalue())
+        interrumpida.refresh_from_db()
+        self.assertEqual((interrumpida.estado, interrumpida.intentos), (Tarea.COMPLETADA, 2))
+
+    def test_reintento_programa_despertar(self):
+        """Verifica que el hilo del proceso programa un despertar() para cuando vence la espera de un reintento."""
+        encolar('recalcular_totales')
+        Tarea.objects.update(ejecutar_desde=timezone.now() + timedelta(seconds=30))
+        with mock.patch('gestion.tareas.threading.Timer') as temporizador:
+            _programar_reintento()
+        (espera, funcion), _ = temporizador.call_args
+        self.assertAlmostEqual(espera, 30, delta=5)
+        self.assertIs(funcion, despertar)
+        temporizador.return_value.start.assert_called_once()
+
+        Tarea.objects.all().delete() # Sin tareas pendientes se cancela el temporizador y no se programa otro
+        with mock.patch('gestion.tareas.threading.Timer') as temporizador:
+            _programar_reintento()
+        temporizador.assert_not_called()
+
+    def test_purga_como_tarea(self):
+        """Verifica que eliminar varios clientes encola una sola purga, que borra sus datos al ejecutarse."""
+        otro = Cliente.objects.create(nombre="Pablo", apellido="Rivas", telefono="988000888")
+        self.client.post(reverse('cliente_delete', args=[self.vehiculo.cliente.pk]))
+        self.client.post(reverse('cliente_delete', args=[otro.pk]))
+        self.assertEqual(list(Tarea.objects.values_list('nombre', flat=True)), ['purgar_eliminados'])
+        procesar_pendientes()
+        self.assertFalse(Cliente.todos.exists())
+        self.assertFalse(OrdenReparacion.objects.exists())
+        self.assertEqual(Tarea.objects.get().resultado['clientes'], 2)
+
+
+class ExportacionOrdenesTest(TestCase):
+    # Pruebas de la exportación de órdenes en CSV y NDJSON
+    def setUp(self):
+        cliente = Cliente.objects.create(nombre="Marta", apellido="Díaz", telefono="966000111", email="marta@example.com")
+        vehiculo = Vehiculo.objects.create(patente="EXPO01", marca="Suzuki", modelo="Swift", año=2020, cliente=cliente)
+        frenos = Servicio.objects.create(nombre="Frenos", precio=30000)
+        aceite = Servicio.objects.create(nombre="Aceite, filtro", precio=25000)
+        self.ordenes = []
+        for dia, estado in ((1, 'finalizado'), (10, 'ingresado'), (20, 'ingresado')):
+            orden = OrdenReparacion.objects.create(vehiculo=vehiculo, fecha_ingreso=date(2025, 3, dia), estado=estado)
+            self.ordenes.append(orden)
+        self.ordenes[0].servicios.add(frenos, aceite)
+        self.ordenes[1].servicios.add(frenos)
+        for orden in self.ordenes:
+            orden.calcular_monto_total()
+
+    def test_csv_una_fila_por_servicio(self):
+        """Verifica que el CSV tiene una fila por servicio y una fila para la orden sin servicios."""
+        respuesta = self.client.get(reverse('orden_reparacion_exportar'))
+        self.assertTrue(respuesta.streaming)
+        self.assertEqual(respuesta['Content-Type'], 'text/csv; charset=utf-8')
+        filas = list(csv.DictReader(b''.join(respuesta.streaming_content).decode().splitlines()))
+        self.assertEqual([(f['orden_id'], f['servicio_nombre']) for f in filas], [
+            (str(self.ordenes[0].pk), 'Frenos'), (str(self.ordenes[0].pk), 'Aceite, filtro'),
+            (str(self.ordenes[1].pk), 'Frenos'), (str(self.ordenes[2].pk), ''),
+        ])
+        self.assertEqual((filas[0]['patente'], filas[0]['cliente_apellido'], filas[0]['monto_total']), ('EXPO01', 'Díaz', '55000'))
+
+    def test_ndjson_filtrado_por_lotes(self):
+        """Verifica los filtros y que cada lote usa dos consultas, sin importar cuántas órdenes tenga."""
+        with self.assertNumQueries(3): # Lote de 2 órdenes, lote de 0 (fin): 2 + 1 consultas
+            respuesta = self.client.get(
+                reverse('orden_reparacion_exportar'), {'formato': 'ndjson', 'desde': '2025-03-05', 'estado': 'ingresado'}
+            )
+            lineas = b''.join(respuesta.streaming_content).decode().splitlines()
+        ordenes = [json.loads(linea) for linea in lineas]
+        self.assertEqual([orden['orden_id'] for orden in ordenes], [self.ordenes[1].pk, self.ordenes[2].pk])
+        self.assertEqual(ordenes[0]['servicios'], [{'servicio_id': ordenes[0]['servicios'][0]['servicio_id'], 'servicio_nombre': 'Frenos', 'servicio_precio': 30000}])
+        self.assertEqual(self.client.get(reverse('orden_reparacion_exportar'), {'desde': 'ayer'}).status_code, 400)
+
+    def test_comando_incluye_archivadas(self):
+        """Verifica que el comando exporta por lotes y, si se pide, también las órdenes archivadas."""
+        self.ordenes[0].fecha_salida = date(2025, 3, 2)
+        self.ordenes[0].save()
+        call_command('archive_orders', older_than=30, stdout=StringIO())
+        salida = StringIO()
+        call_command('export_orders', formato='ndjson', lote=1, stdout=salida)
+        self.assertEqual(len(salida.getvalue().splitlines()), 2)
+        salida = StringIO()
+        call_command('export_orders', formato='ndjson', lote=1, incluir_archivadas=True, stdout=salida)
+        ordenes = [json.loads(linea) for linea in salida.getvalue().splitlines()]
+        self.assertEqual([(o['orden_id'], o['archivada'], len(o['servicios'])) for o in ordenes], [
+            (self.ordenes[1].pk, False, 1), (self.ordenes[2].pk, False, 0), (self.ordenes[0].pk, True, 2),
+        ])
+        with self.assertRaises(CommandError):
+            call_command('export_orders', desde='2025-04-01', hasta='2025-03-01', stdout=StringIO())
+
+
+class ExportacionConcurrenteTest(TransactionTestCase):
+    # Pruebas de la exportación por comando mientras otras conexiones escriben
+    def test_comando_no_bloquea_escrituras(self):
+        """Verifica que el comando exporta en una transacción de lectura que no bloquea las escrituras de otras conexiones."""
+        cliente = Cliente.objects.create(nombre="Iris", apellido="Soto", telefono="966000222")
+        vehiculo = Vehiculo.objects.create(patente="EXPO02", marca="Kia", modelo="Rio", año=2019, cliente=cliente)
+        for dia in range(1, 4):
+            OrdenReparacion.objects.create(vehiculo=vehiculo, fecha_ingreso=date(2025, 3, dia))
+        errores, hilos = [], []
+
+        def escribir_en_otra_conexion():
+            # Otra conexión (otro hilo) encola una tarea mientras la exportación sigue abierta
+            try:
+                Tarea.objects.create(nombre='recalcular_totales')
+            except Exception as exc:
+                errores.append(exc)
+            finally:
+                connection.close()
+
+        class Salida(StringIO):
+            def write(self, texto):
+                if not hilos: # Solo durante el primer bloque escrito
+                    hilos.append(threading.Thread(target=escribir_en_otra_conexion))
+                    hilos[0].start()
+                    hilos[0].join()
+                return super().write(texto)
+
+        salida = Salida()
+        call_command('export_orders', formato='ndjson', lote=1, stdout=salida)
+        self.assertEqual(errores, [])
+        self.assertEqual(Tarea.objects.count(), 1)
+        self.assertEqual(len(salida.getvalue().splitlines()), 3)
+
+
+class ImportacionClientesTest(TestCase):
+    # Pruebas de la importación masiva de clientes y vehículos desde CSV
+    CSV = (
+        "nombre,apellido,telefono,email,patente,marca,modelo,año\n"
+        "Ana,Rojas,911000001,ana@example.com,IMPO01,Toyota,Yaris,2019\n"
+        "Ana,Rojas,911000001,ana@example.com,IMPO02,Toyota,Hilux,2021\n" # Mismo cliente, otro vehículo
+        "Luis,Pino,911000002,,,,,\n" # Solo el cliente
+        "Eva,Mora,911000003,no-es-email,IMPO03,Kia,Rio,2018\n" # Email inválido
+        "Raúl,Soto,911000004,,IMPO01,Kia,Rio,2018\n" # Patente repetida en el archivo
+        "Raúl,Soto,911000004,,EXIS01,Kia,Rio,2018\n" # Patente que ya existe en la base de datos
+        "Raúl,Soto,911000004,,IMPO04,Kia,,dos mil\n" # Vehículo incompleto
+        "pedro,díaz,911000005,,IMPO05,Ford,Ka,2015\n" # Cliente existente (sin distinguir mayúsculas)
+    )
+
+    def setUp(self):
+        self.existente = Cliente.objects.create(nombre="Pedro", apellido="Díaz", telefono="911000005")
+        Vehiculo.objects.create(patente="EXIS01", marca="Fiat", modelo="Palio", año=2010, cliente=self.existente)
+
+    def test_comando_importa_por_lotes_y_rechaza(self):
+        """Verifica que el comando importa las filas válidas por lotes, sin duplicar clientes, y escribe los rechazos."""
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, 'clientes.csv')
+            with open(ruta, 'w', encoding='utf-8-sig') as archivo: # Con BOM, como lo guarda Excel
+                archivo.write(self.CSV)
+            salida = StringIO()
+            call_command('import_clientes', ruta, lote=3, stdout=salida)
+            self.assertIn('8 filas, 2 clientes creados, 1 clientes existentes, 3 vehículos creados', salida.getvalue())
+            self.assertIn('4 filas rechazadas', salida.getvalue())
+            with open(ruta + '.rechazos.csv', encoding='utf-8') as archivo:
+                rechazos = list(csv.DictReader(archivo))
+
+        self.assertEqual([fila['fila'] for fila in rechazos], ['5', '6', '7', '8'])
+        self.assertIn('email', rechazos[0]['errores'])
+        self.assertIn('IMPO01', rechazos[1]['errores'])
+        self.assertIn('EXIS01', rechazos[2]['errores'])
+        self.assertIn('modelo', rechazos[3]['errores'])
+        self.assertIn('año', rechazos[3]['errores'])
+
+        ana = Cliente.objects.get(nombre="Ana")
+        self.assertEqual(sorted(ana.vehiculos.values_list('patente', flat=True)), ['IMPO01', 'IMPO02'])
+        self.assertEqual(Cliente.objects.get(nombre="Luis").email, None)
+        self.assertEqual(Vehiculo.objects.get(patente="IMPO05").cliente, self.existente)
+        self.assertEqual(Cliente.objects.count(), 3) # Raúl y Eva no se crean: todas sus filas fueron rechazadas
+        self.assertEqual([c for c, _ in buscar("IMPO02")], [ana]) # Los triggers de búsqueda indexan las filas nuevas
+
+    def test_comando_con_codificacion_invalida(self):
+        """Verifica que un CSV que no es UTF-8 termina con un error que indica la línea y lo ya importado."""
+        filas = ''.join(f"Cliente{n},Lote,93000{n:04d},,,,,\n" for n in range(400)) # Más que un bloque de lectura
+        contenido = (self.CSV.splitlines()[0] + "\n" + filas).encode() + "Raúl,Soto,911000004,,,,,\n".encode('latin-1')
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, 'clientes.csv')
+            with open(ruta, 'wb') as archivo:
+                archivo.write(contenido)
+            with self.assertRaises(CommandError) as contexto:
+                call_command('import_clientes', ruta, lote=100, stdout=StringIO())
+        mensaje = str(contexto.exception)
+        self.assertIn('No se pudo leer el archivo después de la línea', mensaje)
+        importados = Cliente.objects.filter(apellido="Lote").count()
+        self.assertGreater(importados, 0) # Los lotes anteriores al error quedan guardados
+        self.assertIn(f'Ya se importaron las primeras {importados} filas: {importados} clientes', mensaje)
+
+    def test_consultas_por_lote(self):
+        """Verifica que cada lote usa una cantidad fija de consultas, sin importar cuántas filas tenga."""
+        filas = [
+            {'nombre': f'Cliente{n}', 'apellido': 'Lote', 'telefono': f'92000{n:04d}', 'patente': f'LOTE{n:02d}',
+             'marca': 'Kia', 'modelo': 'Rio', 'año': '2020'}
+            for n in range(40)
+        ]
+        # Por lote: patentes ocupadas, clientes existentes, SAVEPOINT, INSERT de clientes, INSERT de vehículos y RELEASE
+        with self.assertNumQueries(6):
+            resultado = importar_clientes(filas, lote=40)
+        self.assertEqual((resultado['clientes_creados'], resultado['vehiculos_creados']), (40, 40))
+
+    def test_vista_de_carga(self):
+        """Verifica que la vista importa el archivo subido y muestra las filas rechazadas."""
+        archivo = SimpleUploadedFile('clientes.csv', self.CSV.encode(), content_type='text/csv')
+        respuesta = self.client.post(reverse('cliente_importar'), {'archivo': archivo})
+        self.assertContains(respuesta, "3 vehículos creados")
+        self.assertContains(respuesta, "4 filas rechazadas")
+        self.assertContains(respuesta, "no-es-email")
+
+        archivo = SimpleUploadedFile('otro.csv', b"nombre,telefono\nAna,1\n", content_type='text/csv')
+        respuesta = self.client.post(reverse('cliente_importar'), {'archivo': archivo})
+        self.assertContains(respuesta, "Faltan columnas obligatorias: apellido")
+
+    def bulk_create_con_conflicto(self, lotes_con_conflicto):
+        """
+        Reemplaza Vehiculo.objects.bulk_create para que los primeros 'lotes_con_conflicto' INSERT
+        fallen como si otra conexión hubiera registrado una de las patentes después de la comprobación.
+        """
+        original = Vehiculo.objects.bulk_create
+        llamadas = []
+        def bulk_create(objetos, *args, **kwargs):
+            llamadas.append(len(objetos))
+            if len(llamadas) <= lotes_con_conflicto:
+                raise IntegrityError('UNIQUE constraint failed: gestion_vehiculo.patente')
+            return original(objetos, *args, **kwargs)
+        return mock.patch.object(Vehiculo.objects, 'bulk_create', side_effect=bulk_create)
+
+    def test_conflicto_al_insertar_rechaza_solo_su_lote(self):
+        """Verifica que un IntegrityError al insertar deshace y rechaza solo su lote, y que la importación sigue."""
+        rechazadas = []
+        with self.bulk_create_con_conflicto(1):
+            resultado = importar_clientes(leer_csv(StringIO(self.CSV)), lote=3, rechazar=lambda numero, *_: rechazadas.append(numero))
+        # Filas 2 a 4 (primer lote) rechazadas por el conflicto; 5, 7 y 8 por sus errores
+        self.assertEqual(sorted(rechazadas), [2, 3, 4, 5, 7, 8])
+        self.assertEqual(
+            (resultado['clientes_creados'], resultado['clientes_existentes'], resultado['vehiculos_creados'], resultado['rechazadas']),
+            (1, 1, 2, 6),
+        )
+        # Los clientes del lote deshecho no quedan guardados, y su patente queda libre para los lotes siguientes
+        self.assertFalse(Cliente.objects.filter(nombre__in=["Ana", "Luis"]).exists())
+        self.assertEqual(Vehiculo.objects.get(patente="IMPO01").cliente.nombre, "Raúl")
+
+    def test_vista_de_carga_con_conflicto_al_insertar(self):
+        """Verifica que la vista muestra como rechazadas las filas de un lote que falla al insertar, sin un error 500."""
+        archivo = SimpleUploadedFile('clientes.csv', self.CSV.encode(), content_type='text/csv')
+        with self.bulk_create_con_conflicto(1):
+            respuesta = self.client.post(reverse('cliente_importar'), {'archivo': archivo})
+        self.assertContains(respuesta, "8 filas rechazadas")
+        self.assertContains(respuesta, "vuelva a importarla")
+        self.assertEqual(Cliente.objects.count(), 1)
+
+class AdminTest(TestCase):
+    # Pruebas de la interfaz de administración preparada para tablas grandes
+    def setUp(self):
+        from django.contrib.auth.models import User
+        self.usuario = User.objects.create_superuser('admin', 'admin@example.com', 'clave-segura')
+        self.client.force_login(self.usuario)
+        self.cliente = Cliente.objects.create(nombre="Marta", apellido="Fuentes", telefono="922000001")
+        self.vehiculo = Vehiculo.objects.create(patente="ADMN01", marca="Mazda", modelo="3", año=2020, cliente=self.cliente)
+        self.servicio = Servicio.objects.create(nombre="Alineación", precio=15000)
+
+    def crear_ordenes(self, cantidad, prefijo="ADM"):
+        """Crea 'cantidad' órdenes ingresadas con un vehículo y un cliente distintos cada una."""
+        ordenes = []
+        for i in range(cantidad):
+            cliente = Cliente.objects.create(nombre=f"Cliente{i}", apellido="Prueba", telefono=f"93300{i:04d}")
+            vehiculo = Vehiculo.objects.create(patente=f"{prefijo}{i:03d}", marca="Kia", modelo="Rio", año=2018, cliente=cliente)
+            ordenes.append(OrdenReparacion.objects.create(vehiculo=vehiculo, fecha_ingreso=date.today()))
+        return ordenes
+
+    def test_listado_de_ordenes_usa_consultas_constantes(self):
+        """Verifica que el listado de órdenes usa las mismas consultas con 2 o con 10 órdenes."""
+        url = reverse('admin:gestion_ordenreparacion_changelist')
+        self.crear_ordenes(2)
+        with CaptureQueriesContext(connection) as pocas:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        self.crear_ordenes(8, prefijo="MAS")
+        with CaptureQueriesContext(connection) as muchas:
+            respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(len(pocas.captured_queries), len(muchas.captured_queries))
+
+    def test_busqueda_usa_indice_de_texto_completo(self):
+        """Verifica que la búsqueda de clientes, vehículos y órdenes usa el índice de texto completo."""
+        otro = Cliente.objects.create(nombre="Jorge", apellido="Lagos", telefono="922000002")
+        orden = OrdenReparacion.objects.create(vehiculo=self.vehiculo, fecha_ingreso=date.today())
+
+        respuesta = self.client.get(reverse('admin:gestion_cliente_changelist'), {'q': 'fuentes'})
+        self.assertEqual(list(respuesta.context['cl'].result_list), [self.cliente])
+        self.assertNotIn('LIKE', str(respuesta.context['cl'].queryset.query))
+        respuesta = self.client.get(reverse('admin:gestion_cliente_changelist'), {'q': 'admn01'})
+        self.assertEqual(list(respuesta.context['cl'].result_list), [self.cliente]) # Por la patente de su vehículo
+        respuesta = self.client.get(reverse('admin:gestion_vehiculo_changelist'), {'q': 'mazda'})
+        self.assertEqual(list(respuesta.context['cl'].result_list), [self.vehiculo])
+        respuesta = self.client.get(reverse('admin:gestion_ordenreparacion_changelist'), {'q': 'marta'})
+        self.assertEqual(list(respuesta.context['cl'].result_list), [orden])
+        respuesta = self.client.get(reverse('admin:gestion_ordenreparacion_changelist'), {'q': str(orden.pk)})
+        self.assertEqual(list(respuesta.context['cl'].result_list), [orden])
+
+        # El autocompletado del campo cliente usa la misma búsqueda
+        respuesta = self.client.get(reverse('admin:autocomplete'), {
+            'term': 'jorge', 'app_label': 'gestion', 'model_name': 'vehiculo', 'field_name': 'cliente',
+        })
+        self.assertEqual([resultado['id'] for resultado in respuesta.json()['results']], [str(otro.pk)])
+
+    def test_acciones_masivas_con_un_update(self):
+        """Verifica que las acciones cambian el estado y recalculan montos con un solo UPDATE."""
+        ordenes = self.crear_ordenes(3)
+        ordenes[2].estado = 'finalizado'
+        ordenes[2].save()
+        url = reverse('admin:gestion_ordenreparacion_changelist')
+        datos = {'action': 'marcar_en_progreso', admin_helpers.ACTION_CHECKBOX_NAME: [o.pk for o in ordenes]}
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.post(url, datos, follow=True)
+        updates = [q['sql'] for q in consultas.captured_queries if q['sql'].startswith('UPDATE "gestion_ordenreparacion"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(
+            list(OrdenReparacion.objects.filter(pk__in=[o.pk for o in ordenes]).order_by('pk').values_list('estado', flat=True)),
+            ['en_progreso', 'en_progreso', 'finalizado'],
+        )
+        mensajes = [str(m) for m in respuesta.context['messages']]
+        self.assertIn('2 órdenes cambiadas a "En Progreso".', mensajes)
+        self.assertIn('1 órdenes no se cambiaron porque su estado actual no lo permite.', mensajes)
+
+        ordenes[0].servicios.add(self.servicio)
+        OrdenReparacion.objects.filter(pk=ordenes[0].pk).update(monto_total=1) # Monto desviado
+        datos['action'] = 'recalcular_montos'
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.post(url, datos)
+        updates = [q['sql'] for q in consultas.captured_queries if q['sql'].startswith('UPDATE "gestion_ordenreparacion"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(OrdenReparacion.objects.get(pk=ordenes[0].pk).monto_total, 15000)
+
+    def test_eliminar_cliente_desde_admin_lo_marca_como_eliminado(self):
+        """Verifica que eliminar clientes desde el admin los marca como eliminados, con sus vehículos."""
+        url = reverse('admin:gestion_cliente_changelist')
+        datos = {'action': 'delete_selected', 'post': 'yes', admin_helpers.ACTION_CHECKBOX_NAME: [self.cliente.pk]}
+        with mock.patch('gestion.eliminacion.programar_purga') as purga:
+            respuesta = self.client.post(url, datos)
+        self.assertEqual(respuesta.status_code, 302)
+        purga.assert_called_once()
+        self.assertFalse(Cliente.objects.filter(pk=self.cliente.pk).exists())
+        self.assertIsNotNone(Cliente.todos.get(pk=self.cliente.pk).eliminado_en)
+        self.assertIsNotNone(Vehiculo.todos.get(pk=self.vehiculo.pk).eliminado_en)
+
+    def test_paginador_usa_conteo_estimado(self):
+        """Verifica que sin filtros el listado usa las estadísticas de ANALYZE en tablas grandes."""
+        from .admin import PaginadorEstimado, UMBRAL_CONTEO_ESTIMADO
+        self.crear_ordenes(3)
+        base = OrdenReparacion.objects.visibles()
+        self.assertEqual(PaginadorEstimado(base.order_by('pk'), 50, base=base).count, 3) # Sin estadísticas
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+            cursor.execute("UPDATE sqlite_stat1 SET stat = %s WHERE tbl = 'gestion_ordenreparacion'", [f'{UMBRAL_CONTEO_ESTIMADO} 1'])
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(PaginadorEstimado(base.order_by('pk'), 50, base=base).count, UMBRAL_CONTEO_ESTIMADO)
+        self.assertFalse(any('COUNT' in q['sql'] for q in consultas.captured_queries))
+        # Con un filtro se cuentan las filas
+        self.assertEqual(PaginadorEstimado(base.filter(estado='ingresado'), 50, base=base).count, 3)
+
+class ClienteEstadisticasTest(TestCase):
+    # Pruebas de la ficha del cliente y de las columnas de estadísticas del listado de clientes
+    def setUp(self):
+        self.cliente = Cliente.objects.create(nombre="Elena", apellido="Muñoz", telefono="977000001")
+        self.otro = Cliente.objects.create(nombre="Tomás", apellido="Ibarra", telefono="977000002")
+        Cliente.objects.create(nombre="Sin", apellido="Visitas", telefono="977000003")
+        self.auto = Vehiculo.objects.create(patente="ESTA01", marca="Kia", modelo="Rio", año=2019, cliente=self.cliente)
+        self.camioneta = Vehiculo.objects.create(patente="ESTA02", marca="Ford", modelo="Ranger", año=2022, cliente=self.cliente)
+        otro_auto = Vehiculo.objects.create(patente="ESTA03", marca="Fiat", modelo="Uno", año=2012, cliente=self.otro)
+        servicio = Servicio.objects.create(nombre="Frenos", precio=40000)
+        hace_dos_anos = date.today() - timedelta(days=730)
+        # Dos órdenes antiguas finalizadas (se archivan), una en progreso y una ingresada
+        for vehiculo, fecha, estado in [
+            (self.auto, hace_dos_anos, 'finalizado'),
+            (self.camioneta, hace_dos_anos, 'finalizado'),
+            (self.auto, date.today() - timedelta(days=3), 'en_progreso'),
+            (self.camioneta, date.today(), 'ingresado'),
+            (otro_auto, date.today() - timedelta(days=10), 'ingresado'),
+        ]:
+            orden = OrdenReparacion.objects.create(
+                vehiculo=vehiculo, fecha_ingreso=fecha, estado=estado,
+                fecha_salida=fecha if estado == 'finalizado' else None,
+            )
+            orden.servicios.add(servicio)
+        call_command('archive_orders', older_than=365, stdout=StringIO())
+
+    def test_ficha_del_cliente(self):
+        """Verifica que la ficha muestra los totales, las órdenes por estado y los vehículos, incluidas las archivadas."""
+        respuesta = self.client.get(reverse('cliente_detail', args=[self.cliente.pk]))
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.context['totales'], {
+            'ordenes': 4, 'gasto_total': 160000, 'ultima_visita': date.today(),
+        })
+        por_estado = {fila['estado']: fila for fila in respuesta.context['por_estado']}
+        self.assertEqual(por_estado['finalizado']['cantidad'], 2)
+        self.assertEqual(por_estado['finalizado']['monto'], 80000)
+        self.assertEqual(por_estado['en_progreso']['ultima_visita'], date.today() - timedelta(days=3))
+        vehiculos = {vehiculo.patente: vehiculo for vehiculo in respuesta.context['vehiculos']}
+        self.assertEqual(vehiculos['ESTA01'].ordenes, 2)
+        self.assertEqual(vehiculos['ESTA01'].gasto_total, 80000)
+        self.assertEqual(vehiculos['ESTA01'].ultima_visita, date.today() - timedelta(days=3))
+        self.assertEqual(vehiculos['ESTA02'].ultima_visita, date.today())
+        self.assertContains(respuesta, "ESTA02")
+        self.assertEqual(self.client.get(reverse('cliente_detail', args=[9999])).status_code, 404)
+
+    def test_ficha_con_consultas_constantes(self):
+        """Verifica que la ficha usa las mismas consultas sin importar cuántos vehículos y órdenes tenga el cliente."""
+        url = reverse('cliente_detail', args=[self.cliente.pk])
+        with CaptureQueriesContext(connection) as pocas:
+            self.client.get(url)
+        for i in range(5):
+            vehiculo = Vehiculo.objects.create(patente=f"MAS{i:03d}", marca="Kia", modelo="Rio", año=2018, cliente=self.cliente)
+            for _ in range(3):
+                OrdenReparacion.objects.create(vehiculo=vehiculo, fecha_ingreso=date.today())
+        with CaptureQueriesContext(connection) as muchas:
+            respuesta = self.client.get(url)
+        self.assertEqual(respuesta.context['totales']['ordenes'], 19)
+        self.assertEqual(len(pocas.captured_queries), len(muchas.captured_queries))
+
+    @override_settings(CACHE_LISTADOS_ACTIVA=True)
+    def test_listado_con_estadisticas_ordenable(self):
+        """Verifica que el listado muestra las estadísticas a pedido, ordena por ellas y no cachea esa variante."""
+        cache.clear()
+        respuesta = self.client.get(reverse('cliente_list'))
+        self.assertNotContains(respuesta, "Última Visita")
+
+        respuesta = self.client.get(reverse('cliente_list'), {'orden': '-gasto_total'})
+        clientes = list(respuesta.context['clientes'])
+        self.assertEqual([c.pk for c in clientes[:2]], [self.cliente.pk, self.otro.pk])
+        self.assertEqual((clientes[2].ordenes, clientes[2].gasto_total, clientes[2].ultima_visita), (0, 0, None))
+        self.assertContains(respuesta, "Última Visita")
+
+        # Los clientes sin visitas quedan al final también en orden ascendente
+        respuesta = self.client.get(reverse('cliente_list'), {'orden': 'ultima_visita'})
+        self.assertEqual([c.pk for c in respuesta.context['clientes']][:2], [self.otro.pk, self.cliente.pk])
+        self.assertEqual(self.client.get(reverse('cliente_list'), {'orden': 'telefono'}).status_code, 400)
+
+        # Una orden nueva se ve de inmediato, aunque no cambie ningún cliente
+        OrdenReparacion.objects.create(vehiculo=Vehiculo.objects.get(patente="ESTA03"), fecha_ingreso=date.today())
+        respuesta = self.client.get(reverse('cliente_list'), {'orden': 'ultima_visita'})
+        otro = next(c for c in respuesta.context['clientes'] if c.pk == self.otro.pk)
+        self.assertEqual((otro.ordenes, otro.ultima_visita), (2, date.today()))
+
+    async def test_listado_asincrono_con_estadisticas(self):
+        """Verifica que la vista asíncrona del listado también muestra y ordena las estadísticas."""
+        respuesta = await self.async_client.get(reverse('cliente_list'), {'orden': '-ordenes'})
+        self.assertEqual(respuesta.resolver_match.func.__module__, 'gestion.vistas_async')
+        self.assertEqual(respuesta.context['clientes'][0].pk, self.cliente.pk)
+        self.assertContains(respuesta, "Última Visita")
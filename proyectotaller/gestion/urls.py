@@ -4,12 +4,14 @@
 # permitiendo la navegación y el acceso a las diferentes funcionalidades de la aplicación.
 
 from django.urls import path
-from . import views
+from . import api, views
 
 urlpatterns = [
     # URLs para la gestión de Clientes
     path('clientes/', views.cliente_list, name='cliente_list'), # Lista todos los clientes
     path('clientes/new/', views.cliente_create, name='cliente_create'), # Crea un nuevo cliente
+    path('clientes/importar/', views.cliente_importar, name='cliente_importar'), # Importa clientes y vehículos desde un CSV
+    path('clientes/<int:pk>/', views.cliente_detail, name='cliente_detail'), # Ficha de un cliente con sus vehículos y estadísticas
     path('clientes/<int:pk>/edit/', views.cliente_update, name='cliente_update'), # Edita un cliente existente por su ID
     path('clientes/<int:pk>/delete/', views.cliente_delete, name='cliente_delete'), # Elimina un cliente existente por su ID
 
@@ -18,6 +20,7 @@ urlpatterns = [
     path('vehiculos/new/', views.vehiculo_create, name='vehiculo_create'), # Crea un nuevo vehículo
     path('vehiculos/<int:pk>/edit/', views.vehiculo_update, name='vehiculo_update'), # Edita un vehículo existente por su ID
     path('vehiculos/<int:pk>/delete/', views.vehiculo_delete, name='vehiculo_delete'), # Elimina un vehículo existente por su ID
+    path('vehiculos/<str:patente>/historial/', views.vehiculo_historial, name='vehiculo_historial'), # Historial de órdenes de un vehículo (incluye las archivadas)
 
     # URLs para la gestión de Servicios
     path('servicios/', views.servicio_list, name='servicio_list'), # Lista todos los servicios
@@ -28,6 +31,28 @@ urlpatterns = [
     # URLs para la gestión de Órdenes de Reparación
     path('ordenes/', views.orden_reparacion_list, name='orden_reparacion_list'), # Lista todas las órdenes de reparación
     path('ordenes/new/', views.orden_reparacion_create, name='orden_reparacion_create'), # Crea una nueva orden de reparación
+    path('ordenes/estado/', views.orden_reparacion_cambiar_estado, name='orden_reparacion_cambiar_estado'), # Cambia el estado de varias órdenes a la vez
+    path('ordenes/exportar/', views.orden_reparacion_exportar, name='orden_reparacion_exportar'), # Exporta las órdenes en CSV o NDJSON
+    path('ordenes/recalcular/', views.orden_reparacion_recalcular, name='orden_reparacion_recalcular'), # Encola el recálculo de los montos totales
     path('ordenes/<int:pk>/edit/', views.orden_reparacion_update, name='orden_reparacion_update'), # Edita una orden de reparación existente por su ID
     path('ordenes/<int:pk>/delete/', views.orden_reparacion_delete, name='orden_reparacion_delete'), # Elimina una orden de reparación existente por su ID
+
+    # URL de búsqueda global de clientes y vehículos
+    path('buscar/', views.buscar, name='buscar'), # Busca por nombre, teléfono, email o patente
+
+    # URLs de autocompletado (JSON) para los campos de selección de los formularios
+    path('autocompletar/vehiculos/', views.autocompletar_vehiculos, name='autocompletar_vehiculos'), # Vehículos por prefijo de patente
+    path('autocompletar/servicios/', views.autocompletar_servicios, name='autocompletar_servicios'), # Servicios por prefijo de nombre
+
+    # URLs de la API JSON de solo lectura (paginada por cursor, con ETag)
+    path('api/ordenes/', api.api_ordenes, name='api_ordenes'), # Órdenes de reparación
+    path('api/vehiculos/', api.api_vehiculos, name='api_vehiculos'), # Vehículos
+    path('api/clientes/', api.api_clientes, name='api_clientes'), # Clientes
+    path('api/servicios/', api.api_servicios, name='api_servicios'), # Servicios
+
+    # URL de estado de las tareas en segundo plano (JSON)
+    path('tareas/<int:pk>/', views.tarea_estado, name='tarea_estado'), # Estado, avance y resultado de una tarea
+
+    # URL de métricas (contadores de la caché de listados)
+    path('metricas/', views.metricas, name='metricas'), # Contadores en formato Prometheus
 ]
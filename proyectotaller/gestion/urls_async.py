@@ -0,0 +1,13 @@
+# gestion/urls_async.py
+# Este archivo define las rutas URL de 'gestion' que se usan al servir la aplicación con ASGI.
+# Son las mismas rutas de urls.py (mismos caminos y nombres), pero las vistas que tienen una
+# versión asíncrona en vistas_async.py se reemplazan por ella; el resto se mantiene igual.
+
+from django.urls import path
+from . import urls, vistas_async
+
+urlpatterns = [
+    path(str(patron.pattern), getattr(vistas_async, patron.callback.__name__), name=patron.name)
+    if hasattr(vistas_async, patron.callback.__name__) else patron
+    for patron in urls.urlpatterns
+]
@@ -3,26 +3,167 @@
 # Cada función maneja una solicitud HTTP específica, interactúa con los modelos
 # y formularios, y renderiza una plantilla HTML para mostrar la respuesta al usuario.
 
+import csv
+import io
+
+from django.contrib import messages
+from django.db.models import Q
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
-from .models import Cliente, Vehiculo, Servicio, OrdenReparacion
-from .forms import ClienteForm, VehiculoForm, ServicioForm, OrdenReparacionForm
+from django.urls import reverse
+from django.utils.http import url_has_allowed_host_and_scheme
+from django.views.decorators.http import require_POST
+from .models import Cliente, Vehiculo, Servicio, OrdenReparacion, Tarea
+from .archivo import pagina_historial
+from .busqueda import buscar as buscar_clientes
+from .cache import cache_por_version, contadores
+from .eliminacion import eliminar_cliente, eliminar_vehiculo
+from .estadisticas import anotar_estadisticas, ordenar_por_estadistica, pide_estadisticas, resumen_por_estado
+from .exportacion import TIPOS_CONTENIDO, exportar_ordenes
+from .importacion import COLUMNAS_CLIENTE, COLUMNAS_VEHICULO, ArchivoInvalido, importar_clientes, leer_csv
+from .forms import ClienteForm, VehiculoForm, ServicioForm, OrdenReparacionForm, FiltroExportacionForm, ImportacionClientesForm
+from .kpis import obtener_kpis
+from .ordenes import guardar_orden_reparacion
+from .paginacion import CursorInvalido, leer_tamano_pagina, paginar_keyset
+from .tareas import encolar
+
+# Filas rechazadas que se muestran, como máximo, al importar clientes desde la interfaz.
+FILAS_RECHAZADAS_VISIBLES = 200
 
 # --- Vista de Inicio ---
 def home(request):
     """
     Vista de la página de inicio.
-    Renderiza la plantilla 'home.html' y pasa un título al contexto.
+    Renderiza la plantilla 'home.html' con el panel de indicadores (órdenes por estado,
+    ingresos por mes y órdenes pendientes), leídos de la tabla de resumen en una sola consulta.
+    """
+    return render(request, 'gestion/home.html', {'titulo': 'Sistema de Gestión de Taller Automotriz', 'kpis': obtener_kpis()})
+
+# --- Vista de Métricas ---
+def metricas(request):
+    """
+    Expone los contadores de aciertos y fallos de la caché de listados en formato de texto
+    de Prometheus, para que puedan ser recolectados periódicamente.
+    """
+    lineas = [
+        '# HELP gestion_cache_aciertos_total Respuestas de listados servidas desde la caché.',
+        '# TYPE gestion_cache_aciertos_total counter',
+    ]
+    valores = contadores()
+    lineas += [f'gestion_cache_aciertos_total{{vista="{vista}"}} {c["aciertos"]}' for vista, c in valores.items()]
+    lineas += [
+        '# HELP gestion_cache_fallos_total Respuestas de listados generadas por no estar en la caché.',
+        '# TYPE gestion_cache_fallos_total counter',
+    ]
+    lineas += [f'gestion_cache_fallos_total{{vista="{vista}"}} {c["fallos"]}' for vista, c in valores.items()]
+    return HttpResponse('\n'.join(lineas) + '\n', content_type='text/plain; version=0.0.4; charset=utf-8')
+
+# --- Vista de Búsqueda ---
+def buscar(request):
+    """
+    Búsqueda global de clientes por nombre, teléfono, email o patente de sus vehículos.
+    Usa el índice de texto completo (ver busqueda.py) y devuelve los clientes ordenados por
+    relevancia junto con sus vehículos, en un número fijo de consultas.
+    """
+    q = request.GET.get('q', '').strip()
+    resultados = buscar_clientes(q) if q else []
+    return render(request, 'gestion/busqueda.html', {'q': q, 'resultados': resultados, 'titulo': 'Buscar Clientes y Vehículos'})
+
+# --- Vistas de Autocompletado ---
+# Límite de sugerencias devueltas por los endpoints de autocompletado.
+LIMITE_AUTOCOMPLETAR = 20
+
+def filtro_prefijo(campo, prefijo):
     """
-    return render(request, 'gestion/home.html', {'titulo': 'Sistema de Gestión de Taller Automotriz'})
+    Devuelve un filtro Q para los valores de 'campo' que comienzan con 'prefijo'.
+    Se expresa como el rango [prefijo, prefijo + '\uffff') en lugar de LIKE 'prefijo%',
+    porque SQLite solo puede resolver un rango con el índice del campo.
+    """
+    return Q(**{f'{campo}__gte': prefijo, f'{campo}__lt': prefijo + '\uffff'})
+
+def autocompletar_vehiculos(request):
+    """
+    Devuelve en JSON los vehículos cuya patente comienza con el texto del parámetro 'q'.
+    Usa el índice único de 'patente' y nunca devuelve más de LIMITE_AUTOCOMPLETAR resultados.
+    """
+    prefijo = request.GET.get('q', '').strip().upper() # Las patentes se guardan en mayúsculas (ver VehiculoForm.clean_patente)
+    vehiculos = Vehiculo.objects.filter(filtro_prefijo('patente', prefijo)).order_by('patente')
+    resultados = [{'id': vehiculo.pk, 'texto': str(vehiculo)} for vehiculo in vehiculos[:LIMITE_AUTOCOMPLETAR]]
+    return JsonResponse({'resultados': resultados})
+
+def autocompletar_servicios(request):
+    """
+    Devuelve en JSON los servicios cuyo nombre comienza con el texto del parámetro 'q'.
+    Se busca el texto tal como se escribió y con la primera letra en mayúscula, usando el índice único de 'nombre'.
+    """
+    prefijo = request.GET.get('q', '').strip()
+    filtro = filtro_prefijo('nombre', prefijo) | filtro_prefijo('nombre', prefijo[:1].upper() + prefijo[1:])
+    servicios = Servicio.objects.filter(filtro).order_by('nombre')
+    resultados = [{'id': servicio.pk, 'texto': str(servicio)} for servicio in servicios[:LIMITE_AUTOCOMPLETAR]]
+    return JsonResponse({'resultados': resultados})
+
+# --- Vista de Estado de Tareas ---
+def tarea_estado(request, pk):
+    """
+    Devuelve en JSON el estado, el avance y el resultado (o el error) de una tarea en segundo plano.
+    """
+    tarea = get_object_or_404(Tarea, pk=pk)
+    return JsonResponse({
+        'id': tarea.pk,
+        'nombre': tarea.nombre,
+        'estado': tarea.estado,
+        'intentos': tarea.intentos,
+        'progreso': tarea.progreso,
+        'total': tarea.total,
+        'mensaje': tarea.mensaje,
+        'resultado': tarea.resultado,
+        'error': tarea.error.strip().splitlines()[-1] if tarea.error else '', # Solo la última línea de la traza
+    })
 
 # --- Vistas para Cliente ---
+@cache_por_version(Cliente, omitir=pide_estadisticas)
 def cliente_list(request):
     """
     Lista todos los clientes existentes.
     Recupera todos los objetos Cliente de la base de datos y los pasa a la plantilla.
+    La respuesta se cachea hasta que cambie algún cliente (ver cache.py).
+    Con 'estadisticas' en la URL agrega la cantidad de órdenes, el monto total y la última visita de
+    cada cliente (ver estadisticas.py), y con 'orden' (por ejemplo '-gasto_total') ordena por ellas.
+    Esa variante no se cachea.
     """
     clientes = Cliente.objects.all()
-    return render(request, 'gestion/cliente_list.html', {'clientes': clientes, 'titulo': 'Listado de Clientes'})
+    estadisticas = pide_estadisticas(request)
+    orden = request.GET.get('orden', '')
+    if estadisticas:
+        clientes = anotar_estadisticas(clientes, 'vehiculo__cliente')
+        if orden:
+            clientes = ordenar_por_estadistica(clientes, orden)
+            if clientes is None:
+                return HttpResponseBadRequest("Columna de orden inválida.")
+    return render(request, 'gestion/cliente_list.html', {
+        'clientes': clientes,
+        'estadisticas': estadisticas,
+        'orden': orden,
+        'titulo': 'Listado de Clientes',
+    })
+
+def cliente_detail(request, pk):
+    """
+    Muestra la ficha de un cliente: sus vehículos con la cantidad de órdenes, el monto total y la
+    última visita de cada uno, y sus órdenes por estado con los totales del cliente.
+    Incluye las órdenes archivadas y usa tres consultas sin importar cuántos vehículos u órdenes
+    tenga el cliente (ver estadisticas.py).
+    """
+    cliente = get_object_or_404(Cliente, pk=pk) # Obtiene el cliente o devuelve un 404
+    vehiculos = anotar_estadisticas(cliente.vehiculos.order_by('patente'), 'vehiculo')
+    por_estado, totales = resumen_por_estado(cliente)
+    return render(request, 'gestion/cliente_detail.html', {
+        'cliente': cliente,
+        'vehiculos': vehiculos,
+        'por_estado': por_estado,
+        'totales': totales,
+        'titulo': f'Cliente {cliente.nombre} {cliente.apellido}',
+    })
 
 def cliente_create(request):
     """
@@ -38,6 +179,38 @@ def cliente_create(request):
         form = ClienteForm() # Crea un formulario vacío para GET
     return render(request, 'gestion/cliente_form.html', {'form': form, 'titulo': 'Crear Cliente'})
 
+def cliente_importar(request):
+    """
+    Importa clientes y vehículos desde un archivo CSV subido (ver importacion.py).
+    El archivo se lee fila a fila y se guarda por lotes; las filas rechazadas se muestran con sus errores.
+    """
+    resultado, rechazadas = None, []
+    if request.method == 'POST':
+        form = ImportacionClientesForm(request.POST, request.FILES)
+        if form.is_valid():
+            def rechazar(numero, fila, errores):
+                if len(rechazadas) < FILAS_RECHAZADAS_VISIBLES:
+                    rechazadas.append({
+                        'numero': numero,
+                        'errores': errores,
+                        'valores': [fila.get(columna) or '' for columna in COLUMNAS_CLIENTE + COLUMNAS_VEHICULO],
+                    })
+            # 'utf-8-sig' acepta también los CSV guardados por Excel (con BOM)
+            archivo = io.TextIOWrapper(form.cleaned_data['archivo'].file, encoding='utf-8-sig', newline='')
+            try:
+                resultado = importar_clientes(leer_csv(archivo), rechazar=rechazar)
+            except (ArchivoInvalido, UnicodeDecodeError, csv.Error) as exc:
+                form.add_error('archivo', f"No se pudo leer el archivo: {exc}")
+    else:
+        form = ImportacionClientesForm()
+    return render(request, 'gestion/cliente_import.html', {
+        'form': form,
+        'resultado': resultado,
+        'rechazadas': rechazadas,
+        'columnas': COLUMNAS_CLIENTE + COLUMNAS_VEHICULO,
+        'titulo': 'Importar Clientes y Vehículos',
+    })
+
 def cliente_update(request, pk):
     """
     Maneja la actualización de un cliente existente.
@@ -57,20 +230,24 @@ def cliente_delete(request, pk):
     """
     Maneja la eliminación de un cliente.
     Muestra una página de confirmación y elimina el cliente si la solicitud es POST.
+    El cliente y sus vehículos se marcan como eliminados y se ocultan de inmediato; sus datos
+    se borran después en segundo plano (ver eliminacion.py).
     """
     cliente = get_object_or_404(Cliente, pk=pk) # Obtiene el cliente o devuelve un 404
     if request.method == 'POST':
-        cliente.delete() # Elimina el cliente de la base de datos
+        eliminar_cliente(cliente) # Marca el cliente y sus vehículos como eliminados y programa la purga
         return redirect('cliente_list') # Redirige a la lista de clientes
     return render(request, 'gestion/cliente_confirm_delete.html', {'cliente': cliente, 'titulo': 'Eliminar Cliente'})
 
 # --- Vistas para Vehiculo ---
+@cache_por_version(Vehiculo, Cliente)
 def vehiculo_list(request):
     """
     Lista todos los vehículos existentes.
-    Recupera todos los objetos Vehiculo de la base de datos y los pasa a la plantilla.
+    Recupera todos los objetos Vehiculo junto con su cliente (en la misma consulta) y los pasa a la plantilla.
+    La respuesta se cachea hasta que cambie algún vehículo o cliente (ver cache.py).
     """
-    vehiculos = Vehiculo.objects.all()
+    vehiculos = Vehiculo.objects.select_related('cliente')
     return render(request, 'gestion/vehiculo_list.html', {'vehiculos': vehiculos, 'titulo': 'Listado de Vehículos'})
 
 def vehiculo_create(request):
@@ -106,18 +283,46 @@ def vehiculo_delete(request, pk):
     """
     Maneja la eliminación de un vehículo.
     Muestra una página de confirmación y elimina el vehículo si la solicitud es POST.
+    El vehículo se marca como eliminado y se oculta de inmediato; sus órdenes se borran
+    después en segundo plano (ver eliminacion.py).
     """
     vehiculo = get_object_or_404(Vehiculo, pk=pk) # Obtiene el vehículo o devuelve un 404
     if request.method == 'POST':
-        vehiculo.delete() # Elimina el vehículo de la base de datos
+        eliminar_vehiculo(vehiculo) # Marca el vehículo como eliminado y programa la purga
         return redirect('vehiculo_list') # Redirige a la lista de vehículos
     return render(request, 'gestion/vehiculo_confirm_delete.html', {'vehiculo': vehiculo, 'titulo': 'Eliminar Vehículo'})
 
+def vehiculo_historial(request, patente):
+    """
+    Muestra el historial de órdenes de un vehículo, identificado por su patente, con sus servicios,
+    de la más reciente a la más antigua. Incluye las órdenes archivadas (ver archivo.py).
+    Se pagina por cursor como el listado de órdenes ('despues', 'antes' y 'n' en la URL), así que
+    cada página usa las mismas consultas aunque el vehículo tenga miles de órdenes.
+    """
+    vehiculo = get_object_or_404(Vehiculo.objects.select_related('cliente'), patente=patente) # Obtiene el vehículo o devuelve un 404
+    try:
+        pagina = pagina_historial( # Órdenes activas y archivadas con sus servicios
+            despues=request.GET.get('despues'),
+            antes=request.GET.get('antes'),
+            tamano=leer_tamano_pagina(request),
+            vehiculo=vehiculo,
+        )
+    except CursorInvalido:
+        raise Http404("Cursor de paginación inválido.")
+    return render(request, 'gestion/vehiculo_historial.html', {
+        'vehiculo': vehiculo,
+        'ordenes': pagina.objetos,
+        'pagina': pagina,
+        'titulo': f'Historial del Vehículo {vehiculo.patente}',
+    })
+
 # --- Vistas para Servicio ---
+@cache_por_version(Servicio)
 def servicio_list(request):
     """
     Lista todos los servicios existentes.
     Recupera todos los objetos Servicio de la base de datos y los pasa a la plantilla.
+    La respuesta se cachea hasta que cambie algún servicio (ver cache.py).
     """
     servicios = Servicio.objects.all()
     return render(request, 'gestion/servicio_list.html', {'servicios': servicios, 'titulo': 'Listado de Servicios'})
@@ -165,25 +370,96 @@ def servicio_delete(request, pk):
 # --- Vistas para OrdenReparacion ---
 def orden_reparacion_list(request):
     """
-    Lista todas las órdenes de reparación existentes.
-    Recupera todas las órdenes de reparación y las ordena por fecha de ingreso descendente.
-    """
-    ordenes = OrdenReparacion.objects.all().order_by('-fecha_ingreso')
-    return render(request, 'gestion/orden_reparacion_list.html', {'ordenes': ordenes, 'titulo': 'Listado de Órdenes de Reparación'})
+    Lista las órdenes de reparación paginadas por cursor, de la más reciente a la más antigua.
+    Los parámetros 'despues' y 'antes' de la URL indican desde qué orden continuar y 'n' el tamaño de página.
+    El vehículo y el cliente se obtienen con un JOIN y los servicios con una sola consulta adicional,
+    de modo que cada página usa un número fijo de consultas sin importar cuántas órdenes muestre.
+    """
+    ordenes = (
+        OrdenReparacion.objects
+        .visibles() # Sin las órdenes de vehículos eliminados pendientes de purga
+        .select_related('vehiculo__cliente') # Vehículo y cliente en la misma consulta
+        .prefetch_related('servicios') # Servicios de toda la página en una sola consulta
+    )
+    try:
+        pagina = paginar_keyset(
+            ordenes,
+            'fecha_ingreso',
+            despues=request.GET.get('despues'),
+            antes=request.GET.get('antes'),
+            tamano=leer_tamano_pagina(request),
+        )
+    except CursorInvalido:
+        raise Http404("Cursor de paginación inválido.")
+    return render(request, 'gestion/orden_reparacion_list.html', {'ordenes': pagina, 'pagina': pagina, 'titulo': 'Listado de Órdenes de Reparación'})
+
+@require_POST
+def orden_reparacion_cambiar_estado(request):
+    """
+    Cambia el estado de varias órdenes de reparación a la vez (acción masiva del listado).
+    Recibe los IDs en 'ordenes' y el nuevo estado en 'estado', y actualiza todas las órdenes
+    cuya transición esté permitida con un único UPDATE (ver OrdenReparacionQuerySet.cambiar_estado).
+    Responde en JSON si el cliente lo pide (cabecera Accept); si no, vuelve al listado con un mensaje.
+    """
+    estado = request.POST.get('estado', '')
+    try:
+        ids = {int(pk) for pk in request.POST.getlist('ordenes')}
+        actualizadas = OrdenReparacion.objects.visibles().filter(pk__in=ids).cambiar_estado(estado)
+    except ValueError:
+        return HttpResponseBadRequest("Estado u órdenes inválidos.")
+    omitidas = len(ids) - actualizadas
+
+    if 'application/json' in request.headers.get('Accept', ''):
+        return JsonResponse({'actualizadas': actualizadas, 'omitidas': omitidas})
+    etiqueta = dict(OrdenReparacion.ESTADO_CHOICES)[estado]
+    messages.success(request, f'{actualizadas} órdenes cambiadas a "{etiqueta}".')
+    if omitidas:
+        messages.warning(request, f'{omitidas} órdenes no se cambiaron porque su estado actual no lo permite.')
+    volver = request.POST.get('volver', '')
+    if not url_has_allowed_host_and_scheme(volver, allowed_hosts={request.get_host()}):
+        volver = reverse('orden_reparacion_list')
+    return redirect(volver)
+
+def orden_reparacion_exportar(request):
+    """
+    Exporta todas las órdenes de reparación, con su vehículo, su cliente y sus servicios, en CSV
+    (formato=csv, una fila por servicio) o NDJSON (formato=ndjson, un objeto por orden).
+    Admite los filtros 'desde' y 'hasta' (fecha de ingreso), 'estado' y 'archivadas'.
+    La respuesta se genera y se envía por lotes (ver exportacion.py), sin cargar toda la tabla en memoria.
+    """
+    form = FiltroExportacionForm(request.GET)
+    if not form.is_valid():
+        return HttpResponseBadRequest("Filtros de exportación inválidos.")
+    filtros = form.cleaned_data
+    formato = filtros.pop('formato')
+    respuesta = StreamingHttpResponse(exportar_ordenes(formato, **filtros), content_type=TIPOS_CONTENIDO[formato])
+    respuesta['Content-Disposition'] = f'attachment; filename="ordenes.{formato}"'
+    return respuesta
+
+@require_POST
+def orden_reparacion_recalcular(request):
+    """
+    Encola el recálculo de los montos totales de las órdenes no finalizadas (ver ordenes.recalcular_totales)
+    y responde de inmediato, sin esperar a que termine. El avance se consulta en la vista tarea_estado.
+    Responde en JSON si el cliente lo pide (cabecera Accept); si no, vuelve al listado con un mensaje.
+    """
+    tarea = encolar('recalcular_totales', unica=True)
+    estado = reverse('tarea_estado', args=[tarea.pk])
+    if 'application/json' in request.headers.get('Accept', ''):
+        return JsonResponse({'tarea': tarea.pk, 'estado': estado}, status=202)
+    messages.success(request, f'Recálculo de montos encolado (tarea N°{tarea.pk}, estado en {estado}).')
+    return redirect('orden_reparacion_list')
 
 def orden_reparacion_create(request):
     """
     Maneja la creación de una nueva orden de reparación.
     Si la solicitud es POST, procesa el formulario; de lo contrario, muestra un formulario vacío.
-    Calcula el monto total después de guardar los servicios.
+    La orden, sus servicios y el monto total se guardan en una sola transacción.
     """
     if request.method == 'POST':
         form = OrdenReparacionForm(request.POST)
         if form.is_valid():
-            orden = form.save(commit=False) # Guarda la instancia del modelo sin guardar en la base de datos aún
-            orden.save() # Guarda la instancia del modelo
-            form.save_m2m() # Guarda la relación ManyToMany (servicios)
-            orden.calcular_monto_total() # Calcula el monto total después de guardar los servicios
+            guardar_orden_reparacion(form) # Guarda orden, servicios y monto total en una sola transacción
             return redirect('orden_reparacion_list') # Redirige a la lista de órdenes de reparación
     else:
         form = OrdenReparacionForm() # Crea un formulario vacío para GET
@@ -193,16 +469,13 @@ def orden_reparacion_update(request, pk):
     """
     Maneja la actualización de una orden de reparación existente.
     Recupera la orden por su clave primaria (pk) y pre-rellena el formulario.
-    Recalcula el monto total después de actualizar los servicios.
+    La orden, sus servicios y el monto total se guardan en una sola transacción.
     """
-    orden = get_object_or_404(OrdenReparacion, pk=pk) # Obtiene la orden de reparación o devuelve un 404
+    orden = get_object_or_404(OrdenReparacion.objects.visibles(), pk=pk) # Obtiene la orden de reparación o devuelve un 404
     if request.method == 'POST':
         form = OrdenReparacionForm(request.POST, instance=orden) # Vincula el formulario con los datos POST y la instancia existente
         if form.is_valid():
-            orden = form.save(commit=False) # Guarda la instancia del modelo sin guardar en la base de datos aún
-            orden.save() # Guarda la instancia del modelo
-            form.save_m2m() # Guarda la relación ManyToMany (servicios)
-            orden.calcular_monto_total() # Recalcula el monto total
+            guardar_orden_reparacion(form) # Guarda orden, servicios y monto total en una sola transacción
             return redirect('orden_reparacion_list') # Redirige a la lista de órdenes de reparación
     else:
         form = OrdenReparacionForm(instance=orden) # Crea un formulario pre-rellenado para GET
@@ -213,7 +486,7 @@ def orden_reparacion_delete(request, pk):
     Maneja la eliminación de una orden de reparación.
     Muestra una página de confirmación y elimina la orden si la solicitud es POST.
     """
-    orden = get_object_or_404(OrdenReparacion, pk=pk) # Obtiene la orden de reparación o devuelve un 404
+    orden = get_object_or_404(OrdenReparacion.objects.visibles(), pk=pk) # Obtiene la orden de reparación o devuelve un 404
     if request.method == 'POST':
         orden.delete() # Elimina la orden de reparación de la base de datos
         return redirect('orden_reparacion_list') # Redirige a la lista de órdenes de reparación
@@ -0,0 +1,213 @@
+# gestion/vistas_async.py
+# Este archivo contiene las versiones asíncronas de las vistas de inicio, listados y formularios.
+# Cuando la aplicación se sirve con ASGI (por ejemplo con uvicorn), EnrutamientoAsyncMiddleware
+# dirige las solicitudes a estas vistas (ver proyectotaller/urls_async.py); con WSGI se siguen
+# usando las vistas síncronas de views.py.
+#
+# Las consultas se hacen con el ORM asíncrono de Django, de modo que mientras una solicitud
+# espera a la base de datos o a un cliente lento el bucle de eventos atiende a las demás.
+# Los datos se cargan por completo antes de renderizar, y el renderizado (que puede consultar
+# la sesión o las opciones de un formulario) se ejecuta fuera del bucle de eventos.
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import Http404, HttpResponseBadRequest
+from django.shortcuts import render, redirect
+from .models import Cliente, Vehiculo, Servicio, OrdenReparacion
+from .cache import cache_por_version
+from .estadisticas import anotar_estadisticas, ordenar_por_estadistica, pide_estadisticas
+from .forms import ClienteForm, VehiculoForm, ServicioForm, OrdenReparacionForm
+from .kpis import obtener_kpis
+from .ordenes import guardar_orden_reparacion
+from .paginacion import CursorInvalido, apaginar_keyset, leer_tamano_pagina
+
+# Renderizado de plantillas en un hilo, para no bloquear el bucle de eventos ni
+# hacer consultas síncronas desde él.
+renderizar = sync_to_async(render)
+
+
+class EnrutamientoAsyncMiddleware:
+    """
+    Middleware que, cuando la aplicación se ejecuta bajo ASGI, resuelve las URLs con
+    ROOT_URLCONF_ASYNC (las vistas asíncronas) en lugar de ROOT_URLCONF.
+    Bajo WSGI Django lo construye en modo síncrono y se desactiva solo.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.urlconf = getattr(settings, 'ROOT_URLCONF_ASYNC', None)
+        if not iscoroutinefunction(get_response) or not self.urlconf:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        markcoroutinefunction(self)
+
+    async def __call__(self, request):
+        request.urlconf = self.urlconf
+        return await self.get_response(request)
+
+
+async def obtener_o_404(queryset, **filtros):
+    """
+    Equivalente asíncrono de get_object_or_404 para un queryset.
+    """
+    try:
+        return await queryset.aget(**filtros)
+    except queryset.model.DoesNotExist:
+        raise Http404(f"No existe {queryset.model._meta.verbose_name} con esos datos.")
+
+
+async def listar(queryset):
+    """
+    Carga todas las filas de un queryset con el ORM asíncrono, sin caché intermedia.
+    """
+    return [objeto async for objeto in queryset.aiterator()]
+
+
+async def procesar_formulario(request, clase_formulario, plantilla, titulo, destino, instancia=None, guardar=None):
+    """
+    Lógica común de las vistas de creación y edición: valida y guarda el formulario en un POST
+    (la validación consulta la base de datos, por eso se ejecuta en un hilo) o lo muestra en un GET.
+    'guardar' permite reemplazar form.save, por ejemplo para las órdenes de reparación.
+    """
+    if request.method == 'POST':
+        form = clase_formulario(request.POST, instance=instancia)
+        if await sync_to_async(form.is_valid)():
+            await sync_to_async(guardar or type(form).save)(form)
+            return redirect(destino)
+    else:
+        form = clase_formulario(instance=instancia)
+    return await renderizar(request, plantilla, {'form': form, 'titulo': titulo})
+
+
+# --- Vista de Inicio ---
+async def home(request):
+    """
+    Versión asíncrona de views.home.
+    """
+    kpis = await sync_to_async(obtener_kpis)()
+    return await renderizar(request, 'gestion/home.html', {'titulo': 'Sistema de Gestión de Taller Automotriz', 'kpis': kpis})
+
+# --- Vistas para Cliente ---
+@cache_por_version(Cliente, omitir=pide_estadisticas)
+async def cliente_list(request):
+    """
+    Versión asíncrona de views.cliente_list.
+    """
+    clientes = Cliente.objects.all()
+    estadisticas = pide_estadisticas(request)
+    orden = request.GET.get('orden', '')
+    if estadisticas:
+        clientes = anotar_estadisticas(clientes, 'vehiculo__cliente')
+        if orden:
+            clientes = ordenar_por_estadistica(clientes, orden)
+            if clientes is None:
+                return HttpResponseBadRequest("Columna de orden inválida.")
+    return await renderizar(request, 'gestion/cliente_list.html', {
+        'clientes': await listar(clientes),
+        'estadisticas': estadisticas,
+        'orden': orden,
+        'titulo': 'Listado de Clientes',
+    })
+
+async def cliente_create(request):
+    """
+    Versión asíncrona de views.cliente_create.
+    """
+    return await procesar_formulario(request, ClienteForm, 'gestion/cliente_form.html', 'Crear Cliente', 'cliente_list')
+
+async def cliente_update(request, pk):
+    """
+    Versión asíncrona de views.cliente_update.
+    """
+    cliente = await obtener_o_404(Cliente.objects.all(), pk=pk)
+    return await procesar_formulario(request, ClienteForm, 'gestion/cliente_form.html', 'Editar Cliente', 'cliente_list', cliente)
+
+# --- Vistas para Vehiculo ---
+@cache_por_version(Vehiculo, Cliente)
+async def vehiculo_list(request):
+    """
+    Versión asíncrona de views.vehiculo_list.
+    """
+    vehiculos = await listar(Vehiculo.objects.select_related('cliente'))
+    return await renderizar(request, 'gestion/vehiculo_list.html', {'vehiculos': vehiculos, 'titulo': 'Listado de Vehículos'})
+
+async def vehiculo_create(request):
+    """
+    Versión asíncrona de views.vehiculo_create.
+    """
+    return await procesar_formulario(request, VehiculoForm, 'gestion/vehiculo_form.html', 'Crear Vehículo', 'vehiculo_list')
+
+async def vehiculo_update(request, pk):
+    """
+    Versión asíncrona de views.vehiculo_update.
+    """
+    vehiculo = await obtener_o_404(Vehiculo.objects.all(), pk=pk)
+    return await procesar_formulario(request, VehiculoForm, 'gestion/vehiculo_form.html', 'Editar Vehículo', 'vehiculo_list', vehiculo)
+
+# --- Vistas para Servicio ---
+@cache_por_version(Servicio)
+async def servicio_list(request):
+    """
+    Versión asíncrona de views.servicio_list.
+    """
+    servicios = await listar(Servicio.objects.all())
+    return await renderizar(request, 'gestion/servicio_list.html', {'servicios': servicios, 'titulo': 'Listado de Servicios'})
+
+async def servicio_create(request):
+    """
+    Versión asíncrona de views.servicio_create.
+    """
+    return await procesar_formulario(request, ServicioForm, 'gestion/servicio_form.html', 'Crear Servicio', 'servicio_list')
+
+async def servicio_update(request, pk):
+    """
+    Versión asíncrona de views.servicio_update.
+    """
+    servicio = await obtener_o_404(Servicio.objects.all(), pk=pk)
+    return await procesar_formulario(request, ServicioForm, 'gestion/servicio_form.html', 'Editar Servicio', 'servicio_list', servicio)
+
+# --- Vistas para OrdenReparacion ---
+async def orden_reparacion_list(request):
+    """
+    Versión asíncrona de views.orden_reparacion_list, con la misma paginación por cursor.
+    """
+    ordenes = (
+        OrdenReparacion.objects
+        .visibles() # Sin las órdenes de vehículos eliminados pendientes de purga
+        .select_related('vehiculo__cliente') # Vehículo y cliente en la misma consulta
+        .prefetch_related('servicios') # Servicios de toda la página en una sola consulta
+    )
+    try:
+        pagina = await apaginar_keyset(
+            ordenes,
+            'fecha_ingreso',
+            despues=request.GET.get('despues'),
+            antes=request.GET.get('antes'),
+            tamano=leer_tamano_pagina(request),
+        )
+    except CursorInvalido:
+        raise Http404("Cursor de paginación inválido.")
+    return await renderizar(request, 'gestion/orden_reparacion_list.html', {'ordenes': pagina, 'pagina': pagina, 'titulo': 'Listado de Órdenes de Reparación'})
+
+async def orden_reparacion_create(request):
+    """
+    Versión asíncrona de views.orden_reparacion_create.
+    La orden, sus servicios y el monto total se guardan en una sola transacción.
+    """
+    return await procesar_formulario(
+        request, OrdenReparacionForm, 'gestion/orden_reparacion_form.html', 'Crear Orden de Reparación',
+        'orden_reparacion_list', guardar=guardar_orden_reparacion,
+    )
+
+async def orden_reparacion_update(request, pk):
+    """
+    Versión asíncrona de views.orden_reparacion_update.
+    La orden, sus servicios y el monto total se guardan en una sola transacción.
+    """
+    orden = await obtener_o_404(OrdenReparacion.objects.visibles(), pk=pk)
+    return await procesar_formulario(
+        request, OrdenReparacionForm, 'gestion/orden_reparacion_form.html', 'Editar Orden de Reparación',
+        'orden_reparacion_list', orden, guardar=guardar_orden_reparacion,
+    )
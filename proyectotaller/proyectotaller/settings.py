@@ -10,6 +10,7 @@ Para la lista completa de configuraciones y sus valores, consulte
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import sys
 from pathlib import Path
 
 # Define la base del directorio del proyecto.
@@ -55,6 +56,8 @@ TAILWIND_APP_NAME = 'theme'
 # Middleware de Django.
 # Componentes que procesan las solicitudes y respuestas.
 MIDDLEWARE = [
+    'gestion.instrumentacion.InstrumentacionMiddleware', # Métricas por solicitud (cabecera Server-Timing y log)
+    'gestion.vistas_async.EnrutamientoAsyncMiddleware', # Bajo ASGI, usa las vistas asíncronas (ROOT_URLCONF_ASYNC)
     'django.middleware.security.SecurityMiddleware', # Seguridad básica
     'django.contrib.sessions.middleware.SessionMiddleware', # Habilita el soporte de sesiones
     'django.middleware.common.CommonMiddleware', # Reescritura de URL, etc.
@@ -65,15 +68,27 @@ MIDDLEWARE = [
     'django_browser_reload.middleware.BrowserReloadMiddleware', # Middleware para recarga automática del navegador
 ]
 
+# Instrumentación de solicitudes (gestion/instrumentacion.py).
+# Activa el conteo de consultas y tiempos por solicitud.
+INSTRUMENTACION_ACTIVA = True
+# Cantidad de repeticiones de una misma consulta en una solicitud a partir de la cual
+# se registra una advertencia de posible N+1 (0 para desactivar la advertencia).
+INSTRUMENTACION_UMBRAL_DUPLICADAS = 5
+
 # URLconf raíz del proyecto.
 ROOT_URLCONF = 'proyectotaller.urls'
+# URLconf usada al servir el proyecto con ASGI (vistas asíncronas, ver gestion/vistas_async.py).
+ROOT_URLCONF_ASYNC = 'proyectotaller.urls_async'
 
 # Configuración de plantillas de Django.
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Motor de plantillas de Django que además mide el tiempo de renderizado (ver gestion/instrumentacion.py)
+        'BACKEND': 'gestion.instrumentacion.DjangoTemplatesInstrumentado',
         'DIRS': [], # Directorios adicionales para buscar plantillas
-        'APP_DIRS': True, # Permite que las aplicaciones busquen sus propias plantillas
+        # Permite que las aplicaciones busquen sus propias plantillas. Como no se definen 'loaders',
+        # Django envuelve los cargadores en el cargador 'cached': cada plantilla se compila una vez por proceso.
+        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug', # Añadido para depuración
@@ -92,13 +107,72 @@ WSGI_APPLICATION = 'proyectotaller.wsgi.application'
 # Base de datos
 # Consulte https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# PRAGMAs que se aplican a cada conexión SQLite al abrirla (ver 'init_command' más abajo).
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL', # Los lectores no bloquean al escritor ni el escritor a los lectores
+    'synchronous': 'NORMAL', # Con WAL es seguro ante caídas del proceso y evita un fsync por transacción
+    'busy_timeout': 5000, # Milisegundos que se espera un bloqueo antes de fallar con "database is locked"
+    'cache_size': -20000, # Caché de páginas por conexión, en KiB (valor negativo): unos 20 MB
+    'mmap_size': 268435456, # Lee hasta 256 MB del archivo mediante memoria mapeada
+    'temp_store': 'MEMORY', # Tablas e índices temporales en memoria
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3', # Motor de base de datos SQLite
         'NAME': BASE_DIR / 'db.sqlite3', # Ruta al archivo de la base de datos
+        'OPTIONS': {
+            # Sentencias que se ejecutan al abrir cada conexión.
+            'init_command': ';'.join(f'PRAGMA {nombre}={valor}' for nombre, valor in SQLITE_PRAGMAS.items()),
+            # Las transacciones toman el bloqueo de escritura al comenzar: si otra conexión está
+            # escribiendo se espera (busy_timeout) en lugar de fallar a mitad de la transacción.
+            'transaction_mode': 'IMMEDIATE',
+        },
+        # Segundos que se reutiliza una conexión entre solicitudes (0 = una conexión nueva por solicitud).
+        'CONN_MAX_AGE': 600,
+        # Comprueba que una conexión reutilizada sigue funcionando antes de usarla en una nueva solicitud.
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+
+# Caché
+# Consulte https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# Caché en memoria local del proceso. En producción con varios procesos conviene una caché
+# compartida (por ejemplo Redis o Memcached) para que las versiones y contadores sean comunes.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'gestion',
     }
 }
 
+# Caché de los listados de clientes, vehículos y servicios (gestion/cache.py).
+# Es opcional: se activa poniendo CACHE_LISTADOS_ACTIVA en True.
+CACHE_LISTADOS_ACTIVA = False
+# Duración máxima, en segundos, de una respuesta cacheada.
+CACHE_LISTADOS_TIMEOUT = 3600
+
+# Borrado de clientes y vehículos (gestion/eliminacion.py).
+# Al eliminar, las filas solo se marcan y se ocultan; la purga las borra después por lotes.
+# Si PURGA_AUTOMATICA es True, cada eliminación encola la tarea de purga (ver TAREAS_EN_PROCESO);
+# si es False, solo la realiza 'manage.py purge_deleted'.
+PURGA_AUTOMATICA = True
+# Filas que la purga borra por transacción.
+PURGA_LOTE = 500
+
+# Tareas en segundo plano (gestion/tareas.py).
+# Las ejecuta 'manage.py run_tasks'. Si TAREAS_EN_PROCESO es True, además el proceso que encola
+# una tarea lanza un hilo que la ejecuta al confirmarse la transacción (útil con runserver,
+# sin un proceso aparte para las tareas) y que programa los reintentos de las que fallan.
+# Las tareas que quedan en curso porque el proceso terminó solo las recupera 'run_tasks'.
+TAREAS_EN_PROCESO = True
+# Segundos de espera antes del primer reintento de una tarea fallida; se duplica en cada intento.
+TAREAS_ESPERA_REINTENTO = 30
+# Segundos tras los cuales una tarea en curso se considera interrumpida y 'run_tasks' la devuelve a la cola.
+TAREAS_TIEMPO_MAXIMO = 3600
+
 
 # Validación de contraseñas
 # Consulte https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -146,3 +220,26 @@ STATIC_URL = 'static/'
 
 # Tipo de campo automático predeterminado para las claves primarias de los modelos.
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Registro (logging)
+# Consulte https://docs.djangoproject.com/en/5.2/topics/logging/
+
+# Envía a la consola las líneas de log de la instrumentación de solicitudes.
+# Al ejecutar las pruebas solo se muestran las advertencias, para no llenar la salida.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'gestion.instrumentacion': {
+            'handlers': ['console'],
+            'level': 'WARNING' if 'test' in sys.argv[1:2] else 'INFO',
+            'propagate': False,
+        },
+    },
+}
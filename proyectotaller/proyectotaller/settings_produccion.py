@@ -0,0 +1,66 @@
+"""
+Configuración de Django para producción del proyecto proyectotaller.
+
+Parte de settings.py (desarrollo) y quita lo que solo sirve para desarrollar: el modo de
+depuración, las aplicaciones y el middleware de recarga automática y Tailwind, y el procesador
+de contexto 'debug'. Cada uno agrega tiempo de importación, trabajo por solicitud y memoria
+a cada proceso del servidor (ver 'manage.py bench_arranque').
+
+Se selecciona con la variable de entorno DJANGO_SETTINGS_MODULE:
+    DJANGO_SETTINGS_MODULE=proyectotaller.settings_produccion
+
+Variables de entorno:
+    DJANGO_SECRET_KEY       Clave secreta (obligatoria).
+    DJANGO_ALLOWED_HOSTS    Hosts permitidos, separados por comas (por defecto 'localhost,127.0.0.1').
+"""
+
+import copy
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .settings import * # noqa: F401,F403
+from .settings import BASE_DIR, INSTALLED_APPS, MIDDLEWARE, TEMPLATES
+
+# Aplicaciones y middleware que solo se usan durante el desarrollo.
+SOLO_DESARROLLO = ['tailwind', 'django_browser_reload']
+MIDDLEWARE_SOLO_DESARROLLO = ['django_browser_reload.middleware.BrowserReloadMiddleware']
+
+# Nunca se ejecuta con DEBUG activado en producción.
+DEBUG = False
+
+# La clave secreta se lee del entorno; la de settings.py es pública.
+SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY', '')
+if not SECRET_KEY:
+    raise ImproperlyConfigured('Defina la variable de entorno DJANGO_SECRET_KEY para usar la configuración de producción.')
+
+# Hosts permitidos, desde el entorno.
+ALLOWED_HOSTS = [host.strip() for host in os.environ.get('DJANGO_ALLOWED_HOSTS', 'localhost,127.0.0.1').split(',') if host.strip()]
+
+# Sin las aplicaciones de desarrollo (recarga automática del navegador y Tailwind).
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in SOLO_DESARROLLO]
+
+# Sin el middleware de recarga automática, que inspecciona cada respuesta HTML.
+MIDDLEWARE = [middleware for middleware in MIDDLEWARE if middleware not in MIDDLEWARE_SOLO_DESARROLLO]
+
+# Sin el procesador de contexto 'debug', que agrega datos de depuración a cada plantilla.
+# Como no se definen 'loaders', las plantillas se compilan una vez por proceso (cargador 'cached').
+TEMPLATES = copy.deepcopy(TEMPLATES)
+TEMPLATES[0]['OPTIONS']['context_processors'] = [
+    procesador for procesador in TEMPLATES[0]['OPTIONS']['context_processors']
+    if procesador != 'django.template.context_processors.debug'
+]
+
+# Archivos estáticos reunidos con 'manage.py collectstatic'.
+# Los nombres llevan un hash del contenido (se pueden cachear indefinidamente en el navegador)
+# y junto a cada archivo de texto se guarda una copia comprimida .gz (ver gestion/almacenamiento.py),
+# que el servidor web puede enviar directamente (por ejemplo 'gzip_static on' en nginx).
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'gestion.almacenamiento.ManifestComprimido',
+    },
+}
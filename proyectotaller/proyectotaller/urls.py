@@ -14,6 +14,7 @@ Incluyendo otra URLconf
     1. Importe la función include(): from django.urls import include, path
     2. Agregue una URL a urlpatterns: path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
 from gestion import views # Importa las vistas de la aplicación 'gestion'
@@ -25,6 +26,8 @@ urlpatterns = [
     path('gestion/', include('gestion.urls')),
     # Mapea la URL raíz del proyecto a la vista 'home' de la aplicación 'gestion'.
     path('', views.home, name='home'),
-    # URL para django-browser-reload
-    path("__reload__/", include("django_browser_reload.urls")),
 ]
+
+# URL para django-browser-reload, solo si está instalado (no lo está en settings_produccion.py).
+if 'django_browser_reload' in settings.INSTALLED_APPS:
+    urlpatterns.append(path("__reload__/", include("django_browser_reload.urls")))
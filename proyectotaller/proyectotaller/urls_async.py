@@ -0,0 +1,24 @@
+"""
+Configuración de URL del proyecto proyectotaller al servirse con ASGI.
+
+Es igual a urls.py, pero usa las vistas asíncronas de la aplicación 'gestion'
+(ver gestion/vistas_async.py). EnrutamientoAsyncMiddleware la selecciona en cada
+solicitud ASGI a través de ROOT_URLCONF_ASYNC en settings.py.
+"""
+from django.conf import settings
+from django.contrib import admin
+from django.urls import path, include
+from gestion import vistas_async # Importa las vistas asíncronas de la aplicación 'gestion'
+
+urlpatterns = [
+    # Ruta para la interfaz de administración de Django.
+    path('admin/', admin.site.urls),
+    # Incluye las URLs asíncronas de la aplicación 'gestion' bajo el prefijo 'gestion/'.
+    path('gestion/', include('gestion.urls_async')),
+    # Mapea la URL raíz del proyecto a la vista asíncrona 'home' de la aplicación 'gestion'.
+    path('', vistas_async.home, name='home'),
+]
+
+# URL para django-browser-reload, solo si está instalado (no lo está en settings_produccion.py).
+if 'django_browser_reload' in settings.INSTALLED_APPS:
+    urlpatterns.append(path("__reload__/", include("django_browser_reload.urls")))